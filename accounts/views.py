@@ -418,10 +418,7 @@ def admin_accounts(request):
 @user_passes_test(lambda u: u.is_superuser)
 def admin_events(request):
     """Interface admin pour les événements"""
-    from django.db.models import Count
-    events = Evenement.objects.all().annotate(
-        participant_count=Count('participants')
-    ).order_by('-date_debut')
+    events = Evenement.objects.all().order_by('-date_debut')
     context = {
         'title': 'Administration des Événements',
         'object_list': events,
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AppevenementsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'appEvenements'
+
+    def ready(self):
+        # Compteur de participants tenu à jour par les signaux de Participation
+        import appEvenements.signals  # noqa: F401
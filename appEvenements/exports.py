@@ -0,0 +1,50 @@
+try:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+except ImportError:
+    letter = None
+
+
+def evenement_cache_fields(evenement):
+    """Champs qui déterminent le contenu du PDF (utilisés pour la clé de cache)."""
+    return {
+        'id': evenement.id,
+        'titre': evenement.titre,
+        'description': evenement.description,
+        'date_debut': evenement.date_debut.isoformat(),
+        'date_fin': evenement.date_fin.isoformat(),
+        'lieu': evenement.lieu,
+        'statut': evenement.statut,
+        'visibilite': evenement.visibilite,
+    }
+
+
+def render_evenement_pdf(evenement, output):
+    """Écrit la fiche PDF de l'événement dans ``output`` (chemin ou fichier binaire)."""
+    doc = SimpleDocTemplate(output, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+
+    # Titre
+    title = Paragraph(f"Détails de l'événement: {evenement.titre}", styles['Title'])
+    story.append(title)
+    story.append(Spacer(1, 12))
+
+    # Détails
+    details = [
+        f"Description: {evenement.description}",
+        f"Date de début: {evenement.date_debut.strftime('%d/%m/%Y %H:%M')}",
+        f"Date de fin: {evenement.date_fin.strftime('%d/%m/%Y %H:%M')}",
+        f"Lieu: {evenement.lieu}",
+        f"Statut: {evenement.get_statut_display()}",
+        f"Visibilité: {evenement.get_visibilite_display()}",
+        f"Durée: {evenement.get_duree()}",
+    ]
+
+    for detail in details:
+        p = Paragraph(detail, styles['Normal'])
+        story.append(p)
+        story.append(Spacer(1, 6))
+
+    doc.build(story)
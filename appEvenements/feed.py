@@ -0,0 +1,106 @@
+"""
+Flux JSON du calendrier des événements.
+
+Le calendrier ne reçoit plus tous les événements dans la page : il demande
+``calendar_feed`` pour la fenêtre affichée (paramètres ``start`` et ``end``,
+envoyés par FullCalendar) et ne reçoit que les champs qu'il affiche.
+
+Chaque fenêtre est mise en cache. Toute écriture sur un événement change la
+version du calendrier (l'horodatage de la dernière modification, voir
+``appEvenements.signals``), ce qui invalide d'un coup toutes les fenêtres ; la
+version sert aussi d'``ETag`` et de ``Last-Modified``, si bien qu'un
+navigateur qui revient sur un mois déjà vu reçoit une réponse 304 vide.
+"""
+import time
+from datetime import datetime, time as day_time, timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.text import Truncator
+
+from .models import Evenement
+
+FEED_TTL = 60 * 60
+MAX_WINDOW = timedelta(days=400)
+DESCRIPTION_LENGTH = 300
+FEATURED_COLOR = '#FFD700'
+
+VERSION_KEY = "appEvenements:calendar:version"
+WINDOW_KEY = "appEvenements:calendar:{}:{}:{}"
+
+
+class InvalidWindow(ValueError):
+    pass
+
+
+def version():
+    """Horodatage (ns) de la dernière modification connue ; repart de maintenant si le cache a été vidé."""
+    return cache.get_or_set(VERSION_KEY, time.time_ns, None)
+
+
+def expire_feed():
+    """Invalide toutes les fenêtres en cache (appelé à chaque écriture sur un événement)."""
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def _parse_bound(value):
+    parsed = parse_datetime(value or "")
+    if parsed is None:
+        day = parse_date(value or "")
+        if day is None:
+            raise InvalidWindow(f"Date invalide : {value!r}.")
+        parsed = datetime.combine(day, day_time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_window(start, end):
+    """``(début, fin)`` conscients du fuseau ; la fenêtre est bornée à ``MAX_WINDOW``."""
+    try:
+        start, end = _parse_bound(start), _parse_bound(end)
+    except ValueError as error:
+        raise InvalidWindow(str(error))
+    if end <= start:
+        raise InvalidWindow("La fin de la période doit suivre son début.")
+    if end - start > MAX_WINDOW:
+        raise InvalidWindow("Période trop longue.")
+    return start, end
+
+
+def serialize(event):
+    data = {
+        'id': event['id'],
+        'title': event['titre'],
+        'start': event['date_debut'].isoformat(),
+        'end': event['date_fin'].isoformat(),
+        'description': Truncator(event['description']).chars(DESCRIPTION_LENGTH),
+        'location': event['lieu'],
+        'status': event['statut'],
+        'featured': event['featured'],
+    }
+    if event['featured']:
+        data['color'] = FEATURED_COLOR
+    return data
+
+
+def compute_window(start, end):
+    """Événements qui chevauchent la fenêtre, dans l'ordre chronologique."""
+    events = (
+        Evenement.objects.filter(date_debut__lt=end, date_fin__gt=start)
+        .order_by('date_debut', 'pk')
+        .values('id', 'titre', 'date_debut', 'date_fin', 'description', 'lieu', 'statut', 'featured')
+    )
+    return [serialize(event) for event in events]
+
+
+def get_window(start, end, current_version=None):
+    """Événements de la fenêtre, servis depuis le cache."""
+    current_version = version() if current_version is None else current_version
+    key = WINDOW_KEY.format(current_version, start.isoformat(), end.isoformat())
+    events = cache.get(key)
+    if events is None:
+        events = compute_window(start, end)
+        cache.set(key, events, FEED_TTL)
+    return events
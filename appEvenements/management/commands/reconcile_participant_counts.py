@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from appEvenements import registrations
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule le nombre d'inscrits de chaque événement à partir des participations, "
+        "puis attribue les places libres aux listes d'attente."
+    )
+
+    def handle(self, *args, **options):
+        fixed = registrations.reconcile()
+        self.stdout.write(self.style.SUCCESS(f"{fixed} compteur(s) de participants corrigé(s)."))
+        promoted = registrations.promote_all()
+        self.stdout.write(self.style.SUCCESS(f"{promoted} inscription(s) depuis les listes d'attente."))
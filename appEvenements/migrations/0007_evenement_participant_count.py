@@ -0,0 +1,36 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:41
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_participants(apps, schema_editor):
+    Evenement = apps.get_model('appEvenements', 'Evenement')
+    Participation = apps.get_model('appEvenements', 'Participation')
+    Evenement.objects.update(participant_count=Coalesce(
+        Subquery(
+            Participation.objects.filter(evenement=OuterRef('pk'))
+            .order_by()
+            .values('evenement')
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        Value(0),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appEvenements', '0006_remove_evenement_image_pro_alter_evenement_featured_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evenement',
+            name='participant_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text="Nombre d'inscrits (tenu à jour par appEvenements.registrations)"),
+        ),
+        migrations.RunPython(count_participants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appEvenements', '0007_evenement_participant_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('evenement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist', to='appEvenements.evenement')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='evenement_waitlist', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['evenement', 'id'], name='evenement_waitlist_queue')],
+                'unique_together': {('evenement', 'user')},
+            },
+        ),
+    ]
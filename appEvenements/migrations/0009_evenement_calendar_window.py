@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appEvenements', '0008_waitlistentry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='evenement',
+            index=models.Index(fields=['date_debut', 'date_fin'], name='evenement_calendar_window'),
+        ),
+    ]
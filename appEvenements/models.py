@@ -15,6 +15,7 @@ class Evenement(models.Model):
     statut = models.CharField(max_length=50, choices=[('planifie', 'Planifié'), ('en_cours', 'En cours'), ('termine', 'Terminé'), ('annule', 'Annulé')])
     visibilite = models.CharField(max_length=50, choices=[('public', 'Public'), ('prive', 'Privé')])
     max_participants = models.PositiveIntegerField(default=100, help_text="Nombre maximum de participants")
+    participant_count = models.PositiveIntegerField(default=0, editable=False, help_text="Nombre d'inscrits (tenu à jour par appEvenements.registrations)")
     featured = models.BooleanField(default=False, help_text="Événement à la une")
     promotion_image = models.FileField(upload_to='promotions/', blank=True, null=True, help_text="Image de promotion")
     promotion_description = models.TextField(blank=True, null=True, help_text="Description de promotion")
@@ -33,6 +34,8 @@ class Evenement(models.Model):
         from django.utils import timezone
         now = timezone.now()
         return self.date_debut <= now <= self.date_fin
+    def is_full(self):
+        return self.participant_count >= self.max_participants
     def clean(self):
         if self.date_fin <= self.date_debut:
             raise ValidationError("La date de fin doit être postérieure à la date de début.")
@@ -46,8 +49,21 @@ class Evenement(models.Model):
             raise ValueError("La date de fin doit être postérieure à la date de début.")
     def save(self, *args, **kwargs):
         self.validate_dates()
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Le compteur n'est modifié que par des UPDATE atomiques (appEvenements.registrations) :
+            # une valeur lue avant une inscription concurrente ne doit pas l'écraser
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'participant_count'
+            ]
         super().save(*args, **kwargs)
 
+    class Meta:
+        indexes = [
+            # Fenêtres du calendrier (appEvenements.feed)
+            models.Index(fields=['date_debut', 'date_fin'], name='evenement_calendar_window'),
+        ]
+
 
 class Participation(models.Model):
     evenement = models.ForeignKey(Evenement, on_delete=models.CASCADE, related_name='participants')
@@ -59,3 +75,21 @@ class Participation(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.evenement.titre}"
+
+
+class WaitlistEntry(models.Model):
+    """Place dans la file d'attente d'un événement complet ; l'ordre d'arrivée est celui des id."""
+    evenement = models.ForeignKey(Evenement, on_delete=models.CASCADE, related_name='waitlist')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='evenement_waitlist')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('evenement', 'user')
+        ordering = ['id']
+        indexes = [
+            # File d'un événement dans l'ordre : tête de file et calcul des positions
+            models.Index(fields=['evenement', 'id'], name='evenement_waitlist_queue'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.evenement.titre} (attente)"
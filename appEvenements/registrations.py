@@ -0,0 +1,211 @@
+"""
+Inscriptions aux événements et liste d'attente.
+
+``Evenement.participant_count`` compte les inscrits. ``register`` réserve une
+place par un ``UPDATE`` conditionnel (``participant_count < max_participants``)
+puis crée la participation, le tout dans une transaction : deux inscriptions
+simultanées à la dernière place ne peuvent pas réussir toutes les deux, et la
+vérification de capacité ne coûte plus de ``COUNT``.
+
+Quand l'événement est complet, l'utilisateur peut rejoindre la liste
+d'attente (``join_waitlist``), une file par événement servie dans l'ordre
+d'arrivée. Dès qu'une place se libère (désinscription, participant supprimé,
+capacité augmentée), ``promote`` inscrit la tête de file, place par place,
+avec la même réservation atomique ; les promus reçoivent une notification,
+créée en une seule insertion après la validation de la transaction.
+
+Les participations créées ou supprimées ailleurs (administration, suppression
+d'un utilisateur) mettent aussi le compteur à jour et déclenchent la
+promotion, par les signaux de ``appEvenements.signals``. ``reconcile``
+(commande ``reconcile_participant_counts``) recalcule les compteurs après des
+modifications en masse qui n'émettent pas de signaux.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+
+from .models import Evenement, Participation, WaitlistEntry
+
+
+class RegistrationError(Exception):
+    """Inscription refusée ; le message est destiné à l'utilisateur."""
+
+
+class AlreadyRegistered(RegistrationError):
+    pass
+
+
+class EventFull(RegistrationError):
+    pass
+
+
+def _reserve_seat(evenement_id):
+    return Evenement.objects.filter(
+        pk=evenement_id, participant_count__lt=F("max_participants"),
+    ).update(participant_count=F("participant_count") + 1)
+
+
+def _create_counted(evenement_id, user_id):
+    participation = Participation(evenement_id=evenement_id, user_id=user_id)
+    # Place déjà comptée par _reserve_seat
+    participation._counted = True
+    participation.save()
+    return participation
+
+
+def register(evenement, user):
+    """Inscrit ``user`` à ``evenement`` s'il reste une place. Retourne la participation."""
+    with transaction.atomic():
+        if not _reserve_seat(evenement.pk):
+            if Participation.objects.filter(evenement=evenement, user=user).exists():
+                raise AlreadyRegistered("Vous êtes déjà inscrit à cet événement.")
+            raise EventFull("L'événement est complet.")
+        try:
+            with transaction.atomic():
+                participation = _create_counted(evenement.pk, user.pk)
+        except IntegrityError:
+            # L'exception annule aussi la réservation
+            raise AlreadyRegistered("Vous êtes déjà inscrit à cet événement.")
+        # Une inscription directe fait sortir de la file d'attente
+        WaitlistEntry.objects.filter(evenement=evenement, user=user).delete()
+    return participation
+
+
+def unregister(evenement, user):
+    """Désinscrit ``user`` ; retourne False s'il n'était pas inscrit."""
+    participation = Participation.objects.filter(evenement=evenement, user=user).first()
+    if participation is None:
+        return False
+    # Le signal post_delete libère la place et promeut la tête de file
+    participation.delete()
+    return True
+
+
+def increment(evenement_id, delta):
+    """Variation du compteur, sans jamais descendre sous zéro."""
+    queryset = Evenement.objects.filter(pk=evenement_id)
+    if delta < 0:
+        queryset = queryset.filter(participant_count__gte=-delta)
+    queryset.update(participant_count=F("participant_count") + delta)
+
+
+# ============================================================
+# LISTE D'ATTENTE
+# ============================================================
+
+def join_waitlist(evenement, user):
+    """Ajoute ``user`` en fin de file (ou retourne sa place s'il y est déjà)."""
+    if Participation.objects.filter(evenement=evenement, user=user).exists():
+        raise AlreadyRegistered("Vous êtes déjà inscrit à cet événement.")
+    entry, _ = WaitlistEntry.objects.get_or_create(evenement=evenement, user=user)
+    return entry
+
+
+def leave_waitlist(evenement, user):
+    """Retire ``user`` de la file ; retourne False s'il n'y était pas."""
+    deleted, _ = WaitlistEntry.objects.filter(evenement=evenement, user=user).delete()
+    return bool(deleted)
+
+
+def waitlist_position(entry):
+    """
+    Position (à partir de 1) : un comptage des entrées qui précèdent, sur
+    l'index (événement, id). Le coût croît avec la position (parcours d'index,
+    sans lire la table) ; un rang stocké éviterait ce parcours mais devrait être
+    renuméroté à chaque départ au milieu de la file.
+    """
+    return WaitlistEntry.objects.filter(evenement_id=entry.evenement_id, pk__lt=entry.pk).count() + 1
+
+
+def waitlist_positions(user, evenements):
+    """``{id d'événement: position}`` des files de ``user`` parmi ``evenements``, en une requête."""
+    ahead = (
+        WaitlistEntry.objects.filter(evenement_id=OuterRef("evenement_id"), pk__lt=OuterRef("pk"))
+        .order_by()
+        .values("evenement_id")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    entries = (
+        WaitlistEntry.objects.filter(user=user, evenement__in=evenements)
+        .annotate(ahead=Coalesce(Subquery(ahead), Value(0)))
+        .values_list("evenement_id", "ahead")
+    )
+    return {evenement_id: ahead + 1 for evenement_id, ahead in entries}
+
+
+def promote(evenement_id):
+    """
+    Inscrit la tête de file tant qu'il reste des places. Chaque promotion
+    réserve sa place comme ``register`` ; une entrée déjà retirée par un autre
+    processus est sautée. Retourne les participations créées.
+    """
+    promoted = []
+    with transaction.atomic():
+        while True:
+            with transaction.atomic():
+                if not _reserve_seat(evenement_id):
+                    break
+                entry = WaitlistEntry.objects.filter(evenement_id=evenement_id).order_by("pk").first()
+                if entry is None:
+                    # Personne n'attend : la réservation est annulée
+                    transaction.set_rollback(True)
+                    break
+                taken = WaitlistEntry.objects.filter(pk=entry.pk).delete()[0]
+                if not taken or Participation.objects.filter(evenement_id=evenement_id, user_id=entry.user_id).exists():
+                    increment(evenement_id, -1)
+                    continue
+                promoted.append(_create_counted(evenement_id, entry.user_id))
+        if promoted:
+            transaction.on_commit(lambda: notify_promoted(evenement_id, promoted))
+    return promoted
+
+
+def promote_all():
+    """Promeut les files de tous les événements qui ont des places libres. Retourne le nombre de promus."""
+    evenement_ids = (
+        Evenement.objects.filter(participant_count__lt=F("max_participants"), waitlist__isnull=False)
+        .values_list("pk", flat=True)
+        .distinct()
+    )
+    return sum(len(promote(evenement_id)) for evenement_id in list(evenement_ids))
+
+
+def notify_promoted(evenement_id, participations):
+    """Une notification par promu, créée en une seule insertion groupée."""
+    from forums.forum.models import Notification
+
+    titre = Evenement.objects.filter(pk=evenement_id).values_list("titre", flat=True).first()
+    if titre is None:
+        return
+    message = f"Une place s'est libérée : vous êtes inscrit à l'événement « {titre} »."[:255]
+    url = reverse("appEvenements:details", args=[evenement_id])
+    Notification.objects.bulk_create(
+        [
+            Notification(recipient_id=participation.user_id, notif_type="waitlist", message=message, url=url)
+            for participation in participations
+        ],
+        batch_size=500,
+    )
+
+
+# ============================================================
+# RECOMPTAGE
+# ============================================================
+
+def reconcile(queryset=None):
+    """Recalcule les compteurs (de ``queryset`` ou de tous les événements). Retourne le nombre corrigé."""
+    queryset = Evenement.objects.all() if queryset is None else queryset
+    actual = Coalesce(
+        Subquery(
+            Participation.objects.filter(evenement=OuterRef("pk"))
+            .order_by()
+            .values("evenement")
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        Value(0),
+    )
+    stale = queryset.annotate(actual=actual).filter(~Q(participant_count=F("actual")))
+    return Evenement.objects.filter(pk__in=stale.values("pk")).update(participant_count=actual)
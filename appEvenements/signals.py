@@ -0,0 +1,39 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import feed, registrations
+from .models import Evenement, Participation
+
+
+def _promote_on_commit(evenement_id):
+    transaction.on_commit(lambda: registrations.promote(evenement_id))
+
+
+@receiver(post_save, sender=Participation)
+def count_participation_on_save(sender, instance, created, raw=False, **kwargs):
+    """Compte les participations créées hors de ``registrations.register`` (administration...)."""
+    if created and not raw and not getattr(instance, "_counted", False):
+        registrations.increment(instance.evenement_id, 1)
+
+
+@receiver(post_delete, sender=Participation)
+def count_participation_on_delete(sender, instance, **kwargs):
+    """Libère la place et la propose à la liste d'attente."""
+    registrations.increment(instance.evenement_id, -1)
+    _promote_on_commit(instance.evenement_id)
+
+
+@receiver(post_save, sender=Evenement)
+def promote_on_capacity_change(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Une capacité augmentée libère des places pour la liste d'attente."""
+    if created or raw or (update_fields is not None and "max_participants" not in update_fields):
+        return
+    if instance.participant_count < instance.max_participants:
+        _promote_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=Evenement)
+@receiver(post_delete, sender=Evenement)
+def expire_calendar_feed(sender, **kwargs):
+    feed.expire_feed()
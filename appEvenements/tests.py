@@ -1,3 +1,244 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Club as AccountClub, Membership
+from forums.forum.models import Notification
+from resources import querybudget
+
+from . import registrations
+from .models import Evenement, Participation
+
+User = get_user_model()
+
+
+class EventListQueryTest(querybudget.QueryBudgetTestMixin, TestCase):
+    """Tests pour l'état des inscriptions de la liste des événements."""
+
+    def setUp(self):
+        """Configuration initiale pour les tests."""
+        self.user = User.objects.create_user(username='participant', password='testpass123')
+        Membership.objects.create(user=self.user, club=AccountClub.objects.create(name="Echecs"))
+        other = User.objects.create_user(username='autre', password='testpass123')
+        start = timezone.now() + timedelta(days=2)
+        self.events = [
+            Evenement.objects.create(
+                titre=f"Evenement numero {index}", description="Description de test", date_debut=start,
+                date_fin=start + timedelta(hours=2), lieu="Salle des fetes", statut='planifie',
+                visibilite='prive' if index % 3 == 0 else 'public', max_participants=2,
+            )
+            for index in range(13)
+        ]
+        Participation.objects.create(evenement=self.events[1], user=self.user)
+        Participation.objects.create(evenement=self.events[2], user=self.user)
+        Participation.objects.create(evenement=self.events[2], user=other)
+        self.client.login(username='participant', password='testpass123')
+
+    def test_flags(self):
+        """Inscription, complet et droit d'inscription sont calculés pour chaque événement."""
+        response = self.client.get(reverse('appEvenements:liste'))
+        flags = {item['event'].pk: item for item in response.context['events_with_flags']}
+        self.assertEqual(len(flags), 10)
+        self.assertTrue(flags[self.events[1].pk]['is_registered'])
+        self.assertFalse(flags[self.events[1].pk]['is_full'])
+        self.assertTrue(flags[self.events[2].pk]['is_full'])
+        self.assertFalse(flags[self.events[3].pk]['is_registered'])
+        self.assertTrue(flags[self.events[3].pk]['can_register'])
+        self.assertTrue(flags[self.events[0].pk]['can_register'])
+
+    def test_constant_query_count(self):
+        """Le nombre de requêtes ne dépend pas du nombre d'événements affichés."""
+        with self.assertMaxQueries(8) as full_page:
+            self.client.get(reverse('appEvenements:liste'))
+        with self.assertMaxQueries(8) as short_page:
+            self.client.get(reverse('appEvenements:liste'), {'page': 2})
+        self.assertEqual(full_page.count, short_page.count)
+
+
+class EventRegistrationTest(TestCase):
+    """Tests pour le compteur de participants et la capacité des événements."""
+
+    def setUp(self):
+        """Configuration initiale pour les tests."""
+        start = timezone.now() + timedelta(days=2)
+        self.event = Evenement.objects.create(
+            titre="Soiree jeux de societe", description="Description de test", date_debut=start,
+            date_fin=start + timedelta(hours=2), lieu="Salle des fetes", statut='planifie',
+            visibilite='public', max_participants=2,
+        )
+        self.users = [User.objects.create_user(username=f'joueur{index}', password='testpass123') for index in range(3)]
+
+    def _count(self):
+        self.event.refresh_from_db()
+        return self.event.participant_count
+
+    def test_capacity_is_enforced(self):
+        """La dernière place ne peut être prise qu'une fois ; une double inscription est refusée."""
+        registrations.register(self.event, self.users[0])
+        with self.assertRaises(registrations.AlreadyRegistered):
+            registrations.register(self.event, self.users[0])
+        self.assertEqual(self._count(), 1)
+
+        registrations.register(self.event, self.users[1])
+        with self.assertRaises(registrations.EventFull):
+            registrations.register(self.event, self.users[2])
+        self.assertEqual(self._count(), 2)
+        self.assertEqual(self.event.participants.count(), 2)
+
+    def test_register_view(self):
+        """La vue d'inscription passe par le compteur et refuse un événement complet."""
+        self.event.max_participants = 1
+        self.event.save()
+        self.client.login(username='joueur0', password='testpass123')
+        self.client.get(reverse('appEvenements:register_evenement', args=[self.event.pk]))
+        self.client.login(username='joueur1', password='testpass123')
+        response = self.client.get(reverse('appEvenements:register_evenement', args=[self.event.pk]), follow=True)
+        self.assertContains(response, "complet")
+        self.assertEqual(self._count(), 1)
+
+    def test_counter_follows_other_changes_and_reconciles(self):
+        """Ajouts et suppressions hors inscription sont comptés ; reconcile corrige un compteur faux."""
+        Participation.objects.create(evenement=self.event, user=self.users[0])
+        registrations.register(self.event, self.users[1])
+        self.users[0].delete()
+        self.assertEqual(self._count(), 1)
+        self.assertTrue(registrations.unregister(self.event, self.users[1]))
+        self.assertEqual(self._count(), 0)
+
+        Participation.objects.bulk_create([Participation(evenement=self.event, user=self.users[2])])
+        Evenement.objects.filter(pk=self.event.pk).update(participant_count=5)
+        out = StringIO()
+        call_command('reconcile_participant_counts', stdout=out)
+        self.assertIn("1 compteur", out.getvalue())
+        self.assertEqual(self._count(), 1)
+
+    def test_stale_instance_does_not_overwrite_counter(self):
+        """Enregistrer un événement lu avant une inscription ne remet pas le compteur à son ancienne valeur."""
+        stale = Evenement.objects.get(pk=self.event.pk)
+        registrations.register(self.event, self.users[0])
+        stale.featured = True
+        stale.save()
+        self.assertEqual(self._count(), 1)
+        self.assertTrue(self.event.featured)
+
+
+class WaitlistTest(TestCase):
+    """Tests pour la liste d'attente des événements complets."""
+
+    def setUp(self):
+        """Configuration initiale pour les tests."""
+        start = timezone.now() + timedelta(days=2)
+        self.event = Evenement.objects.create(
+            titre="Tournoi de badminton", description="Description de test", date_debut=start,
+            date_fin=start + timedelta(hours=2), lieu="Gymnase central", statut='planifie',
+            visibilite='public', max_participants=1,
+        )
+        self.users = [User.objects.create_user(username=f'sportif{index}', password='testpass123') for index in range(4)]
+        registrations.register(self.event, self.users[0])
+
+    def test_fifo_positions(self):
+        """Les positions suivent l'ordre d'arrivée et se décalent quand quelqu'un part."""
+        entries = [registrations.join_waitlist(self.event, user) for user in self.users[1:]]
+        self.assertEqual([registrations.waitlist_position(entry) for entry in entries], [1, 2, 3])
+        registrations.leave_waitlist(self.event, self.users[1])
+        self.assertEqual(registrations.waitlist_positions(self.users[3], [self.event]), {self.event.pk: 2})
+        with self.assertRaises(registrations.AlreadyRegistered):
+            registrations.join_waitlist(self.event, self.users[0])
+
+    def test_freed_seat_promotes_head_and_notifies(self):
+        """Une place libérée revient à la tête de file, qui est notifiée."""
+        registrations.join_waitlist(self.event, self.users[1])
+        registrations.join_waitlist(self.event, self.users[2])
+        with self.captureOnCommitCallbacks(execute=True):
+            registrations.unregister(self.event, self.users[0])
+
+        self.assertTrue(self.event.participants.filter(user=self.users[1]).exists())
+        self.assertEqual(self.event.waitlist.count(), 1)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participant_count, 1)
+        notification = Notification.objects.get(notif_type='waitlist')
+        self.assertEqual(notification.recipient, self.users[1])
+
+        # La notification mène à l'événement
+        self.client.login(username='sportif1', password='testpass123')
+        response = self.client.get(reverse('forum:notification-mark-read', args=[notification.pk]))
+        self.assertRedirects(response, reverse('appEvenements:details', args=[self.event.pk]), fetch_redirect_response=False)
+
+    def test_capacity_increase_and_full_register_view(self):
+        """S'inscrire à un événement complet place en file ; augmenter la capacité promeut la file."""
+        self.client.login(username='sportif1', password='testpass123')
+        response = self.client.get(reverse('appEvenements:register_evenement', args=[self.event.pk]), follow=True)
+        self.assertContains(response, "position 1")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.max_participants = 3
+            self.event.save()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participant_count, 2)
+        self.assertFalse(self.event.waitlist.exists())
+
+
+class CalendarFeedTest(querybudget.QueryBudgetTestMixin, TestCase):
+    """Tests pour le flux JSON du calendrier des événements."""
+
+    def setUp(self):
+        """Configuration initiale pour les tests."""
+        cache.clear()
+        self.start = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        self.events = [
+            Evenement.objects.create(
+                titre=f"Evenement du calendrier {index}", description="Description de test " * 30,
+                date_debut=self.start + timedelta(days=days), date_fin=self.start + timedelta(days=days, hours=2),
+                lieu="Salle des fetes", statut='planifie', visibilite='public', featured=index == 0,
+            )
+            for index, days in enumerate((1, 5, 60))
+        ]
+        self.url = reverse('appEvenements:calendar_feed')
+        self.window = {
+            'start': (self.start - timedelta(days=1)).isoformat(),
+            'end': (self.start + timedelta(days=30)).isoformat(),
+        }
+
+    def test_window_and_fields(self):
+        """Seuls les événements de la fenêtre sont servis, avec les champs du calendrier."""
+        response = self.client.get(self.url, self.window)
+        self.assertEqual(response.status_code, 200)
+        events = response.json()
+        self.assertEqual([event['id'] for event in events], [self.events[0].pk, self.events[1].pk])
+        self.assertEqual(events[0]['color'], '#FFD700')
+        self.assertNotIn('color', events[1])
+        self.assertLessEqual(len(events[0]['description']), 300)
+        self.assertEqual(events[0]['location'], "Salle des fetes")
+
+    def test_invalid_window(self):
+        """Une fenêtre absente, inversée ou trop longue est refusée."""
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'start': '2026-02-01', 'end': '2026-01-01'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'start': '2020-01-01', 'end': '2026-01-01'}).status_code, 400)
+
+    def test_etag_and_invalidation(self):
+        """Une fenêtre inchangée répond 304 sans requête SQL ; modifier un événement l'invalide."""
+        etag = self.client.get(self.url, self.window)['ETag']
+        with self.assertMaxQueries(0):
+            response = self.client.get(self.url, self.window, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.events[1].titre = "Evenement renomme"
+        self.events[1].save()
+        response = self.client.get(self.url, self.window, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()[1]['title'], "Evenement renomme")
 
-# Create your tests here.
+    def test_calendar_page_does_not_embed_events(self):
+        """La page du calendrier ne contient plus les événements, seulement l'URL du flux."""
+        response = self.client.get(reverse('appEvenements:calendar'))
+        self.assertContains(response, self.url)
+        self.assertNotContains(response, "Evenement du calendrier 2")
+        self.assertEqual(response.context['upcoming_events'], 3)
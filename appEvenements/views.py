@@ -3,19 +3,23 @@ from .models import Evenement, Participation
 from django.views import *
 from django.views.generic import *
 from .forms import EvenementForm, PromotionForm
-from django.http import HttpResponse
+from . import feed, registrations
+from django.http import JsonResponse
+from django.db.models import Count, Q
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 from accounts.models import User, Membership
 from django.urls import reverse
+from resources.jobs import enqueue_export
+from resources.querybudget import query_budget
+from resources.models import ExportJob
+from resources.views import export_job_response
 try:
     from reportlab.pdfgen import canvas
-    from reportlab.lib.pagesizes import letter
-    from reportlab.lib.styles import getSampleStyleSheet
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 except ImportError:
     canvas = None
-from io import BytesIO
 import datetime
 from django.contrib import messages
 
@@ -25,20 +29,40 @@ class ListeEvenementsView(ListView):
     template_name = 'appEvenements/evenements_list.html'
     context_object_name = 'evenements'
     paginate_by = 10
+    # Nombre de requêtes constant, quelle que soit la taille de la page
+    query_budget = 8
+
+    def get_queryset(self):
+        return Evenement.objects.order_by('pk')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         user = self.request.user
+        events = list(context['evenements'])
+
+        # Inscriptions de l'utilisateur sur la page : une requête pour tous les événements
+        registered_ids = set()
+        if user.is_authenticated and events:
+            registered_ids = set(
+                Participation.objects.filter(user=user, evenement__in=events).values_list('evenement_id', flat=True)
+            )
+        waitlist_positions = registrations.waitlist_positions(user, events) if user.is_authenticated and events else {}
+        # L'adhésion ne dépend pas de l'événement : calculée une fois, et seulement si un événement est privé
+        may_register = user.is_authenticated and not (user.is_superuser or user.is_staff)
+        is_member = None
+
         events_with_flags = []
-        for event in context['evenements']:
-            is_registered = Participation.objects.filter(evenement=event, user=user).exists() if user.is_authenticated else False
-            is_full = Participation.objects.filter(evenement=event).count() >= event.max_participants
-            can_register = user.is_authenticated and (event.visibilite == 'public' or
-                                                      Membership.objects.filter(user=user, active=True).exists()) and not (user.is_superuser or user.is_staff)
+        for event in events:
+            can_register = may_register and event.visibilite == 'public'
+            if may_register and not can_register:
+                if is_member is None:
+                    is_member = Membership.objects.filter(user=user, active=True).exists()
+                can_register = is_member
             events_with_flags.append({
                 'event': event,
-                'is_registered': is_registered,
-                'is_full': is_full,
+                'is_registered': event.pk in registered_ids,
+                'is_full': event.is_full(),
+                'waitlist_position': waitlist_positions.get(event.pk),
                 'can_register': can_register
             })
         context['events_with_flags'] = events_with_flags
@@ -59,7 +83,9 @@ class DetailEvenementView(DetailView):
         if is_admin_or_member:
             context['participants'] = Participation.objects.filter(evenement=evenement).select_related('user')
         context['is_registered'] = Participation.objects.filter(evenement=evenement, user=user).exists() if user.is_authenticated else False
-        context['is_full'] = Participation.objects.filter(evenement=evenement).count() >= evenement.max_participants
+        context['is_full'] = evenement.is_full()
+        if user.is_authenticated and not context['is_registered']:
+            context['waitlist_position'] = registrations.waitlist_positions(user, [evenement]).get(evenement.pk)
         context['can_register'] = user.is_authenticated and (evenement.visibilite == 'public' or
                                                              Membership.objects.filter(user=user, active=True).exists()) and not (user.is_superuser or user.is_staff)
         return context
@@ -125,84 +151,45 @@ class AdminInterfaceView(LoginRequiredMixin, ListView):
         return super().dispatch(request, *args, **kwargs)
 
 def download_pdf(request, evenement_id):
-    evenement = Evenement.objects.get(id=evenement_id)
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-    story = []
-
-    # Titre
-    title = Paragraph(f"Détails de l'événement: {evenement.titre}", styles['Title'])
-    story.append(title)
-    story.append(Spacer(1, 12))
-
-    # Détails
-    details = [
-        f"Description: {evenement.description}",
-        f"Date de début: {evenement.date_debut.strftime('%d/%m/%Y %H:%M')}",
-        f"Date de fin: {evenement.date_fin.strftime('%d/%m/%Y %H:%M')}",
-        f"Lieu: {evenement.lieu}",
-        f"Statut: {evenement.get_statut_display()}",
-        f"Visibilité: {evenement.get_visibilite_display()}",
-        f"Durée: {evenement.get_duree()}",
-    ]
-
-    for detail in details:
-        p = Paragraph(detail, styles['Normal'])
-        story.append(p)
-        story.append(Spacer(1, 6))
-
-    doc.build(story)
-    buffer.seek(0)
-    response = HttpResponse(buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{evenement.titre}.pdf"'
-    return response
+    """Met en file la fiche PDF de l'événement ; le fichier est servi depuis le cache des exports."""
+    evenement = get_object_or_404(Evenement, id=evenement_id)
+    if canvas is None:
+        messages.error(request, "L'export PDF nécessite ReportLab.")
+        return redirect('appEvenements:details', evenement_id=evenement_id)
+    job, created = enqueue_export(
+        ExportJob.KIND_EVENEMENT,
+        {'evenement': evenement.id, 'titre': evenement.titre},
+        request.user,
+    )
+    return export_job_response(request, job)
 
 
 
 
 
+@query_budget(6)
 def calendar_view(request):
-    # Get all events for calendar display
+    # Les événements du calendrier sont chargés fenêtre par fenêtre depuis calendar_feed
     from django.utils import timezone
-    import json
     now = timezone.now()
-    all_events = Evenement.objects.all().order_by('date_debut')
 
-    # Get featured events for homepage (all events that are marked as featured, including past ones)
     featured_events = Evenement.objects.filter(featured=True).order_by('-date_debut')[:6]
 
-    # Get statistics
-    total_events = Evenement.objects.count()
-    upcoming_events_count = Evenement.objects.filter(date_debut__gte=now).count()
-    active_events = Evenement.objects.filter(statut='en_cours').count()
-    completed_events = Evenement.objects.filter(statut='termine').count()
-
-    events_data = []
-    for event in all_events:
-        event_dict = {
-            'id': event.id,
-            'title': event.titre,
-            'start': event.date_debut.isoformat(),
-            'end': event.date_fin.isoformat(),
-            'description': event.description,
-            'location': event.lieu,
-            'status': event.statut,
-            'featured': event.featured,
-        }
-        if event.featured:
-            event_dict['color'] = '#FFD700'  # Yellow color for featured events
-        events_data.append(event_dict)
+    # Statistiques en une seule requête
+    stats = Evenement.objects.aggregate(
+        total=Count('pk'),
+        upcoming=Count('pk', filter=Q(date_debut__gte=now)),
+        active=Count('pk', filter=Q(statut='en_cours')),
+        completed=Count('pk', filter=Q(statut='termine')),
+    )
 
     context = {
-        'events': json.dumps(events_data),  # Convert to JSON string for JavaScript
-        'events_list': events_data,  # Keep original list for template use
         'featured_events': featured_events,
-        'upcoming_events_list': all_events.filter(date_debut__gte=now).order_by('date_debut')[:6],
-        'total_events': total_events,
-        'upcoming_events': upcoming_events_count,
-        'active_events': active_events,
-        'completed_events': completed_events,
+        'upcoming_events_list': Evenement.objects.filter(date_debut__gte=now).order_by('date_debut')[:6],
+        'total_events': stats['total'],
+        'upcoming_events': stats['upcoming'],
+        'active_events': stats['active'],
+        'completed_events': stats['completed'],
     }
 
     # Check if this is a homepage request or calendar request
@@ -211,6 +198,26 @@ def calendar_view(request):
     else:
             return render(request, 'appEvenements/calendar.html', context)
 
+@query_budget(3)
+def calendar_feed(request):
+    """Événements d'une fenêtre du calendrier (JSON), avec ETag et cache par fenêtre."""
+    try:
+        start, end = feed.parse_window(request.GET.get('start'), request.GET.get('end'))
+    except feed.InvalidWindow as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    version = feed.version()
+    etag = f'"{version}-{int(start.timestamp())}-{int(end.timestamp())}"'
+    last_modified = version // 1_000_000_000
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = JsonResponse(feed.get_window(start, end, version), safe=False)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Le navigateur garde la réponse mais la revalide à chaque affichage (304 si rien n'a changé)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
 def promote_event(request, evenement_id):
     evenement = get_object_or_404(Evenement, id=evenement_id)
 
@@ -266,21 +273,30 @@ def register_evenement(request, evenement_id):
         messages.error(request, "Vous n'avez pas la permission de vous inscrire à cet événement.")
         return redirect('appEvenements:details', evenement_id=evenement_id)
 
-    # Check if already registered
-    if Participation.objects.filter(evenement=evenement, user=user).exists():
-        messages.warning(request, "Vous êtes déjà inscrit à cet événement.")
+    try:
+        registrations.register(evenement, user)
+    except registrations.AlreadyRegistered as error:
+        messages.warning(request, str(error))
         return redirect('appEvenements:details', evenement_id=evenement_id)
-
-    # Check if event is full
-    if Participation.objects.filter(evenement=evenement).count() >= evenement.max_participants:
-        messages.error(request, "L'événement est complet.")
+    except registrations.EventFull:
+        entry = registrations.join_waitlist(evenement, user)
+        messages.info(
+            request,
+            f"L'événement est complet : vous êtes en position {registrations.waitlist_position(entry)} "
+            "sur la liste d'attente et serez inscrit automatiquement si une place se libère.",
+        )
         return redirect('appEvenements:details', evenement_id=evenement_id)
 
-    # Create participation
-    Participation.objects.create(evenement=evenement, user=user)
     messages.success(request, f"Vous vous êtes inscrit avec succès à l'événement '{evenement.titre}'.")
     return redirect('appEvenements:details', evenement_id=evenement_id)
 
+def leave_waitlist(request, evenement_id):
+    if request.method == 'POST' and request.user.is_authenticated:
+        evenement = get_object_or_404(Evenement, id=evenement_id)
+        if registrations.leave_waitlist(evenement, request.user):
+            messages.success(request, f"Vous avez quitté la liste d'attente de l'événement '{evenement.titre}'.")
+    return redirect('appEvenements:details', evenement_id=evenement_id)
+
 def remove_participant(request, evenement_id, user_id):
     if request.method == 'POST':
         user = request.user
@@ -291,9 +307,7 @@ def remove_participant(request, evenement_id, user_id):
         evenement = get_object_or_404(Evenement, id=evenement_id)
         participant_user = get_object_or_404(User, id=user_id)
 
-        participation = Participation.objects.filter(evenement=evenement, user=participant_user).first()
-        if participation:
-            participation.delete()
+        if registrations.unregister(evenement, participant_user):
             messages.success(request, f"Le participant {participant_user.username} a été retiré de l'événement '{evenement.titre}'.")
         else:
             messages.warning(request, "Ce participant n'était pas inscrit à cet événement.")
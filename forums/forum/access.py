@@ -0,0 +1,89 @@
+"""
+Table des accès aux forums privés (``ForumAccess``).
+
+Un forum privé est lisible par les membres et le responsable de son club.
+Plutôt que de joindre ``club__members`` et ``club__responsible`` à chaque
+liste (deux jointures en OU qui imposent un DISTINCT), on tient à jour une
+ligne ``(utilisateur, forum)`` par accès ; ``visibility_q`` filtre alors les
+forums, sujets et sondages visibles par un simple semi-join indexé.
+
+La table est maintenue par les signaux de ``signals.py`` : ajout ou retrait
+de membres (dans les deux sens de la relation), changement de responsable,
+de visibilité ou de club d'un forum. Les suppressions suivent par cascade.
+Les écritures qui n'émettent pas de signaux (``bulk_create``, ``update``)
+doivent être suivies de ``rebuild`` (commande ``rebuild_forum_access``).
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Club, Forum, ForumAccess
+
+BATCH_SIZE = 1000
+
+
+def visibility_q(user, prefix=''):
+    """
+    Filtre des forums visibles par ``user`` ; ``prefix`` (``'forum__'``)
+    l'applique aux sujets et aux sondages.
+    """
+    public = Q(**{f'{prefix}visibility': 'public'})
+    if not user.is_authenticated:
+        return public
+    if user.is_superuser:
+        return Q()
+    accessible = ForumAccess.objects.filter(user=user).values('forum_id')
+    return public | Q(**{f'{prefix}pk__in': accessible})
+
+
+def expected_accesses(forum_ids):
+    """Paires ``(user_id, forum_id)`` attendues pour ces forums."""
+    forums = Forum.objects.filter(pk__in=forum_ids, visibility='private', club__isnull=False)
+    members = Club.members.through.objects.filter(club__forum__in=forums).values_list('user_id', 'club__forum')
+    responsibles = forums.filter(club__responsible__isnull=False).values_list('club__responsible', 'pk')
+    return set(members) | set(responsibles)
+
+
+def sync(forum_ids):
+    """Met les accès de ces forums en accord avec les clubs. Retourne ``(ajoutés, retirés)``."""
+    forum_ids = list(forum_ids)
+    with transaction.atomic():
+        expected = expected_accesses(forum_ids)
+        current = set(ForumAccess.objects.filter(forum_id__in=forum_ids).values_list('user_id', 'forum_id'))
+        stale = current - expected
+        missing = expected - current
+        stale_by_forum = {}
+        for user_id, forum_id in stale:
+            stale_by_forum.setdefault(forum_id, []).append(user_id)
+        for forum_id, user_ids in stale_by_forum.items():
+            ForumAccess.objects.filter(forum_id=forum_id, user_id__in=user_ids).delete()
+        ForumAccess.objects.bulk_create(
+            [ForumAccess(user_id=user_id, forum_id=forum_id) for user_id, forum_id in missing],
+            batch_size=BATCH_SIZE, ignore_conflicts=True,
+        )
+    return len(missing), len(stale)
+
+
+def sync_clubs(club_ids):
+    return sync(Forum.objects.filter(club__in=club_ids).values_list('pk', flat=True))
+
+
+def grant(user_ids, club_ids):
+    """Ajout de membres : accès aux forums privés de leurs clubs, sans relire les clubs."""
+    forum_ids = list(Forum.objects.filter(club__in=club_ids, visibility='private').values_list('pk', flat=True))
+    ForumAccess.objects.bulk_create(
+        [ForumAccess(user_id=user_id, forum_id=forum_id) for user_id in user_ids for forum_id in forum_ids],
+        batch_size=BATCH_SIZE, ignore_conflicts=True,
+    )
+
+
+def rebuild(batch_size=500):
+    """Recalcule toute la table, par lots de forums. Retourne ``(ajoutés, retirés)``."""
+    added = removed = 0
+    # Lignes dont le forum n'est plus privé ou n'a plus de club
+    removed += ForumAccess.objects.exclude(forum__visibility='private', forum__club__isnull=False).delete()[0]
+    forum_ids = list(Forum.objects.filter(visibility='private').order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(forum_ids), batch_size):
+        batch_added, batch_removed = sync(forum_ids[start:start + batch_size])
+        added += batch_added
+        removed += batch_removed
+    return added, removed
@@ -0,0 +1,120 @@
+"""
+Compteurs d'activité des sujets et des forums.
+
+``Thread.reply_count``, ``last_post_at`` et ``last_post_author``, ainsi que
+``Forum.thread_count`` et ``post_count``, évitent aux listes un
+``Count('posts')``/``Max('posts__created_at')`` par page. Ils sont tenus à jour
+par les signaux de ``Post`` et ``Thread`` (``signals.py``), chacun par un
+seul ``UPDATE`` relatif (``F()``) : deux réponses simultanées ne perdent pas
+d'incrément. Le message d'ouverture d'un sujet compte comme son premier
+message : sans réponse, ``last_post_at`` est la date de création du sujet.
+
+``reconcile`` (commande ``reconcile_forum_counters``) recalcule les compteurs
+après des modifications qui n'émettent pas de signaux (``bulk_create``,
+``update``, déplacement d'un sujet depuis l'administration).
+"""
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Forum, Post, Thread
+
+
+def _decrement(field):
+    # Jamais sous zéro, même si le compteur a dérivé
+    return Case(When(**{f"{field}__gt": 0}, then=F(field) - 1), default=Value(0))
+
+
+def _latest_post(field):
+    return Subquery(
+        Post.objects.filter(thread=OuterRef("pk")).order_by("-created_at", "-pk").values(field)[:1]
+    )
+
+
+def post_created(post):
+    """Nouvelle réponse : compteurs du sujet et du forum, dernier message."""
+    newer = Q(last_post_at__lte=post.created_at)
+    Thread.objects.filter(pk=post.thread_id).update(
+        reply_count=F("reply_count") + 1,
+        last_post_at=Case(When(newer, then=Value(post.created_at)), default=F("last_post_at")),
+        last_post_author=Case(
+            When(newer, then=Value(post.author_id)), default=F("last_post_author"),
+            output_field=Thread._meta.get_field("last_post_author").target_field,
+        ),
+    )
+    Forum.objects.filter(threads=post.thread_id).update(post_count=F("post_count") + 1)
+
+
+def post_deleted(post):
+    """Réponse supprimée (le message est déjà supprimé) : le dernier message est relu par l'index du sujet."""
+    Thread.objects.filter(pk=post.thread_id).update(
+        reply_count=_decrement("reply_count"),
+        last_post_at=Coalesce(_latest_post("created_at"), F("created_at")),
+        last_post_author=Coalesce(_latest_post("author"), F("author")),
+    )
+    Forum.objects.filter(threads=post.thread_id).update(post_count=_decrement("post_count"))
+
+
+def thread_created(thread):
+    Forum.objects.filter(pk=thread.forum_id).update(thread_count=F("thread_count") + 1)
+
+
+def thread_deleted(thread):
+    # Les réponses du sujet ont déjà décrémenté post_count (suppression en cascade)
+    Forum.objects.filter(pk=thread.forum_id).update(thread_count=_decrement("thread_count"))
+
+
+# ============================================================
+# RECOMPTAGE
+# ============================================================
+
+def _count(model, relation):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{relation: OuterRef("pk")})
+            .order_by()
+            .values(relation)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        Value(0),
+    )
+
+
+def reconcile_threads(queryset=None):
+    """Recalcule les compteurs des sujets (de ``queryset`` ou de tous). Retourne le nombre corrigé."""
+    queryset = Thread.objects.all() if queryset is None else queryset
+    actual = {
+        "reply_count": _count(Post, "thread"),
+        "last_post_at": Coalesce(_latest_post("created_at"), F("created_at")),
+        "last_post_author": Coalesce(_latest_post("author"), F("author")),
+    }
+    stale = queryset.annotate(
+        actual_replies=actual["reply_count"],
+        actual_last_at=actual["last_post_at"],
+        actual_last_author=actual["last_post_author"],
+    ).filter(
+        ~Q(reply_count=F("actual_replies"))
+        | ~Q(last_post_at=F("actual_last_at"))
+        | ~Q(last_post_author=F("actual_last_author"))
+        # Sujets insérés par bulk_create
+        | Q(last_post_author__isnull=True)
+    )
+    return Thread.objects.filter(pk__in=stale.values("pk")).update(**actual)
+
+
+def reconcile_forums(queryset=None):
+    """Recalcule les compteurs des forums. Retourne le nombre corrigé."""
+    queryset = Forum.objects.all() if queryset is None else queryset
+    actual = {
+        "thread_count": _count(Thread, "forum"),
+        "post_count": _count(Post, "thread__forum"),
+    }
+    stale = queryset.annotate(
+        actual_threads=actual["thread_count"], actual_posts=actual["post_count"],
+    ).filter(~Q(thread_count=F("actual_threads")) | ~Q(post_count=F("actual_posts")))
+    return Forum.objects.filter(pk__in=stale.values("pk")).update(**actual)
+
+
+def reconcile():
+    """Retourne ``(sujets corrigés, forums corrigés)``."""
+    return reconcile_threads(), reconcile_forums()
@@ -5,6 +5,7 @@ from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
 
+from . import access
 from .models import Post, Thread, Forum, Survey, SurveyOption, Club
 
 User = get_user_model()
@@ -99,16 +100,15 @@ class ThreadForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
 
         forums_qs = Forum.objects.all().select_related('club')
-        if self.user and not self.user.is_superuser:
-            access_q = Q(visibility='public') | Q(club__responsible=self.user) | Q(club__members=self.user)
-            forums_qs = forums_qs.filter(access_q)
+        if self.user:
+            forums_qs = forums_qs.filter(access.visibility_q(self.user))
 
         if self.forum:
             self.fields['forum'].queryset = Forum.objects.filter(pk=self.forum.pk)
             self.fields['forum'].initial = self.forum
             self.fields['forum'].disabled = True
         else:
-            self.fields['forum'].queryset = forums_qs.distinct()
+            self.fields['forum'].queryset = forums_qs
 
     class Meta:
         model = Thread
@@ -244,16 +244,15 @@ class SurveyForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
 
         forums_qs = Forum.objects.all().select_related('club')
-        if self.user and not self.user.is_superuser:
-            access_q = Q(visibility='public') | Q(club__responsible=self.user) | Q(club__members=self.user)
-            forums_qs = forums_qs.filter(access_q)
+        if self.user:
+            forums_qs = forums_qs.filter(access.visibility_q(self.user))
 
         if self.forum:
             self.fields['forum'].queryset = Forum.objects.filter(pk=self.forum.pk)
             self.fields['forum'].initial = self.forum
             self.fields['forum'].disabled = True
         else:
-            self.fields['forum'].queryset = forums_qs.distinct()
+            self.fields['forum'].queryset = forums_qs
 
     class Meta:
         model = Survey
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from forums.forum import access
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule la table des accès aux forums privés (ForumAccess) à partir des membres "
+        "et des responsables des clubs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Nombre de forums traités par lot.")
+
+    def handle(self, *args, **options):
+        added, removed = access.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{added} accès ajouté(s), {removed} accès retiré(s)."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from forums.forum import counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule le nombre de réponses et le dernier message de chaque sujet, "
+        "ainsi que le nombre de sujets et de réponses de chaque forum."
+    )
+
+    def handle(self, *args, **options):
+        threads, forums = counters.reconcile()
+        self.stdout.write(self.style.SUCCESS(f"{threads} sujet(s) et {forums} forum(s) corrigé(s)."))
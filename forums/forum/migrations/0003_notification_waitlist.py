@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0002_notification_moderation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notif_type',
+            field=models.CharField(choices=[('reply', 'Reply'), ('vote', 'Vote'), ('moderation', 'Moderation'), ('waitlist', 'Waitlist')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_accesses(apps, schema_editor):
+    Forum = apps.get_model('forum', 'Forum')
+    Club = apps.get_model('forum', 'Club')
+    ForumAccess = apps.get_model('forum', 'ForumAccess')
+    forums = Forum.objects.filter(visibility='private', club__isnull=False)
+    pairs = set(Club.members.through.objects.filter(club__forum__in=forums).values_list('user_id', 'club__forum'))
+    pairs |= set(forums.filter(club__responsible__isnull=False).values_list('club__responsible', 'pk'))
+    ForumAccess.objects.bulk_create(
+        [ForumAccess(user_id=user_id, forum_id=forum_id) for user_id, forum_id in pairs],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0003_notification_waitlist'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForumAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('forum', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='accesses', to='forum.forum')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forum_accesses', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Accès à un forum',
+                'verbose_name_plural': 'Accès aux forums',
+                'unique_together': {('user', 'forum')},
+            },
+        ),
+        migrations.RunPython(fill_accesses, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:59
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count(model, relation):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{relation: OuterRef('pk')})
+            .order_by()
+            .values(relation)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        Value(0),
+    )
+
+
+def fill_counters(apps, schema_editor):
+    Forum = apps.get_model('forum', 'Forum')
+    Thread = apps.get_model('forum', 'Thread')
+    Post = apps.get_model('forum', 'Post')
+    latest = Post.objects.filter(thread=OuterRef('pk')).order_by('-created_at', '-pk')
+    Thread.objects.update(
+        reply_count=_count(Post, 'thread'),
+        last_post_at=Coalesce(Subquery(latest.values('created_at')[:1]), F('created_at')),
+        last_post_author=Coalesce(Subquery(latest.values('author')[:1]), F('author')),
+    )
+    Forum.objects.update(thread_count=_count(Thread, 'forum'), post_count=_count(Post, 'thread__forum'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0004_forumaccess'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forum',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Réponses'),
+        ),
+        migrations.AddField(
+            model_name='forum',
+            name='thread_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Sujets'),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='last_post_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Dernier message'),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='last_post_author',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Auteur du dernier message'),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Réponses'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['last_post_at', 'id'], name='thread_activity'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
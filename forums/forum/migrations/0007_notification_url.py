@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0006_post_thread_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='url',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
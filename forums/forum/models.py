@@ -6,9 +6,23 @@ from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 
+from .permissions import permissions_for
+
 User = get_user_model()
 
 
+def _exclude_counters(instance, counters, kwargs):
+    """
+    Les compteurs ne sont modifiés que par des UPDATE atomiques (``counters.py``) :
+    une sauvegarde complète d'un objet lu avant une nouvelle réponse ne doit pas les écraser.
+    """
+    if not instance._state.adding and kwargs.get('update_fields') is None:
+        kwargs['update_fields'] = [
+            field.name for field in instance._meta.concrete_fields
+            if not field.primary_key and field.name not in counters
+        ]
+
+
 class Club(models.Model):
     """Modèle pour les clubs qui peuvent avoir des forums privés"""
     name = models.CharField(max_length=255, verbose_name="Nom du club")
@@ -70,6 +84,8 @@ class Forum(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    thread_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Sujets")
+    post_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Réponses")
 
     def __str__(self):
         return self.title
@@ -85,8 +101,11 @@ class Forum(models.Model):
         if self.visibility == 'public' and self.club:
             self.club = None
 
+    COUNTERS = ('thread_count', 'post_count')
+
     def save(self, *args, **kwargs):
         self.full_clean()
+        _exclude_counters(self, self.COUNTERS, kwargs)
         super().save(*args, **kwargs)
 
     def is_private(self):
@@ -95,47 +114,15 @@ class Forum(models.Model):
 
     def can_read(self, user):
         """True si l'utilisateur peut lire le forum."""
-        if not self.is_private():
-            return True
-        if not user or not user.is_authenticated:
-            return False
-        if user.is_superuser:
-            return True
-        if not self.club:
-            return False
-        if user == self.club.responsible:
-            return True
-        return self.club.members.filter(pk=user.pk).exists()
+        return permissions_for(user).can_read(self)
 
     def can_write(self, user):
         """True si l'utilisateur peut écrire dans le forum."""
-        if not user or not user.is_authenticated:
-            return False
-        if user.is_superuser:
-            return True
-        if not self.is_private():
-            return True
-        if not self.club:
-            return False
-        if user == self.club.responsible:
-            return True
-        return self.club.members.filter(pk=user.pk).exists()
+        return permissions_for(user).can_write(self)
 
     def can_manage(self, user):
         """Vérifie si un utilisateur peut gérer le forum"""
-        if not user.is_authenticated:
-            return False
-            
-        if user.is_superuser:
-            return True
-            
-        if not self.is_private():
-            return user == self.created_by
-            
-        if not self.club:
-            return False
-            
-        return user == self.club.responsible
+        return permissions_for(user).can_manage(self)
 
     def get_absolute_url(self):
         return reverse('forum:forum-detail', kwargs={'pk': self.pk})
@@ -146,6 +133,25 @@ class Forum(models.Model):
         verbose_name_plural = "Forums"
 
 
+class ForumAccess(models.Model):
+    """
+    Accès d'un utilisateur (membre ou responsable du club) à un forum privé.
+    Table dénormalisée tenue à jour par ``access.py`` : les listes filtrent
+    les forums privés par un semi-join sur cette table, sans DISTINCT.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='forum_accesses')
+    forum = models.ForeignKey(Forum, on_delete=models.CASCADE, related_name='accesses')
+
+    class Meta:
+        # L'index unique (user, forum) couvre la sous-requête des forums visibles
+        unique_together = ('user', 'forum')
+        verbose_name = "Accès à un forum"
+        verbose_name_plural = "Accès aux forums"
+
+    def __str__(self):
+        return f"{self.user} -> {self.forum}"
+
+
 class Thread(models.Model):
     """Modèle pour les threads/sujets de discussion (US 10.1)"""
     forum = models.ForeignKey(
@@ -166,7 +172,21 @@ class Thread(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_pinned = models.BooleanField(default=False, verbose_name="Épinglé")
     is_closed = models.BooleanField(default=False, verbose_name="Fermé")
-    
+    # Activité, tenue à jour par counters.py : le message d'ouverture compte comme premier message
+    reply_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Réponses")
+    last_post_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name="Dernier message")
+    last_post_author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        verbose_name="Auteur du dernier message"
+    )
+
+    COUNTERS = ('reply_count', 'last_post_at', 'last_post_author')
+
     def clean(self):
         # Un thread doit toujours être associé à un forum
         if not self.forum_id:
@@ -175,7 +195,10 @@ class Thread(models.Model):
             })
     
     def save(self, *args, **kwargs):
+        if self._state.adding and self.last_post_author_id is None:
+            self.last_post_author_id = self.author_id
         self.full_clean()
+        _exclude_counters(self, self.COUNTERS, kwargs)
         super().save(*args, **kwargs)
         
     def can_view(self, user):
@@ -186,13 +209,13 @@ class Thread(models.Model):
         """Vérifie si l'utilisateur peut modifier le thread."""
         if not user.is_authenticated:
             return False
-        return user == self.author or user.is_staff or user.is_superuser
+        return user.pk == self.author_id or user.is_staff or user.is_superuser
         
     def can_delete(self, user):
         """Vérifie si l'utilisateur peut supprimer le thread."""
         if not user.is_authenticated:
             return False
-        return user == self.author or user.is_staff or user.is_superuser
+        return user.pk == self.author_id or user.is_staff or user.is_superuser
 
     def __str__(self):
         return self.title
@@ -204,6 +227,10 @@ class Thread(models.Model):
         ordering = ['-created_at']
         verbose_name = "Thread"
         verbose_name_plural = "Threads"
+        indexes = [
+            # Tri par activité récente (liste des sujets, pagination par curseur)
+            models.Index(fields=['last_post_at', 'id'], name='thread_activity'),
+        ]
 
 
 class Post(models.Model):
@@ -247,7 +274,7 @@ class Post(models.Model):
         """Autorise l'auteur ou tout utilisateur ayant le droit d'écrire."""
         if not user or not user.is_authenticated:
             return False
-        if user == self.author:
+        if user.pk == self.author_id:
             return True
         return self.thread.forum.can_write(user)
         
@@ -255,7 +282,7 @@ class Post(models.Model):
         """Autorise suppression si auteur ou permission d'écriture."""
         if not user or not user.is_authenticated:
             return False
-        if user == self.author:
+        if user.pk == self.author_id:
             return True
         return self.thread.forum.can_write(user)
 
@@ -266,6 +293,10 @@ class Post(models.Model):
         ordering = ['created_at']
         verbose_name = "Post"
         verbose_name_plural = "Posts"
+        indexes = [
+            # Fenêtres de réponses d'un sujet et liens permanents (posts.py)
+            models.Index(fields=['thread', 'created_at', 'id'], name='post_thread_order'),
+        ]
 
 
 class Survey(models.Model):
@@ -326,11 +357,9 @@ class Survey(models.Model):
         if not user.is_authenticated:
          return False
         # L'auteur, le staff, ou le responsable du club (pour les forums privés) peuvent gérer
-        if user == self.author or user.is_staff:
-            return True
-        if self.forum.is_private() and self.forum.club and user == self.forum.club.responsible:
+        if user.pk == self.author_id or user.is_staff:
             return True
-        return False
+        return self.forum.is_private() and permissions_for(user).is_responsible(self.forum)
 
     def __str__(self):
         return self.title
@@ -374,6 +403,8 @@ class Notification(models.Model):
     NOTIF_TYPES = [
         ('reply', 'Reply'),
         ('vote', 'Vote'),
+        ('moderation', 'Moderation'),
+        ('waitlist', 'Waitlist'),
     ]
 
     recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
@@ -384,6 +415,8 @@ class Notification(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, null=True, blank=True)
     survey = models.ForeignKey(Survey, on_delete=models.CASCADE, null=True, blank=True)
     option = models.ForeignKey(SurveyOption, on_delete=models.CASCADE, null=True, blank=True)
+    # Page ouverte par la notification quand elle ne porte ni sur un message ni sur un sondage (événement...)
+    url = models.CharField(max_length=255, blank=True)
     read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
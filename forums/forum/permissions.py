@@ -0,0 +1,105 @@
+"""
+Droits des utilisateurs sur les forums, résolus une fois par requête.
+
+Les droits sur un forum privé dépendent des clubs dont l'utilisateur est
+membre ou responsable. ``ForumPermissions`` lit ses accès (table
+``ForumAccess``, voir ``access.py``) en une seule requête, au premier forum
+privé rencontré, puis mémorise chaque décision par forum : afficher un sujet
+de 200 messages (``can_edit``/``can_delete`` pour chacun) ne coûte plus
+qu'une requête au lieu d'une par message.
+
+Le résolveur est rangé sur l'objet utilisateur, comme le cache de permissions
+de ``ModelBackend`` : ``request.user`` est recréé à chaque requête, les droits
+ne lui survivent donc pas. Un code qui modifie les clubs d'un utilisateur puis
+revérifie ses droits avec le même objet appelle ``clear_forum_permissions``
+(fait automatiquement pour ``user.clubs.add/remove``, voir ``signals``).
+"""
+CACHE_ATTRIBUTE = '_forum_permissions'
+
+
+class ForumPermissions:
+    """Droits d'un utilisateur sur les forums (lecture, écriture, gestion)."""
+
+    def __init__(self, user):
+        self.user = user
+        self.authenticated = bool(user and user.is_authenticated)
+        self.superuser = self.authenticated and user.is_superuser
+        self._accesses = None
+        self._decisions = {}
+
+    def _private_forums(self):
+        """``{id de forum privé accessible: responsable du club ?}``."""
+        if self._accesses is None:
+            from .models import ForumAccess
+
+            self._accesses = {
+                forum_id: responsible_id == self.user.pk
+                for forum_id, responsible_id in ForumAccess.objects.filter(user=self.user)
+                .values_list('forum_id', 'forum__club__responsible_id')
+            }
+        return self._accesses
+
+    def has_access(self, forum):
+        """Membre ou responsable du club du forum privé."""
+        return self.authenticated and forum.pk in self._private_forums()
+
+    def is_responsible(self, forum):
+        return self.authenticated and self._private_forums().get(forum.pk, False)
+
+    def _decide(self, action, forum, rule):
+        # La visibilité et le club font partie de la clé : un forum modifié pendant la requête est réévalué
+        key = (action, forum.pk, forum.visibility, forum.club_id, forum.created_by_id)
+        if key not in self._decisions:
+            self._decisions[key] = rule(forum)
+        return self._decisions[key]
+
+    def can_read(self, forum):
+        return self._decide('read', forum, self._can_read)
+
+    def can_write(self, forum):
+        return self._decide('write', forum, self._can_write)
+
+    def can_manage(self, forum):
+        return self._decide('manage', forum, self._can_manage)
+
+    def _can_read(self, forum):
+        if not forum.is_private():
+            return True
+        if not self.authenticated:
+            return False
+        if self.superuser:
+            return True
+        return forum.club_id is not None and self.has_access(forum)
+
+    def _can_write(self, forum):
+        if not self.authenticated:
+            return False
+        if self.superuser or not forum.is_private():
+            return True
+        return forum.club_id is not None and self.has_access(forum)
+
+    def _can_manage(self, forum):
+        if not self.authenticated:
+            return False
+        if self.superuser:
+            return True
+        if not forum.is_private():
+            return self.user.pk == forum.created_by_id
+        return forum.club_id is not None and self.is_responsible(forum)
+
+
+def permissions_for(user):
+    """Résolveur de ``user``, créé au premier appel puis réutilisé."""
+    if user is None:
+        return ForumPermissions(None)
+    permissions = getattr(user, CACHE_ATTRIBUTE, None)
+    if permissions is None:
+        permissions = ForumPermissions(user)
+        setattr(user, CACHE_ATTRIBUTE, permissions)
+    return permissions
+
+
+def clear_forum_permissions(user):
+    """Oublie les droits mémorisés sur ``user`` (après un changement de ses clubs)."""
+    if user is not None and hasattr(user, CACHE_ATTRIBUTE):
+        delattr(user, CACHE_ATTRIBUTE)
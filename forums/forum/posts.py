@@ -0,0 +1,49 @@
+"""
+Chargement des réponses d'un sujet par fenêtres.
+
+Un sujet n'affiche plus toutes ses réponses : ``load_posts`` en lit une
+fenêtre de ``POSTS_PER_PAGE`` par pagination par curseur sur
+``(created_at, id)`` (index ``post_thread_order``), et le bouton « Charger la
+suite » demande les suivantes à ``thread_posts``, qui renvoie le fragment HTML
+en JSON. Le coût d'une fenêtre ne dépend pas de sa position dans le sujet.
+
+Le lien permanent d'un message (``post_permalink``) ouvre le sujet sur la
+fenêtre qui commence à ce message : son curseur se déduit du message
+précédent, trouvé par une seule recherche dans l'index.
+"""
+from django.db.models import Q
+
+from resources.pagination import NEXT, CursorPaginator
+
+from .models import Post
+
+POSTS_PER_PAGE = 20
+
+
+def post_paginator(thread):
+    posts = thread.posts.select_related('author')
+    return CursorPaginator(posts, POSTS_PER_PAGE, 'created_at', descending=False)
+
+
+def load_posts(thread, user, cursor=None):
+    """Fenêtre de réponses qui suit ``cursor``, avec les droits de ``user`` sur chacune."""
+    page = post_paginator(thread).page(cursor)
+    for post in page.object_list:
+        # Attributs sûrs pour le template
+        post.can_edit = post.can_edit(user)
+        post.can_delete = post.can_delete(user)
+    return page
+
+
+def cursor_for(post):
+    """Curseur de la fenêtre qui commence à ``post`` (None : première fenêtre)."""
+    previous = (
+        Post.objects.filter(thread_id=post.thread_id)
+        .filter(Q(created_at__lt=post.created_at) | Q(created_at=post.created_at, pk__lt=post.pk))
+        .order_by('-created_at', '-pk')
+        .only('pk', 'created_at')
+        .first()
+    )
+    if previous is None:
+        return None
+    return post_paginator(post.thread).encode_cursor(previous, NEXT)
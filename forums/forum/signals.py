@@ -1,7 +1,31 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
-from .models import Post, SurveyVote, Notification
+from . import access, counters, tally
+from .models import Club, Forum, Post, SurveyOption, SurveyVote, Thread, Notification
+from .permissions import clear_forum_permissions
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.post_created(instance)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.post_deleted(instance)
+
+
+@receiver(post_save, sender=Thread)
+def count_new_thread(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.thread_created(instance)
+
+
+@receiver(post_delete, sender=Thread)
+def count_deleted_thread(sender, instance, **kwargs):
+    counters.thread_deleted(instance)
 
 
 @receiver(post_save, sender=Post)
@@ -22,6 +46,14 @@ def create_reply_notification(sender, instance, created, **kwargs):
         )
 
 
+@receiver(post_save, sender=SurveyVote)
+@receiver(post_delete, sender=SurveyVote)
+@receiver(post_save, sender=SurveyOption)
+@receiver(post_delete, sender=SurveyOption)
+def expire_survey_tally(sender, instance, **kwargs):
+    tally.expire_tally(instance.survey_id)
+
+
 @receiver(post_save, sender=SurveyVote)
 def create_vote_notification(sender, instance, created, **kwargs):
     survey = instance.survey
@@ -37,3 +69,46 @@ def create_vote_notification(sender, instance, created, **kwargs):
             survey=survey,
             option=instance.option,
         )
+
+
+@receiver(m2m_changed, sender=Club.members.through)
+def clear_member_permissions(sender, instance, action, reverse, **kwargs):
+    # user.clubs.add(...) : l'objet utilisateur modifié ne doit pas garder ses anciens droits
+    if reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        clear_forum_permissions(instance)
+
+
+# ---------- Table des accès aux forums privés (access.py) ----------
+
+@receiver(m2m_changed, sender=Club.members.through)
+def update_forum_access(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # Les clubs quittés ne sont plus connus après le clear
+        instance._cleared_club_ids = list(instance.clubs.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        club_ids = instance.__dict__.pop('_cleared_club_ids', []) if action == 'post_clear' else pk_set
+    else:
+        club_ids = [instance.pk]
+    if action == 'post_add':
+        user_ids = [instance.pk] if reverse else pk_set
+        access.grant(user_ids, club_ids)
+    else:
+        # Un membre retiré garde l'accès s'il est responsable du club
+        access.sync_clubs(club_ids)
+
+
+@receiver(post_save, sender=Club)
+def update_responsible_access(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    access.sync_clubs([instance.pk])
+
+
+@receiver(post_save, sender=Forum)
+def update_forum_access_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    access.sync([instance.pk])
@@ -0,0 +1,66 @@
+"""
+Résultats des sondages.
+
+``get_tally`` donne, pour chaque option d'un sondage, son nombre de votes et
+son pourcentage, calculés en une seule requête groupée (``annotate(Count)``).
+Le résultat est mis en cache par sondage ; tout vote (nouveau, modifié ou
+supprimé) et tout ajout ou retrait d'option incrémente la version du sondage
+(voir ``signals.py``), ce qui invalide son entrée. Un sondage très suivi
+n'est donc recompté qu'une fois par vote, et pas à chaque affichage.
+"""
+import time
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import SurveyOption
+
+TALLY_TTL = 60 * 60
+VERSION_KEY = "forum:survey:{}:tally-version"
+TALLY_KEY = "forum:survey:{}:tally:{}"
+
+
+def _version(survey_id):
+    # Une version perdue (cache vidé) repart d'une valeur jamais utilisée
+    return cache.get_or_set(VERSION_KEY.format(survey_id), time.time_ns, None)
+
+
+def expire_tally(survey_id):
+    """Invalide les résultats en cache du sondage."""
+    key = VERSION_KEY.format(survey_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def compute_tally(survey_id):
+    """``{"total": n, "options": [{"option": {"pk", "text"}, "vote_count", "percentage"}, ...]}``."""
+    rows = list(
+        SurveyOption.objects.filter(survey_id=survey_id)
+        .annotate(vote_count=Count("votes"))
+        .order_by("pk")
+        .values_list("pk", "text", "vote_count")
+    )
+    total = sum(vote_count for _pk, _text, vote_count in rows)
+    return {
+        "total": total,
+        "options": [
+            {
+                "option": {"pk": pk, "text": text},
+                "vote_count": vote_count,
+                "percentage": round(vote_count / total * 100, 1) if total else 0,
+            }
+            for pk, text, vote_count in rows
+        ],
+    }
+
+
+def get_tally(survey_id):
+    """Résultats du sondage, servis depuis le cache."""
+    key = TALLY_KEY.format(survey_id, _version(survey_id))
+    tally = cache.get(key)
+    if tally is None:
+        tally = compute_tally(survey_id)
+        cache.set(key, tally, TALLY_TTL)
+    return tally
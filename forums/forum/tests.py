@@ -1,9 +1,18 @@
+from io import StringIO
+
+from django.db import connection
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
 from .models import Forum, Thread, Post
 from .models import Notification, Survey, SurveyVote
+from .models import Club, ForumAccess, SurveyOption
+from .permissions import permissions_for
+from .posts import POSTS_PER_PAGE
 
 User = get_user_model()
 
@@ -112,3 +121,259 @@ class PostReplyTests(TestCase):
 		r = self.client.post(vote_url, {'option': o.pk})
 		self.assertEqual(r.status_code, 302)
 		self.assertTrue(Notification.objects.filter(recipient=self.user, notif_type='vote').exists())
+
+
+class ThreadListPaginationTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='reader', password='pass')
+		self.forum = Forum.objects.create(title='F', description='D', created_by=self.user)
+		for index in range(12):
+			Thread.objects.create(forum=self.forum, title=f'T{index}', body='B', author=self.user)
+
+	def test_thread_list_pages_by_cursor(self):
+		self.client.login(username='reader', password='pass')
+		url = reverse('forum:thread-list')
+		response = self.client.get(url)
+		page = response.context['page_obj']
+		self.assertTrue(page.is_cursor)
+		self.assertEqual(len(page.object_list), 10)
+		response = self.client.get(url, {'cursor': page.next_cursor})
+		titles = [thread.title for thread in response.context['page_obj'].object_list]
+		self.assertEqual(len(titles), 2)
+		self.assertNotIn(titles[0], [thread.title for thread in page.object_list])
+
+
+class ForumPermissionResolverTests(TestCase):
+	def setUp(self):
+		self.responsible = User.objects.create_user(username='resp', password='pass')
+		self.member = User.objects.create_user(username='member', password='pass')
+		self.other = User.objects.create_user(username='other', password='pass')
+		self.club = Club.objects.create(name='C', responsible=self.responsible)
+		self.club.members.add(self.member)
+		self.forum = Forum.objects.create(title='F', description='D', created_by=self.responsible, club=self.club, visibility='private')
+		self.thread = Thread.objects.create(forum=self.forum, title='T', body='B', author=self.responsible)
+
+	def test_rules(self):
+		self.assertTrue(self.forum.can_write(self.member))
+		self.assertFalse(self.forum.can_manage(self.member))
+		self.assertTrue(self.forum.can_manage(self.responsible))
+		self.assertFalse(self.forum.can_read(self.other))
+		# user.clubs.add(...) invalide les droits mémorisés sur l'objet utilisateur
+		self.other.clubs.add(self.club)
+		self.assertTrue(self.forum.can_read(self.other))
+
+	def test_one_query_per_user(self):
+		forum = Forum.objects.get(pk=self.forum.pk)
+		with self.assertNumQueries(1):
+			for _ in range(3):
+				self.assertTrue(forum.can_read(self.member))
+				self.assertTrue(forum.can_write(self.member))
+				self.assertFalse(forum.can_manage(self.member))
+		self.assertIs(permissions_for(self.member), permissions_for(self.member))
+
+	def test_thread_detail_query_count_does_not_grow_with_posts(self):
+		self.client.login(username='member', password='pass')
+		url = reverse('forum:thread-detail', kwargs={'pk': self.thread.pk})
+		Post.objects.create(thread=self.thread, content='R', author=self.responsible)
+		with CaptureQueriesContext(connection) as few:
+			self.client.get(url)
+		Post.objects.bulk_create([Post(thread=self.thread, content='R', author=self.responsible) for _ in range(50)])
+		with CaptureQueriesContext(connection) as many:
+			response = self.client.get(url)
+		self.assertEqual(len(response.context['posts']), POSTS_PER_PAGE)
+		self.assertEqual(len(few), len(many))
+
+
+class ForumAccessTests(TestCase):
+	def setUp(self):
+		self.responsible = User.objects.create_user(username='resp', password='pass')
+		self.member = User.objects.create_user(username='member', password='pass')
+		self.other = User.objects.create_user(username='other', password='pass')
+		self.club = Club.objects.create(name='C', responsible=self.responsible)
+		self.club.members.add(self.member)
+		self.forum = Forum.objects.create(title='Prive', description='D', created_by=self.responsible, club=self.club, visibility='private')
+		self.public = Forum.objects.create(title='Public', description='D', created_by=self.responsible)
+
+	def accesses(self):
+		return set(ForumAccess.objects.values_list('user__username', 'forum__title'))
+
+	def test_table_follows_clubs(self):
+		self.assertEqual(self.accesses(), {('resp', 'Prive'), ('member', 'Prive')})
+		self.other.clubs.add(self.club)
+		self.assertIn(('other', 'Prive'), self.accesses())
+		self.club.members.remove(self.member)
+		self.assertNotIn(('member', 'Prive'), self.accesses())
+		# L'ancien responsable garde l'accès seulement s'il est membre
+		self.club.responsible = self.member
+		self.club.save()
+		self.assertEqual(self.accesses(), {('member', 'Prive'), ('other', 'Prive')})
+		self.other.clubs.clear()
+		self.assertEqual(self.accesses(), {('member', 'Prive')})
+
+	def test_lists_without_distinct(self):
+		Thread.objects.create(forum=self.forum, title='Secret', body='B', author=self.responsible)
+		Thread.objects.create(forum=self.public, title='Ouvert', body='B', author=self.responsible)
+		self.client.login(username='member', password='pass')
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get(reverse('forum:forum-list'))
+		self.assertEqual({forum.title for forum in response.context['forums']}, {'Prive', 'Public'})
+		self.assertFalse(any('DISTINCT' in query['sql'] for query in queries))
+
+		self.client.login(username='other', password='pass')
+		response = self.client.get(reverse('forum:thread-list'))
+		self.assertEqual([thread.title for thread in response.context['page_obj'].object_list], ['Ouvert'])
+
+	def test_rebuild_command(self):
+		ForumAccess.objects.all().delete()
+		ForumAccess.objects.create(user=self.other, forum=self.public)
+		call_command('rebuild_forum_access', stdout=StringIO())
+		self.assertEqual(self.accesses(), {('resp', 'Prive'), ('member', 'Prive')})
+
+
+class ThreadCountersTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='author', password='pass')
+		self.other = User.objects.create_user(username='replier', password='pass')
+		self.forum = Forum.objects.create(title='F', description='D', created_by=self.user)
+		self.thread = Thread.objects.create(forum=self.forum, title='T', body='B', author=self.user)
+
+	def refresh(self):
+		self.thread.refresh_from_db()
+		self.forum.refresh_from_db()
+
+	def test_counters_follow_posts(self):
+		self.refresh()
+		self.assertEqual((self.forum.thread_count, self.thread.reply_count), (1, 0))
+		self.assertEqual(self.thread.last_post_author, self.user)
+
+		first = Post.objects.create(thread=self.thread, content='R1', author=self.other)
+		second = Post.objects.create(thread=self.thread, content='R2', author=self.user)
+		self.refresh()
+		self.assertEqual((self.thread.reply_count, self.forum.post_count), (2, 2))
+		self.assertEqual(self.thread.last_post_at, second.created_at)
+
+		# Une sauvegarde complète d'un objet périmé n'écrase pas les compteurs
+		stale = Thread.objects.get(pk=self.thread.pk)
+		Post.objects.create(thread=self.thread, content='R3', author=self.other).delete()
+		stale.title = 'Titre modifie'
+		stale.save()
+
+		second.delete()
+		self.refresh()
+		self.assertEqual((self.thread.reply_count, self.forum.post_count), (1, 1))
+		self.assertEqual((self.thread.last_post_at, self.thread.last_post_author), (first.created_at, self.other))
+		first.delete()
+		self.refresh()
+		self.assertEqual(self.thread.last_post_at, self.thread.created_at)
+
+		self.thread.delete()
+		self.forum.refresh_from_db()
+		self.assertEqual((self.forum.thread_count, self.forum.post_count), (0, 0))
+
+	def test_reconcile_command(self):
+		Post.objects.bulk_create([Post(thread=self.thread, content='R', author=self.other) for _ in range(3)])
+		Thread.objects.filter(pk=self.thread.pk).update(last_post_author=None)
+		call_command('reconcile_forum_counters', stdout=StringIO())
+		self.refresh()
+		self.assertEqual((self.thread.reply_count, self.forum.post_count), (3, 3))
+		self.assertEqual(self.thread.last_post_author, self.other)
+
+	def test_thread_list_sorted_by_activity(self):
+		newer = Thread.objects.create(forum=self.forum, title='Plus recent', body='B', author=self.user)
+		Post.objects.create(thread=self.thread, content='Relance', author=self.other)
+		self.client.login(username='author', password='pass')
+		response = self.client.get(reverse('forum:thread-list'))
+		self.assertEqual([thread.pk for thread in response.context['page_obj'].object_list], [self.thread.pk, newer.pk])
+		response = self.client.get(reverse('forum:thread-list'), {'sort': 'recent'})
+		self.assertEqual([thread.pk for thread in response.context['page_obj'].object_list], [newer.pk, self.thread.pk])
+
+
+class ThreadPostWindowTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='reader', password='pass')
+		self.forum = Forum.objects.create(title='F', description='D', created_by=self.user)
+		self.thread = Thread.objects.create(forum=self.forum, title='T', body='B', author=self.user)
+		Post.objects.bulk_create([
+			Post(thread=self.thread, content=f'Message {index}', author=self.user) for index in range(POSTS_PER_PAGE * 2 + 5)
+		])
+		self.posts = list(Post.objects.filter(thread=self.thread).order_by('created_at', 'pk'))
+		self.client.login(username='reader', password='pass')
+
+	def test_windows_and_fragment(self):
+		response = self.client.get(reverse('forum:thread-detail', kwargs={'pk': self.thread.pk}))
+		page = response.context['page_obj']
+		self.assertEqual(list(response.context['posts']), self.posts[:POSTS_PER_PAGE])
+		self.assertTrue(page.has_next())
+
+		url = reverse('forum:thread-posts', kwargs={'pk': self.thread.pk})
+		data = self.client.get(url, {'cursor': page.next_cursor}).json()
+		self.assertIn(f'id="post-{self.posts[POSTS_PER_PAGE].pk}"', data['html'])
+		self.assertNotIn(f'id="post-{self.posts[POSTS_PER_PAGE - 1].pk}"', data['html'])
+		data = self.client.get(url, {'cursor': data['next_cursor']}).json()
+		self.assertEqual(data['html'].count('id="post-'), 5)
+		self.assertIsNone(data['next_cursor'])
+
+	def test_permalink_opens_window_at_post(self):
+		target = self.posts[POSTS_PER_PAGE + 3]
+		with self.assertNumQueries(4):
+			response = self.client.get(reverse('forum:post-permalink', kwargs={'pk': target.pk}))
+		self.assertTrue(response['Location'].endswith(f'#post-{target.pk}'))
+		response = self.client.get(response['Location'].split('#')[0])
+		self.assertEqual(response.context['posts'][0], target)
+
+		first = self.client.get(reverse('forum:post-permalink', kwargs={'pk': self.posts[0].pk}))
+		self.assertNotIn('cursor', first['Location'])
+
+
+class SurveyTallyTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.user = User.objects.create_user(username='sondeur', password='pass')
+		self.forum = Forum.objects.create(title='F', description='D', created_by=self.user)
+		self.survey = Survey.objects.create(title='S', forum=self.forum, author=self.user)
+		self.options = [SurveyOption.objects.create(survey=self.survey, text=text) for text in ('A', 'B', 'C')]
+		voters = [User.objects.create_user(username=f'votant{index}', password='pass') for index in range(4)]
+		for voter, option in zip(voters, (0, 0, 0, 1)):
+			SurveyVote.objects.create(survey=self.survey, option=self.options[option], user=voter)
+		self.url = reverse('forum:survey-detail', kwargs={'pk': self.survey.pk})
+		self.client.login(username='sondeur', password='pass')
+
+	def results(self, response):
+		return [(item['option']['text'], item['vote_count'], item['percentage']) for item in response.context['options_with_votes']]
+
+	def test_tally_and_invalidation(self):
+		response = self.client.get(self.url)
+		self.assertEqual(response.context['total_votes'], 4)
+		self.assertEqual(self.results(response), [('A', 3, 75.0), ('B', 1, 25.0), ('C', 0, 0)])
+
+		self.client.post(reverse('forum:survey-vote', kwargs={'pk': self.survey.pk}), {'option': self.options[2].pk})
+		response = self.client.get(self.url)
+		self.assertEqual(response.context['user_vote'], self.options[2].pk)
+		self.assertEqual(self.results(response), [('A', 3, 60.0), ('B', 1, 20.0), ('C', 1, 20.0)])
+
+		SurveyVote.objects.filter(option=self.options[0]).first().delete()
+		response = self.client.get(self.url)
+		self.assertEqual(response.context['total_votes'], 4)
+
+	def test_cached_results_do_not_count_votes(self):
+		self.client.get(self.url)
+		with CaptureQueriesContext(connection) as queries:
+			self.client.get(self.url)
+		self.assertFalse(any('forum_surveyvote' in query['sql'] and 'COUNT' in query['sql'] for query in queries))
+
+	def test_vote_form_lists_options_missing_from_cache(self):
+		self.client.get(self.url)
+		SurveyOption.objects.bulk_create([SurveyOption(survey=self.survey, text='D')])
+		response = self.client.get(self.url)
+		self.assertEqual(len(response.context['options_with_votes']), 3)
+		self.assertEqual([option.text for option in response.context['vote_options']], ['A', 'B', 'C', 'D'])
+		self.assertContains(response, 'value="%d"' % SurveyOption.objects.get(text='D').pk)
+
+	def test_private_survey_requires_access(self):
+		club = Club.objects.create(name='C', responsible=self.user)
+		forum = Forum.objects.create(title='P', description='D', created_by=self.user, club=club, visibility='private')
+		survey = Survey.objects.create(title='Prive', forum=forum, author=self.user)
+		User.objects.create_user(username='intrus', password='pass')
+		self.client.login(username='intrus', password='pass')
+		response = self.client.get(reverse('forum:survey-detail', kwargs={'pk': survey.pk}))
+		self.assertEqual(response.status_code, 403)
@@ -28,11 +28,13 @@ urlpatterns = [
     
     # Thread URLs (US 10.1)
     path('thread/<int:pk>/', thread_detail, name='thread-detail'),
+    path('thread/<int:pk>/posts/', views.thread_posts, name='thread-posts'),
     path('thread/new/', views.ThreadCreateView.as_view(), name='thread-create'),
     path('thread/<int:pk>/edit/', views.ThreadUpdateView.as_view(), name='thread-update'),
     path('thread/<int:pk>/delete/', views.ThreadDeleteView.as_view(), name='thread-delete'),
     
     # Post (réponse) URLs (US 10.3, 11.2, 11.3, 11.4)
+    path('post/<int:pk>/', views.post_permalink, name='post-permalink'),
     path('post/<int:pk>/edit/', views.PostUpdateView.as_view(), name='post-update'),
     path('post/<int:pk>/delete/', views.PostDeleteView.as_view(), name='post-delete'),
     
@@ -13,6 +13,9 @@ from django.views.generic import (
     DeleteView,
 )
 
+from resources.pagination import CursorPaginationMixin
+
+from . import access, posts, tally
 from .forms import ThreadForm, PostForm, ForumForm, SurveyForm, SurveyOptionForm
 from .models import Thread, Post, Forum, Survey, SurveyOption, SurveyVote
 from .models import Notification
@@ -22,13 +25,17 @@ from .utils import (
     get_post_or_404,
     get_survey_or_404,
 )
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.utils.http import urlencode
 from .models import Thread, Post
 from .forms import PostForm
 
 def thread_detail(request, pk):
-    thread = get_object_or_404(Thread, pk=pk)
-    posts = thread.posts.all()  # récupère tous les posts de ce thread
+    thread = get_object_or_404(Thread.objects.select_related('forum', 'author'), pk=pk)
+    if not thread.can_view(request.user):
+        raise PermissionDenied("Accès refusé à ce sujet.")
 
     if request.method == 'POST':
         # Debug: inspect POST keys
@@ -60,19 +67,44 @@ def thread_detail(request, pk):
             post.thread = thread
             post.author = request.user
             post.save()
-            return redirect('forum:thread-detail', pk=thread.pk)
+            return redirect('forum:post-permalink', pk=post.pk)
     else:
         form = PostForm(thread=thread, user=request.user)
 
+    # Une fenêtre de réponses ; les droits du forum sont résolus une seule fois (voir permissions.py)
+    page = posts.load_posts(thread, request.user, request.GET.get('cursor'))
     context = {
         'thread': thread,
-        'posts': posts,
+        'posts': page.object_list,
+        'page_obj': page,
         'form': form,
-        'can_reply': True,  # selon ta logique de permission
+        'can_reply': thread.forum.can_write(request.user),
+        'can_edit_thread': thread.can_edit(request.user),
+        'can_delete_thread': thread.can_delete(request.user),
     }
     return render(request, 'forum/thread_detail.html', context)
 
 
+def thread_posts(request, pk):
+    """Fenêtre de réponses suivante (JSON) pour le chargement progressif d'un sujet."""
+    thread = get_object_or_404(Thread.objects.select_related('forum'), pk=pk)
+    if not thread.can_view(request.user):
+        raise PermissionDenied("Accès refusé à ce sujet.")
+    page = posts.load_posts(thread, request.user, request.GET.get('cursor'))
+    html = render_to_string('forum/post_list_items.html', {'posts': page.object_list}, request=request)
+    return JsonResponse({'html': html, 'next_cursor': page.next_cursor})
+
+
+def post_permalink(request, pk):
+    """Lien permanent d'une réponse : le sujet, ouvert sur la fenêtre qui commence à ce message."""
+    post = get_post_or_404(pk, request.user)
+    url = reverse('forum:thread-detail', kwargs={'pk': post.thread_id})
+    cursor = posts.cursor_for(post)
+    if cursor:
+        url += '?' + urlencode({'cursor': cursor})
+    return redirect(f'{url}#post-{post.pk}')
+
+
 class NotificationListView(LoginRequiredMixin, ListView):
     model = Notification
     template_name = 'forum/notifications.html'
@@ -92,6 +124,8 @@ def mark_notification_read(request, pk):
         return redirect('forum:thread-detail', pk=notif.post.thread.pk)
     if notif.survey:
         return redirect('forum:survey-detail', pk=notif.survey.pk)
+    if notif.url:
+        return redirect(notif.url)
     return redirect('forum:thread-list')
 
 def survey_vote(request, pk):
@@ -167,47 +201,39 @@ def survey_option_voters(request, survey_pk, option_pk):
     })
 
 def _forum_visibility_q(user):
-    if not user.is_authenticated:
-        return Q(visibility='public')
-    if user.is_superuser:
-        return Q()
-    return (
-        Q(visibility='public')
-        | Q(visibility='private', club__responsible=user)
-        | Q(visibility='private', club__members=user)
-    )
+    return access.visibility_q(user)
 
 
 def _thread_visibility_q(user):
-    if not user.is_authenticated:
-        return Q(forum__visibility='public')
-    if user.is_superuser:
-        return Q()
-    return (
-        Q(forum__visibility='public')
-        | Q(forum__visibility='private', forum__club__responsible=user)
-        | Q(forum__visibility='private', forum__club__members=user)
-    )
+    return access.visibility_q(user, 'forum__')
 
 # ---------- Thread list ----------
-class ThreadListView(LoginRequiredMixin, ListView):
+class ThreadListView(CursorPaginationMixin, LoginRequiredMixin, ListView):
     model = Thread
     template_name = 'forum/thread_list.html'
     context_object_name = 'threads'
     paginate_by = 10
 
+    # Tri proposé à l'utilisateur ; l'activité récente suit l'index thread_activity
+    SORTS = {'activity': '-last_post_at', 'recent': '-created_at'}
+
+    def get_sort(self):
+        sort = self.request.GET.get('sort')
+        return sort if sort in self.SORTS else 'activity'
+
     def get_queryset(self):
-        qs = Thread.objects.select_related('forum', 'forum__club', 'author')
+        qs = Thread.objects.select_related('forum', 'forum__club', 'author', 'last_post_author')
         qs = qs.filter(_thread_visibility_q(self.request.user))
         query = self.request.GET.get('q')
         if query:
             qs = qs.filter(Q(title__icontains=query) | Q(body__icontains=query))
-        return super().get_queryset().select_related('author', 'forum')
+        return qs.order_by(self.SORTS[self.get_sort()])
 
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['user'] = self.request.user  # Passe l'utilisateur connecté au contexte
+        context['sort'] = self.get_sort()
         return context
     def _user_can_create_thread(self):
         user = self.request.user
@@ -248,12 +274,9 @@ class ThreadDetailView(DetailView):
         if can_reply:
             context['form'] = PostForm(thread=thread, user=self.request.user)
         
-        posts = list(thread.posts.select_related('author').order_by('created_at'))
-        for post in posts:
-            # Attributs sûrs pour le template
-            post.can_edit = post.can_edit(self.request.user)
-            post.can_delete = post.can_delete(self.request.user)
-        context['posts'] = posts
+        page = posts.load_posts(thread, self.request.user, self.request.GET.get('cursor'))
+        context['posts'] = page.object_list
+        context['page_obj'] = page
         return context
 
     def post(self, request, *args, **kwargs):
@@ -280,9 +303,9 @@ class ThreadDetailView(DetailView):
             form = PostForm(cleaned, thread=self.object, user=request.user)
 
         if form.is_valid():
-            form.save()
+            post = form.save()
             messages.success(request, "Ta réponse a été publiée.")
-            return redirect(reverse('forum:thread-detail', kwargs={'pk': self.object.pk}))
+            return redirect('forum:post-permalink', pk=post.pk)
         else:
             context = self.get_context_data(form=form)
             return self.render_to_response(context)
@@ -398,7 +421,7 @@ class ForumListView(ListView):
 
     def get_queryset(self):
         qs = super().get_queryset().select_related('club', 'created_by')
-        return qs.filter(_forum_visibility_q(self.request.user)).distinct()
+        return qs.filter(_forum_visibility_q(self.request.user))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -508,7 +531,7 @@ class SurveyListView(ListView):
 
     def get_queryset(self):
         qs = super().get_queryset().select_related('forum', 'forum__club', 'author')
-        return qs.filter(_thread_visibility_q(self.request.user)).distinct()
+        return qs.filter(_thread_visibility_q(self.request.user))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -533,30 +556,36 @@ class SurveyDetailView(DetailView):
     template_name = 'forum/survey_detail.html'
     context_object_name = 'survey'
 
+    def get_queryset(self):
+        return super().get_queryset().select_related('forum')
+
+    def get_object(self, queryset=None):
+        obj = super().get_object(queryset)
+        if not obj.can_view(self.request.user):
+            raise PermissionDenied("Accès refusé à ce sondage.")
+        return obj
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        survey = self.get_object()
+        survey = self.object
         user = self.request.user
         
         context['can_vote'] = survey.can_vote(user)
-        user_vote = survey.votes.filter(user=user).first()
-        context['user_has_voted'] = bool(user_vote)
-        context['user_vote'] = user_vote.option.pk if user_vote else None
-        context['options_with_votes'] = self.get_options_with_votes(survey)
-        context['total_votes'] = survey.votes.count()
+        # Le formulaire lit les options en base, pas le décompte en cache
+        context['vote_options'] = list(survey.options.all()) if context['can_vote'] else []
+        user_vote = None
+        if user.is_authenticated:
+            user_vote = survey.votes.filter(user=user).values_list('option_id', flat=True).first()
+        context['user_has_voted'] = user_vote is not None
+        context['user_vote'] = user_vote
+        # Résultats en une requête groupée, mis en cache jusqu'au prochain vote (voir tally.py)
+        results = tally.get_tally(survey.pk)
+        context['options_with_votes'] = results['options']
+        context['total_votes'] = results['total']
         context['can_manage_survey'] = survey.can_manage(user)
         
         return context
 
-    def get_options_with_votes(self, survey):
-        options = survey.options.all()
-        total_votes = survey.votes.count()
-        
-        return [{
-            'option': option,
-            'vote_count': option.votes.count(),
-            'percentage': round(option.votes.count() / total_votes * 100, 1) if total_votes > 0 else 0
-        } for option in options]
 class SurveyCreateView(CreateView):
     model = Survey
     form_class = SurveyForm
@@ -1,6 +1,33 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+
+from . import moderation
+from .models import Aid, AidRequest, Category, Club, DailyStat, ExportJob, Resource, FAQ, Favorite, StoredBlob, UploadSession
+
+
+def _run_bulk_action(modeladmin, request, queryset, target, action):
+    """Applique une action de modération en masse à la sélection de l'admin."""
+    ids = list(queryset.values_list("pk", flat=True))
+    try:
+        result = moderation.moderate(target, action, ids=ids, actor=request.user)
+    except moderation.ModerationError as error:
+        modeladmin.message_user(request, str(error), messages.ERROR)
+        return
+    unchanged = sum(1 for outcome in result["outcomes"].values() if outcome == moderation.OUTCOME_UNCHANGED)
+    modeladmin.message_user(
+        request,
+        f"{result['updated']} élément(s) traité(s), {unchanged} déjà dans cet état.",
+        messages.SUCCESS,
+    )
+
 
-from .models import Aid, AidRequest, Category, Club, Resource, FAQ, Favorite
+class BulkValidationAdminMixin:
+    """Action « Valider » appliquée à toute la sélection en une seule opération."""
+    moderation_target = None
+    actions = ["validate_selected"]
+
+    @admin.action(description="Valider les éléments sélectionnés")
+    def validate_selected(self, request, queryset):
+        _run_bulk_action(self, request, queryset, self.moderation_target, moderation.ACTION_VALIDATE)
 
 
 @admin.register(Club)
@@ -16,7 +43,8 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Resource)
-class ResourceAdmin(admin.ModelAdmin):
+class ResourceAdmin(BulkValidationAdminMixin, admin.ModelAdmin):
+    moderation_target = "resource"
     list_display = (
         "title",
         "category",
@@ -32,7 +60,8 @@ class ResourceAdmin(admin.ModelAdmin):
 
 
 @admin.register(Aid)
-class AidAdmin(admin.ModelAdmin):
+class AidAdmin(BulkValidationAdminMixin, admin.ModelAdmin):
+    moderation_target = "aid"
     list_display = (
         "title",
         "category",
@@ -58,6 +87,15 @@ class AidRequestAdmin(admin.ModelAdmin):
     search_fields = ("description", "requested_by__username")
     list_filter = ("type", "status", "date_requested")
     readonly_fields = ("date_requested",)
+    actions = ["approve_selected", "reject_selected"]
+
+    @admin.action(description="Approuver les demandes sélectionnées")
+    def approve_selected(self, request, queryset):
+        _run_bulk_action(self, request, queryset, "request", moderation.ACTION_APPROVE)
+
+    @admin.action(description="Rejeter les demandes sélectionnées")
+    def reject_selected(self, request, queryset):
+        _run_bulk_action(self, request, queryset, "request", moderation.ACTION_REJECT)
 
 
 @admin.register(FAQ)
@@ -79,6 +117,49 @@ class FavoriteAdmin(admin.ModelAdmin):
         return queryset.select_related("user", "resource", "aid")
 
 
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ("kind", "status", "requested_by", "created_at", "finished_at")
+    list_filter = ("kind", "status", "created_at")
+    search_fields = ("cache_key", "requested_by__username")
+    readonly_fields = ("cache_key", "params", "created_at", "started_at", "finished_at", "error")
+    list_select_related = ("requested_by",)
+
+
+@admin.register(DailyStat)
+class DailyStatAdmin(admin.ModelAdmin):
+    list_display = ("date", "kind", "club", "category", "total", "validated")
+    list_filter = ("kind", "club", "category")
+    date_hierarchy = "date"
+    list_select_related = ("club", "category")
+
+    def has_add_permission(self, request):
+        # Les agrégats sont calculés, pas saisis
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ("filename", "target", "user", "size", "received", "status", "updated_at")
+    list_filter = ("target", "status")
+    search_fields = ("filename", "sha256", "user__username")
+    readonly_fields = ("id", "size", "received", "expected_sha256", "sha256", "file", "created_at", "updated_at")
+    list_select_related = ("user",)
+
+
+@admin.register(StoredBlob)
+class StoredBlobAdmin(admin.ModelAdmin):
+    list_display = ("name", "size", "ref_count", "created_at")
+    search_fields = ("name", "sha256")
+    readonly_fields = ("name", "sha256", "size", "ref_count", "created_at")
+
+    def has_add_permission(self, request):
+        return False
+
+
 # Customize Django Admin site
 admin.site.site_header = "Resources/Aids"
 admin.site.site_title = "Resources/Aids Admin Portal"
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ResourcesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'resources'
+
+    def ready(self):
+        # Enregistre les signaux (index de recherche) et les vérifications de déploiement
+        import resources.checks  # noqa: F401
+        import resources.signals  # noqa: F401
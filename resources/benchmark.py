@@ -0,0 +1,242 @@
+"""
+Mesures de latence des pages principales.
+
+``run`` appelle chaque page de ``TARGETS`` avec le client de test de Django
+(sans serveur HTTP : on mesure la vue, ses middlewares et le rendu), d'abord
+pour chauffer les caches puis ``repeat`` fois. Pour chaque page le rapport
+donne la latence (p50, p95, min, max, moyenne), le nombre de requêtes SQL et
+leur durée, ainsi que le pic de mémoire Python d'un appel supplémentaire
+mesuré avec ``tracemalloc`` (qui ralentit trop l'exécution pour être actif
+pendant les mesures de latence).
+
+Le rapport est un dictionnaire sérialisable en JSON ; ``compare`` met deux
+rapports en regard pour repérer une régression entre deux exécutions.
+Les pages de détail visent l'objet le plus chargé (sujet avec le plus de
+messages, sondage avec le plus de votes...).
+"""
+import platform
+import statistics
+import time
+import tracemalloc
+from collections import namedtuple
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .querybudget import QueryRecorder
+
+DEFAULT_REPEAT = 20
+DEFAULT_WARMUP = 2
+
+# ``path`` reçoit un ``Fixtures`` et retourne l'URL, ou None si la page n'a pas d'objet à afficher
+Target = namedtuple("Target", "name path admin")
+
+
+def _heaviest(queryset, relation):
+    return queryset.annotate(weight=Count(relation)).order_by("-weight", "pk").values_list("pk", flat=True).first()
+
+
+class Fixtures:
+    """Objets visés par les pages de détail, recherchés une seule fois."""
+
+    def __init__(self):
+        self._cache = {}
+
+    def _get(self, key, lookup):
+        if key not in self._cache:
+            self._cache[key] = lookup()
+        return self._cache[key]
+
+    def thread(self):
+        from forums.forum.models import Thread
+        return self._get("thread", lambda: _heaviest(Thread.objects.all(), "posts"))
+
+    def survey(self):
+        from forums.forum.models import Survey
+        return self._get("survey", lambda: _heaviest(Survey.objects.all(), "votes"))
+
+    def forum(self):
+        from forums.forum.models import Forum
+        return self._get("forum", lambda: _heaviest(Forum.objects.filter(visibility="public"), "threads"))
+
+    def event(self):
+        from appEvenements.models import Evenement
+        return self._get("event", lambda: _heaviest(Evenement.objects.all(), "participants"))
+
+    def resource(self):
+        from .models import Resource
+        return self._get("resource", lambda: _heaviest(Resource.objects.filter(is_validated=True), "favorited_by"))
+
+
+def _detail(url_name, getter):
+    def path(fixtures):
+        pk = getter(fixtures)
+        return reverse(url_name, args=[pk]) if pk is not None else None
+    return path
+
+
+def _page(url_name):
+    return lambda fixtures: reverse(url_name)
+
+
+TARGETS = [
+    Target("resource_list", _page("resources:resource_list"), False),
+    Target("resource_detail", _detail("resources:resource_detail", Fixtures.resource), False),
+    Target("aid_list", _page("resources:aid_list"), False),
+    Target("global_search", lambda fixtures: reverse("resources:global_search") + "?q=club", False),
+    Target("thread_list", _page("forum:thread-list"), False),
+    Target("thread_detail", _detail("forum:thread-detail", Fixtures.thread), False),
+    Target("forum_list", _page("forum:forum-list"), False),
+    Target("forum_detail", _detail("forum:forum-detail", Fixtures.forum), False),
+    Target("survey_list", _page("forum:survey-list"), False),
+    Target("survey_detail", _detail("forum:survey-detail", Fixtures.survey), False),
+    Target("event_list", _page("appEvenements:liste"), False),
+    Target("event_calendar", _page("appEvenements:calendar"), False),
+    Target("event_detail", _detail("appEvenements:details", Fixtures.event), False),
+    Target("club_list", _page("club:club_list_view"), False),
+    Target("events_admin_dashboard", _page("appEvenements:admin_interface"), True),
+    Target("admin_panel", _page("admin_panel"), True),
+    Target("admin_accounts", _page("admin_accounts"), True),
+    Target("admin_events", _page("admin_events"), True),
+    Target("admin_forums", _page("admin_forums"), True),
+    Target("admin_threads", _page("admin_threads"), True),
+    Target("admin_surveys", _page("admin_surveys"), True),
+    Target("admin_resources", _page("admin_resources"), True),
+    Target("admin_aids", _page("admin_aids"), True),
+    Target("admin_clubs", _page("admin_clubs"), True),
+]
+
+
+def percentile(values, percent):
+    """Percentile par interpolation linéaire entre les deux rangs voisins."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _client(user):
+    # Une page en erreur est notée (statut 500) sans interrompre la série
+    client = Client(raise_request_exception=False)
+    client.force_login(user)
+    return client
+
+
+def measure(client, path, repeat=DEFAULT_REPEAT, warmup=DEFAULT_WARMUP):
+    """Mesures d'une page ; les durées sont en millisecondes."""
+    for _ in range(warmup):
+        client.get(path)
+
+    timings, queries, db_times = [], [], []
+    status = None
+    for _ in range(repeat):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with recorder.record():
+            response = client.get(path)
+        timings.append((time.perf_counter() - start) * 1000)
+        queries.append(recorder.count)
+        db_times.append(recorder.duration * 1000)
+        status = response.status_code
+
+    tracemalloc.start()
+    try:
+        client.get(path)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "path": path,
+        "status": status,
+        "p50_ms": round(percentile(timings, 50), 2),
+        "p95_ms": round(percentile(timings, 95), 2),
+        "mean_ms": round(statistics.fmean(timings), 2),
+        "min_ms": round(min(timings), 2),
+        "max_ms": round(max(timings), 2),
+        "queries": max(queries),
+        "db_ms": round(statistics.fmean(db_times), 2),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def dataset_sizes():
+    from appEvenements.models import Evenement, Participation
+    from forums.forum.models import Post, Survey, SurveyVote, Thread
+
+    from .models import Aid, Favorite, Resource
+
+    return {
+        model._meta.label: model._default_manager.count()
+        for model in (
+            get_user_model(), Evenement, Participation, Thread, Post, Survey, SurveyVote, Resource, Aid, Favorite,
+        )
+    }
+
+
+def run(member, admin, names=None, repeat=DEFAULT_REPEAT, warmup=DEFAULT_WARMUP, progress=None):
+    """
+    Mesure les pages de ``TARGETS`` (ou celles nommées dans ``names``) :
+    ``member`` pour les pages publiques, ``admin`` pour l'administration.
+    """
+    fixtures = Fixtures()
+    clients = {False: _client(member), True: _client(admin)}
+    results = {}
+    # Le client de test se présente sous le nom "testserver"
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+        for target in TARGETS:
+            if names and target.name not in names:
+                continue
+            path = target.path(fixtures)
+            if path is None:
+                results[target.name] = {"skipped": "aucun objet à afficher"}
+                continue
+            results[target.name] = measure(clients[target.admin], path, repeat=repeat, warmup=warmup)
+            if progress:
+                progress(target.name, results[target.name])
+
+    return {
+        "created_at": timezone.now().isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "debug": settings.DEBUG,
+        },
+        "repeat": repeat,
+        "warmup": warmup,
+        "dataset": dataset_sizes(),
+        "results": results,
+    }
+
+
+COMPARED_METRICS = ("p50_ms", "p95_ms", "queries", "peak_memory_kb")
+
+
+def compare(baseline, current):
+    """
+    Lignes ``(page, mesure, avant, après, variation en %)`` pour les pages
+    présentes dans les deux rapports.
+    """
+    rows = []
+    for name, result in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or "skipped" in previous or "skipped" in result:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = previous.get(metric), result.get(metric)
+            if before is None or after is None:
+                continue
+            change = ((after - before) / before * 100) if before else None
+            rows.append((name, metric, before, after, change))
+    return rows
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from . import thumbnails
+
+# Caches propres à chaque processus
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Les caches invalidés par version (facettes, favoris...) doivent être partagés entre processus."""
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    if backend not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [
+        Warning(
+            "Le cache par défaut n'est pas partagé entre les processus du serveur.",
+            hint=(
+                "Définissez REDIS_URL (ou un autre cache partagé dans CACHES) : sinon une "
+                "modification n'invalide les facettes, favoris, fenêtres du calendrier et "
+                "résultats des sondages que dans le processus qui l'a traitée."
+            ),
+            id="resources.W001",
+        )
+    ]
+
+
+@register(deploy=True)
+def check_thumbnail_libraries(app_configs, **kwargs):
+    """Sans Pillow, aucune miniature ; sans pypdfium2, aucun aperçu de PDF."""
+    missing = [
+        package
+        for package, module in (("Pillow", thumbnails.Image), ("pypdfium2", thumbnails.pypdfium2))
+        if module is None
+    ]
+    if not missing:
+        return []
+    return [
+        Warning(
+            f"Miniatures désactivées en partie, paquet(s) manquant(s) : {', '.join(missing)}.",
+            hint="Installez les dépendances de requirements.txt (pip install -r requirements.txt).",
+            id="resources.W002",
+        )
+    ]
@@ -0,0 +1,158 @@
+"""
+Téléchargement protégé des fichiers de ressources et d'aides.
+
+Les droits sont vérifiés par la vue ; le transfert lui-même est confié, si
+possible, au serveur web frontal (``RESOURCES_SENDFILE_BACKEND``) :
+
+- ``"xsendfile"`` : en-tête ``X-Sendfile`` avec le chemin absolu du fichier
+  (Apache mod_xsendfile, lighttpd) ;
+- ``"accel"`` : en-tête ``X-Accel-Redirect`` vers
+  ``RESOURCES_SENDFILE_URL_PREFIX`` + nom du fichier (emplacement ``internal``
+  de nginx pointant sur ``MEDIA_ROOT``) ;
+- ``None`` (défaut) : le fichier est servi par Django. Un téléchargement
+  complet passe par ``FileResponse``, que le serveur WSGI transmet avec
+  ``wsgi.file_wrapper`` (sendfile) sans recopie par le worker ; seules les
+  requêtes partielles (``Range``) sont lues par blocs.
+
+Dans tous les cas la vue répond elle-même aux requêtes conditionnelles
+(``ETag``/``Last-Modified``, réponse 304). Le serveur frontal gère les
+requêtes ``Range`` des réponses qu'il transmet ; sans lui, une seule plage
+``bytes=début-fin`` est prise en charge (206/416), ce qui suffit à la reprise
+d'un téléchargement interrompu.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+from django.utils.text import slugify
+
+from .storage import is_blob_name
+
+BACKEND_XSENDFILE = "xsendfile"
+BACKEND_ACCEL = "accel"
+
+DEFAULT_ACCEL_PREFIX = "/protected-media/"
+READ_BLOCK = 64 * 1024
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def get_backend():
+    return getattr(settings, "RESOURCES_SENDFILE_BACKEND", None)
+
+
+def get_etag(name, size, mtime):
+    """L'empreinte contenue dans le nom d'un fichier partagé fait un ETag fort et stable."""
+    if is_blob_name(name):
+        return '"%s"' % os.path.basename(name).split(".")[0]
+    return '"%x-%x"' % (int(mtime), size)
+
+
+def download_filename(title, name):
+    """Nom proposé au navigateur : le titre, avec l'extension du fichier stocké."""
+    extension = os.path.splitext(name)[1].lower()
+    return f"{slugify(title) or 'fichier'}{extension}"
+
+
+def parse_range(header, size):
+    """
+    Retourne ``(début, fin)`` inclusifs, None si l'en-tête est absent ou ignoré
+    (plusieurs plages, syntaxe inconnue), ou ``False`` si la plage ne peut être
+    satisfaite.
+    """
+    match = _RANGE_RE.match((header or "").strip())
+    if not match or size == 0:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffixe : les N derniers octets
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+def _if_range_passes(request, etag, mtime):
+    if_range = request.headers.get("If-Range")
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/"')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(mtime)
+
+
+def _content_type(filename):
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+def _read_range(path, start, length):
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        while length > 0:
+            block = handle.read(min(READ_BLOCK, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def serve_file(request, field_file, filename):
+    """Réponse de téléchargement pour ``field_file``, en pièce jointe nommée ``filename``."""
+    storage = field_file.storage
+    name = field_file.name
+    path = storage.path(name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404("Fichier introuvable.")
+    etag = get_etag(name, stat.st_size, stat.st_mtime)
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        return not_modified
+
+    backend = get_backend()
+    byte_range = None
+    if backend is None and _if_range_passes(request, etag, stat.st_mtime):
+        byte_range = parse_range(request.headers.get("Range"), stat.st_size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{stat.st_size}"
+    elif backend is not None:
+        response = HttpResponse(content_type=_content_type(filename))
+        if backend == BACKEND_XSENDFILE:
+            response["X-Sendfile"] = path
+        else:
+            prefix = getattr(settings, "RESOURCES_SENDFILE_URL_PREFIX", DEFAULT_ACCEL_PREFIX)
+            response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + quote(name)
+    elif byte_range is not None:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(path, start, end - start + 1),
+            status=206,
+            content_type=_content_type(filename),
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        response["Content-Length"] = str(end - start + 1)
+    else:
+        response = FileResponse(open(path, "rb"), as_attachment=True, filename=filename)
+
+    if response.status_code != 416:
+        response["Content-Disposition"] = content_disposition_header(True, filename)
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    return response
@@ -0,0 +1,338 @@
+"""
+Moteur d'export PDF des ressources et des aides.
+
+Le queryset est parcouru avec ``.iterator()`` et les éléments ReportLab sont
+produits par lots : seul le lot en cours de mise en page est gardé en mémoire.
+Le PDF est écrit dans un fichier temporaire puis renvoyé en streaming avec
+``FileResponse``. Le nombre de lignes exportées est plafonné par
+``RESOURCES_EXPORT_MAX_ROWS`` et le mode « tableau seul » (``?mode=table``)
+permet d'exporter de gros volumes sans les fiches détaillées.
+
+``get_export_params`` et ``get_export_queryset`` reproduisent les filtres des
+listes (q, catégorie, club, validation) à partir de paramètres sérialisables,
+ce qui permet de rejouer un export dans le worker de ``resources.jobs``.
+"""
+import tempfile
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.http import FileResponse
+from django.utils import timezone
+
+from .mixins import is_admin
+from .search import search_queryset
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+except ImportError:
+    A4 = None
+
+# Plafond par défaut du nombre d'éléments exportés
+DEFAULT_MAX_ROWS = 10000
+
+# Nombre d'éléments lus et mis en page par lot
+CHUNK_SIZE = 200
+
+# Au-delà de ce nombre d'éléments, le tableau récapitulatif n'est pas affiché en mode complet
+SUMMARY_TABLE_LIMIT = 50
+
+MODE_FULL = "full"
+MODE_TABLE = "table"
+
+# Portée de validation : éléments validés (membres) ou tous (administrateurs)
+SCOPE_VALIDATED = "validated"
+SCOPE_ALL = "all"
+
+
+def is_available():
+    """True si ReportLab est installé."""
+    return A4 is not None
+
+
+def get_max_rows():
+    return getattr(settings, "RESOURCES_EXPORT_MAX_ROWS", DEFAULT_MAX_ROWS)
+
+
+def get_export_params(request):
+    """Extrait les paramètres d'export de la requête, sous une forme sérialisable en JSON."""
+    mode = request.GET.get('mode', MODE_FULL)
+    return {
+        'q': request.GET.get('q', '').strip(),
+        'category': request.GET.get('category', ''),
+        'club': request.GET.get('club', ''),
+        'scope': SCOPE_ALL if is_admin(request.user) else SCOPE_VALIDATED,
+        'mode': mode if mode in (MODE_FULL, MODE_TABLE) else MODE_FULL,
+    }
+
+
+def get_export_queryset(model, params):
+    """Queryset de Resource ou d'Aid correspondant aux paramètres d'export."""
+    queryset = model.objects.select_related("category", "club", "submitted_by")
+    if params.get('scope') != SCOPE_ALL:
+        queryset = queryset.filter(is_validated=True)
+    if params.get('category'):
+        queryset = queryset.filter(category_id=params['category'])
+    if params.get('club'):
+        queryset = queryset.filter(club_id=params['club'])
+    if params.get('q'):
+        return search_queryset(queryset, params['q'])
+    return queryset.order_by('-date_submitted')
+
+
+class _LazyFlowables(list):
+    """
+    Liste de flowables remplie à la demande à partir d'un itérable de lots.
+    ``SimpleDocTemplate.build`` consomme la liste par le début : un nouveau lot
+    n'est produit que lorsque le précédent a été entièrement mis en page.
+    """
+
+    def __init__(self, chunks):
+        super().__init__()
+        self._chunks = iter(chunks)
+        self._refill()
+
+    def _refill(self):
+        while not list.__len__(self):
+            try:
+                self.extend(next(self._chunks))
+            except StopIteration:
+                return
+
+    def __len__(self):
+        self._refill()
+        return list.__len__(self)
+
+
+class PDFExport:
+    """
+    Export PDF d'un queryset de Resource ou d'Aid.
+
+    ``title`` est le titre du document, ``item_label`` le libellé au pluriel
+    utilisé dans les textes (« ressources », « aides »).
+    """
+
+    SUMMARY_HEADER = ['Titre', 'Catégorie', 'Club', 'Auteur', 'Date']
+
+    def __init__(self, queryset, title, item_label, filename_prefix, mode=MODE_FULL, max_rows=None):
+        self.queryset = queryset
+        self.title = title
+        self.item_label = item_label
+        self.filename_prefix = filename_prefix
+        self.mode = mode if mode in (MODE_FULL, MODE_TABLE) else MODE_FULL
+        self.max_rows = max_rows or get_max_rows()
+        self.total = None
+        self.styles = self._build_styles()
+
+    # ------------------------------------------------------------------
+    # Styles
+    # ------------------------------------------------------------------
+
+    def _build_styles(self):
+        styles = getSampleStyleSheet()
+        normal_style = styles['Normal']
+        normal_style.fontSize = 10
+        normal_style.leading = 14
+        return {
+            'title': ParagraphStyle(
+                'CustomTitle',
+                parent=styles['Heading1'],
+                fontSize=24,
+                textColor=colors.HexColor('#7c3aed'),
+                spaceAfter=30,
+                alignment=TA_CENTER,
+                fontName='Helvetica-Bold'
+            ),
+            'subtitle': ParagraphStyle(
+                'CustomSubtitle',
+                parent=styles['Heading2'],
+                fontSize=14,
+                textColor=colors.HexColor('#5b21b6'),
+                spaceAfter=12,
+                spaceBefore=20,
+                fontName='Helvetica-Bold'
+            ),
+            'normal': normal_style,
+            'meta': ParagraphStyle(
+                'Meta',
+                parent=styles['Normal'],
+                fontSize=9,
+                textColor=colors.HexColor('#64748b'),
+                spaceAfter=10
+            ),
+        }
+
+    # ------------------------------------------------------------------
+    # Éléments du document
+    # ------------------------------------------------------------------
+
+    def _iter_items(self):
+        """Parcourt au plus ``max_rows`` éléments sans mettre le queryset en cache."""
+        return self.queryset[:self.max_rows].iterator(chunk_size=CHUNK_SIZE)
+
+    def _header(self):
+        elements = [Paragraph(self.title, self.styles['title'])]
+        export_date = timezone.now().strftime("%d/%m/%Y à %H:%M")
+        elements.append(Paragraph(f"<i>Export généré le {export_date}</i>", self.styles['meta']))
+        elements.append(Spacer(1, 0.3*inch))
+        elements.append(Paragraph(
+            f"<b>Nombre total de {self.item_label} : {self.total}</b>",
+            self.styles['normal']
+        ))
+        if self.total > self.max_rows:
+            elements.append(Paragraph(
+                f"<i>Export limité aux {self.max_rows} premiers éléments.</i>",
+                self.styles['meta']
+            ))
+        elements.append(Spacer(1, 0.2*inch))
+        return elements
+
+    def _summary_row(self, item):
+        club_name = item.club.name if item.club else "N/A"
+        author_name = item.submitted_by.get_full_name() or item.submitted_by.username
+        title_short = item.title[:40] + "..." if len(item.title) > 40 else item.title
+        return [
+            title_short,
+            item.category.name,
+            club_name,
+            author_name,
+            item.date_submitted.strftime("%d/%m/%Y"),
+        ]
+
+    def _summary_table(self, rows):
+        table = Table(
+            [self.SUMMARY_HEADER] + rows,
+            colWidths=[2.5*inch, 1.2*inch, 1.2*inch, 1.2*inch, 0.9*inch],
+            repeatRows=1,
+        )
+        table.setStyle(TableStyle([
+            # En-tête
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#7c3aed')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('TOPPADDING', (0, 0), (-1, 0), 12),
+            # Lignes alternées
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8fafc')]),
+            # Bordures
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
+            # Alignement du texte
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ]))
+        return table
+
+    def _detail(self, idx, item):
+        elements = [Paragraph(f"<b>{idx}. {escape(item.title)}</b>", self.styles['subtitle'])]
+
+        info_data = [
+            ['<b>Catégorie:</b>', item.category.name],
+            ['<b>Club:</b>', item.club.name if item.club else "Non spécifié"],
+            ['<b>Auteur:</b>', item.submitted_by.get_full_name() or item.submitted_by.username],
+            ['<b>Date de soumission:</b>', item.date_submitted.strftime("%d/%m/%Y à %H:%M")],
+            ['<b>Statut:</b>', "Validée" if item.is_validated else "En attente de validation"],
+        ]
+        info_table = Table(info_data, colWidths=[1.5*inch, 4.5*inch])
+        info_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f1f5f9')),
+            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#5b21b6')),
+            ('TEXTCOLOR', (1, 0), (1, -1), colors.black),
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ]))
+        elements.append(info_table)
+
+        # Description
+        elements.append(Spacer(1, 0.1*inch))
+        elements.append(Paragraph("<b>Description:</b>", self.styles['normal']))
+        description = escape(item.description).replace('\n', '<br/>')
+        elements.append(Paragraph(description, self.styles['normal']))
+
+        # Séparateur entre les éléments
+        if idx < min(self.total, self.max_rows):
+            elements.append(Spacer(1, 0.2*inch))
+            elements.append(Paragraph("<hr width='100%' color='#e2e8f0'/>", self.styles['normal']))
+            elements.append(Spacer(1, 0.2*inch))
+        return elements
+
+    def _iter_chunks(self):
+        """Produit les flowables du document, lot par lot."""
+        yield self._header()
+
+        if self.mode == MODE_TABLE:
+            rows = []
+            for item in self._iter_items():
+                rows.append(self._summary_row(item))
+                if len(rows) >= CHUNK_SIZE:
+                    yield [self._summary_table(rows)]
+                    rows = []
+            if rows:
+                yield [self._summary_table(rows)]
+            return
+
+        # Tableau récapitulatif seulement pour les petits exports
+        if self.total <= SUMMARY_TABLE_LIMIT:
+            rows = [self._summary_row(item) for item in self._iter_items()]
+            yield [self._summary_table(rows), Spacer(1, 0.3*inch)]
+
+        yield [
+            Paragraph(f"Détails des {self.item_label}", self.styles['subtitle']),
+            Spacer(1, 0.1*inch),
+        ]
+        chunk = []
+        for idx, item in enumerate(self._iter_items(), 1):
+            chunk.extend(self._detail(idx, item))
+            if idx % CHUNK_SIZE == 0:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    # ------------------------------------------------------------------
+    # Rendu
+    # ------------------------------------------------------------------
+
+    def render(self, output):
+        """Écrit le PDF dans ``output`` (chemin ou fichier binaire)."""
+        self.total = self.queryset.count()
+        doc = SimpleDocTemplate(
+            output,
+            pagesize=A4,
+            rightMargin=72,
+            leftMargin=72,
+            topMargin=72,
+            bottomMargin=72
+        )
+        doc.build(_LazyFlowables(self._iter_chunks()))
+
+    def get_filename(self):
+        date_str = timezone.now().strftime("%d_%m_%Y")
+        return f'{self.filename_prefix}_{date_str}.pdf'
+
+    def response(self):
+        """Rend le PDF dans un fichier temporaire et le renvoie en streaming."""
+        output = tempfile.TemporaryFile()
+        try:
+            self.render(output)
+        except Exception:
+            output.close()
+            raise
+        output.seek(0)
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=self.get_filename(),
+            content_type='application/pdf',
+        )
@@ -0,0 +1,120 @@
+"""
+Facettes (catégories et clubs avec leur nombre d'éléments) des listes de
+ressources et d'aides.
+
+Les deux facettes sont calculées en une seule requête groupée par (catégorie,
+club) sur les éléments visibles correspondant à la recherche ``q``. Le résultat
+est mis en cache par (modèle, portée, q) ; toute écriture sur une ressource, une
+aide, une catégorie ou un club incrémente la version du modèle concerné, ce qui
+invalide d'un coup toutes ses entrées. Cette invalidation suppose un cache
+partagé par tous les processus du serveur (``CACHES`` dans les réglages).
+
+Une catégorie ou un club sans élément correspondant n'apparaît pas dans les
+facettes, sauf s'il est sélectionné (``with_selected``).
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Aid, Category, Club, Resource
+from .search import match_queryset
+
+SCOPE_VALIDATED = "validated"
+SCOPE_ALL = "all"
+
+FACETS_TTL = 60 * 60
+VERSION_KEY = "resources:facets:version:{}"
+FACETS_KEY = "resources:facets:{}:{}:{}:{}"
+
+
+def _version(model):
+    # Une version perdue (cache vidé) repart d'une valeur jamais utilisée
+    return cache.get_or_set(VERSION_KEY.format(model._meta.model_name), time.time_ns, None)
+
+
+def expire_facets(model):
+    """Invalide toutes les facettes en cache du modèle."""
+    key = VERSION_KEY.format(model._meta.model_name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def expire_all_facets():
+    for model in (Resource, Aid):
+        expire_facets(model)
+
+
+def _cache_key(model, scope, query):
+    digest = hashlib.sha1(query.encode("utf-8")).hexdigest()
+    return FACETS_KEY.format(model._meta.model_name, scope, _version(model), digest)
+
+
+def _by_name(entries):
+    return sorted(entries, key=lambda facet: facet["name"].lower())
+
+
+def _sorted_facet(counts):
+    return _by_name({"id": pk, "name": name, "count": count} for (pk, name), count in counts.items())
+
+
+def compute_facets(model, scope=SCOPE_VALIDATED, query=""):
+    """Catégories et clubs ayant au moins un élément correspondant, avec leur nombre."""
+    queryset = model.objects.all()
+    if scope != SCOPE_ALL:
+        queryset = queryset.filter(is_validated=True)
+    queryset = match_queryset(queryset, query)
+
+    categories, clubs = {}, {}
+    rows = (
+        queryset
+        .order_by()
+        .values("category_id", "category__name", "club_id", "club__name")
+        .annotate(total=Count("pk"))
+    )
+    for row in rows:
+        category = (row["category_id"], row["category__name"])
+        categories[category] = categories.get(category, 0) + row["total"]
+        if row["club_id"] is not None:
+            club = (row["club_id"], row["club__name"])
+            clubs[club] = clubs.get(club, 0) + row["total"]
+    return {"categories": _sorted_facet(categories), "clubs": _sorted_facet(clubs)}
+
+
+def get_facets(model, scope=SCOPE_VALIDATED, query=""):
+    """Facettes du modèle pour la portée et la recherche données, servies depuis le cache."""
+    query = " ".join(query.split()).lower()
+    key = _cache_key(model, scope, query)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(model, scope, query)
+        cache.set(key, facets, FACETS_TTL)
+    return facets
+
+
+def _keep_selected(entries, model, selected):
+    try:
+        selected = int(selected)
+    except (TypeError, ValueError):
+        return entries
+    if any(entry["id"] == selected for entry in entries):
+        return entries
+    name = model.objects.filter(pk=selected).values_list("name", flat=True).first()
+    if name is None:
+        return entries
+    return _by_name(entries + [{"id": selected, "name": name, "count": 0}])
+
+
+def with_selected(facets, category=None, club=None):
+    """
+    Facettes où la catégorie et le club sélectionnés figurent toujours, avec un
+    compte nul s'ils n'ont plus d'élément correspondant : la liste déroulante
+    garde ainsi le filtre actif.
+    """
+    return {
+        "categories": _keep_selected(facets["categories"], Category, category),
+        "clubs": _keep_selected(facets["clubs"], Club, club),
+    }
@@ -0,0 +1,108 @@
+"""
+État « favori » des ressources et des aides pour l'utilisateur courant.
+
+Deux mécanismes, selon le besoin :
+
+- ``annotate_is_favorite`` ajoute un attribut ``is_favorite`` à chaque objet
+  d'un queryset via une sous-requête ``EXISTS`` : aucune requête supplémentaire
+  pour afficher l'état de toute une page de liste ;
+- ``get_favorite_ids`` renvoie l'ensemble des identifiants favoris d'un
+  utilisateur, gardé en cache. Tout ajout ou retrait de favori incrémente la
+  version de l'utilisateur une fois la transaction validée : l'ensemble est
+  rechargé à la lecture suivante, jamais réécrit (deux basculements simultanés
+  ne peuvent pas perdre une modification, une annulation ne laisse rien en cache).
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import BooleanField, Exists, OuterRef, Value
+
+from .models import Aid, Favorite, Resource
+
+# Modèle -> champ correspondant sur Favorite
+FAVORITE_FIELDS = {
+    Resource: "resource",
+    Aid: "aid",
+}
+
+FAVORITE_IDS_TTL = 24 * 60 * 60
+VERSION_KEY = "resources:favorites:{}:version"
+FAVORITE_IDS_KEY = "resources:favorites:{}:{}:{}"
+
+
+def annotate_is_favorite(queryset, user):
+    """Annote chaque ressource ou aide du queryset avec ``is_favorite``."""
+    if not user.is_authenticated:
+        return queryset.annotate(is_favorite=Value(False, output_field=BooleanField()))
+    field = FAVORITE_FIELDS[queryset.model]
+    favorites = Favorite.objects.filter(user=user, **{field: OuterRef("pk")})
+    return queryset.annotate(is_favorite=Exists(favorites))
+
+
+def _version(user_id):
+    # Une version perdue (cache vidé ou expiré) repart d'une valeur jamais utilisée
+    return cache.get_or_set(VERSION_KEY.format(user_id), time.time_ns, FAVORITE_IDS_TTL)
+
+
+def _cache_key(user_id, model):
+    return FAVORITE_IDS_KEY.format(user_id, FAVORITE_FIELDS[model], _version(user_id))
+
+
+def expire_favorite_ids(user_ids):
+    """Invalide les favoris en cache des utilisateurs, une fois la transaction validée."""
+    user_ids = set(user_ids)
+
+    def expire():
+        for user_id in user_ids:
+            key = VERSION_KEY.format(user_id)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, time.time_ns(), FAVORITE_IDS_TTL)
+
+    if user_ids:
+        transaction.on_commit(expire)
+
+
+def get_favorite_ids(user, model):
+    """Identifiants des ressources (ou aides) favorites de l'utilisateur."""
+    if not user.is_authenticated:
+        return frozenset()
+    key = _cache_key(user.pk, model)
+    ids = cache.get(key)
+    if ids is None:
+        field = FAVORITE_FIELDS[model]
+        ids = frozenset(
+            Favorite.objects.filter(user=user, **{f"{field}__isnull": False}).values_list(f"{field}_id", flat=True)
+        )
+        cache.set(key, ids, FAVORITE_IDS_TTL)
+    return ids
+
+
+def is_favorite(user, obj):
+    return obj.pk in get_favorite_ids(user, type(obj))
+
+
+def delete_favorites(model, pks):
+    """
+    Supprime les favoris des objets ``pks`` avant leur suppression en masse.
+    Les favoris sont chargés en une requête et supprimés en une autre ; leurs
+    signaux invalident les favoris en cache des utilisateurs.
+    """
+    field = FAVORITE_FIELDS[model]
+    Favorite.objects.filter(**{f"{field}__in": pks}).delete()
+
+
+def toggle_favorite(user, obj):
+    """Ajoute l'objet aux favoris de l'utilisateur ou l'en retire. Retourne True si ajouté."""
+    field = FAVORITE_FIELDS[type(obj)]
+    other = "aid" if field == "resource" else "resource"
+    favorite, created = Favorite.objects.get_or_create(
+        user=user,
+        **{field: obj},
+        defaults={other: None},
+    )
+    if not created:
+        favorite.delete()
+    return created
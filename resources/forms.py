@@ -1,6 +1,6 @@
 from django import forms
 
-from .models import Aid, AidRequest, Category, Club, Resource
+from .models import Aid, AidRequest, Category, Club, Resource, UploadSession
 
 
 class BaseBootstrapModelForm(forms.ModelForm):
@@ -19,7 +19,48 @@ class BaseBootstrapModelForm(forms.ModelForm):
                 field.widget.attrs.setdefault("class", "form-check-input")
 
 
-class ResourceForm(BaseBootstrapModelForm):
+class ChunkedUploadFormMixin(forms.Form):
+    """
+    Permet de fournir le fichier via un envoi par morceaux déjà terminé
+    (champ caché ``upload``) au lieu du champ ``file`` classique.
+    """
+    upload_target = None
+    upload = forms.UUIDField(required=False, widget=forms.HiddenInput)
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+        self._file_required = self.fields["file"].required
+        self.fields["file"].required = False
+
+    def clean(self):
+        cleaned_data = super().clean()
+        upload_id = cleaned_data.get("upload")
+        if upload_id:
+            session = UploadSession.objects.filter(
+                pk=upload_id,
+                user_id=getattr(self.user, "pk", None),
+                target=self.upload_target,
+                status=UploadSession.STATUS_COMPLETE,
+            ).first()
+            if session is None:
+                self.add_error("file", "L'envoi du fichier est introuvable ou inachevé.")
+            else:
+                cleaned_data["upload_session"] = session
+        elif self._file_required and not cleaned_data.get("file") and not self.instance.file:
+            self.add_error("file", "Ce champ est obligatoire.")
+        return cleaned_data
+
+    def save(self, commit=True):
+        session = self.cleaned_data.get("upload_session")
+        if session is not None:
+            self.instance.file.name = session.file
+        return super().save(commit)
+
+
+class ResourceForm(ChunkedUploadFormMixin, BaseBootstrapModelForm):
+    upload_target = UploadSession.TARGET_RESOURCE
+
     class Meta:
         model = Resource
         fields = ["title", "description", "file", "category", "club"]
@@ -28,7 +69,9 @@ class ResourceForm(BaseBootstrapModelForm):
         }
 
 
-class AidForm(BaseBootstrapModelForm):
+class AidForm(ChunkedUploadFormMixin, BaseBootstrapModelForm):
+    upload_target = UploadSession.TARGET_AID
+
     class Meta:
         model = Aid
         fields = ["title", "description", "file", "category", "club"]
@@ -0,0 +1,496 @@
+"""
+Recherche globale : ressources, aides, événements, clubs et discussions du forum.
+
+Tous les documents sont rangés dans une seule table FTS5 (``global_search_fts``),
+ce qui donne un classement BM25 commun aux différents types de contenu. Le
+``rowid`` encode le type et la clé primaire (``pk * 8 + code``) : la mise à
+jour d'un document est une suppression et une insertion par ``rowid``, sans
+parcours de la table.
+
+Chaque modèle est décrit par un ``Indexer`` enregistré avec ``register`` : les
+colonnes indexées (titre, contenu, complément), l'URL du résultat et la
+restriction d'accès du document. Les restrictions sont :
+
+- ``""`` : visible par tous ;
+- ``"staff"`` : ressource ou aide non validée, réservée aux administrateurs ;
+- ``"forum:<id>"`` : discussion d'un forum, visible si l'utilisateur peut lire ce forum.
+
+La requête ne retient que les restrictions accessibles à l'utilisateur, puis
+charge les objets trouvés avec une requête par type.
+
+L'index est tenu à jour par les signaux des modèles enregistrés (voir
+``connect_signals``), par la modération en masse, et reconstruit par
+``python manage.py rebuild_search_index``. Hors SQLite, la recherche retombe
+sur des filtres ``icontains`` sans classement.
+"""
+import logging
+from collections import defaultdict, namedtuple
+
+from django.apps import apps
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .search import DELETE_BATCH_SIZE, build_match_expression
+
+logger = logging.getLogger(__name__)
+
+TABLE = "global_search_fts"
+
+# Poids BM25 des colonnes : titre, contenu, complément
+COLUMN_WEIGHTS = (10.0, 2.0, 1.0)
+
+KIND_BITS = 3
+KIND_MASK = (1 << KIND_BITS) - 1
+
+RESTRICTION_PUBLIC = ""
+RESTRICTION_STAFF = "staff"
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+REBUILD_BATCH_SIZE = 1000
+
+# Délimiteurs des extraits, remplacés par <mark> après échappement du texte
+_MARK_START = "\x02"
+_MARK_END = "\x03"
+
+SearchResult = namedtuple("SearchResult", "kind label title snippet url rank object")
+
+
+def forum_restriction(forum_id):
+    return f"forum:{forum_id}"
+
+
+# ============================================================
+# INDEXEURS
+# ============================================================
+
+class Indexer:
+    """
+    Décrit l'indexation d'un modèle. ``code`` (1 à 7) est stocké dans le
+    ``rowid`` et ne doit pas changer une fois l'index construit.
+    """
+    kind = None
+    code = None
+    model_label = None
+    label = None
+    select_related = ()
+    # Champs utilisés par la recherche de repli (hors SQLite)
+    search_fields = ()
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def get_queryset(self):
+        return self.model._default_manager.select_related(*self.select_related)
+
+    def document(self, obj):
+        """Colonnes indexées : ``(titre, contenu, complément)``."""
+        raise NotImplementedError
+
+    def restriction(self, obj):
+        return RESTRICTION_PUBLIC
+
+    def title(self, obj):
+        return self.document(obj)[0]
+
+    def get_url(self, obj):
+        raise NotImplementedError
+
+    def dependents(self, obj):
+        """Objets à réindexer quand la restriction de ``obj`` change."""
+        return ()
+
+
+class ResourceIndexer(Indexer):
+    kind = "resource"
+    code = 1
+    model_label = "resources.Resource"
+    label = "Ressource"
+    select_related = ("category", "club")
+    search_fields = ("title", "description")
+    url_name = "resources:resource_detail"
+
+    def document(self, obj):
+        extra = " ".join(name for name in (obj.category.name, obj.club.name if obj.club_id else "") if name)
+        return obj.title, obj.description, extra
+
+    def restriction(self, obj):
+        return RESTRICTION_PUBLIC if obj.is_validated else RESTRICTION_STAFF
+
+    def get_url(self, obj):
+        return reverse(self.url_name, args=[obj.pk])
+
+
+class AidIndexer(ResourceIndexer):
+    kind = "aid"
+    code = 2
+    model_label = "resources.Aid"
+    label = "Aide"
+    url_name = "resources:aid_detail"
+
+
+class EvenementIndexer(Indexer):
+    kind = "event"
+    code = 3
+    model_label = "appEvenements.Evenement"
+    label = "Événement"
+    search_fields = ("titre", "description")
+
+    def document(self, obj):
+        return obj.titre, obj.description, " ".join(filter(None, (obj.lieu, obj.promotion_description)))
+
+    def get_url(self, obj):
+        return reverse("appEvenements:details", args=[obj.pk])
+
+
+class ClubIndexer(Indexer):
+    kind = "club"
+    code = 4
+    model_label = "clubApp.Club"
+    label = "Club"
+    search_fields = ("name", "description")
+
+    def document(self, obj):
+        return obj.name, obj.description or "", ""
+
+    def get_url(self, obj):
+        return reverse("club:club_detail_view", args=[obj.pk])
+
+
+class ThreadIndexer(Indexer):
+    kind = "thread"
+    code = 5
+    model_label = "forum.Thread"
+    label = "Discussion"
+    select_related = ("forum",)
+    search_fields = ("title", "body")
+
+    def document(self, obj):
+        return obj.title, obj.body, obj.forum.title
+
+    def restriction(self, obj):
+        return forum_restriction(obj.forum_id)
+
+    def get_url(self, obj):
+        return reverse("forum:thread-detail", args=[obj.pk])
+
+    def dependents(self, obj):
+        # Fil déplacé vers un autre forum : ses messages changent de restriction
+        return [(INDEXERS["post"], obj.posts.select_related("thread"))]
+
+
+class PostIndexer(Indexer):
+    kind = "post"
+    code = 6
+    model_label = "forum.Post"
+    label = "Message"
+    select_related = ("thread",)
+    search_fields = ("content",)
+
+    def document(self, obj):
+        # Le titre du fil va dans le complément : un message ne doit pas être
+        # classé comme s'il portait lui-même ce titre
+        return "", obj.content, obj.thread.title
+
+    def restriction(self, obj):
+        return forum_restriction(obj.thread.forum_id)
+
+    def title(self, obj):
+        return obj.thread.title
+
+    def get_url(self, obj):
+        return reverse("forum:thread-detail", args=[obj.thread_id]) + f"#post-{obj.pk}"
+
+
+INDEXERS = {}
+
+
+def register(indexer):
+    """Enregistre un indexeur (instance de ``Indexer``)."""
+    if not 0 < indexer.code <= KIND_MASK:
+        raise ValueError(f"Code d'indexeur invalide : {indexer.code}")
+    for other in INDEXERS.values():
+        if other.code == indexer.code and other.kind != indexer.kind:
+            raise ValueError(f"Code {indexer.code} déjà utilisé par {other.kind}")
+    INDEXERS[indexer.kind] = indexer
+    return indexer
+
+
+for _indexer in (ResourceIndexer, AidIndexer, EvenementIndexer, ClubIndexer, ThreadIndexer, PostIndexer):
+    register(_indexer())
+
+
+def get_indexer_for_model(model):
+    for indexer in INDEXERS.values():
+        if indexer.model is model:
+            return indexer
+    return None
+
+
+def _indexer_for_code(code):
+    for indexer in INDEXERS.values():
+        if indexer.code == code:
+            return indexer
+    return None
+
+
+def rowid(indexer, pk):
+    return (pk << KIND_BITS) | indexer.code
+
+
+# ============================================================
+# MAINTENANCE DE L'INDEX
+# ============================================================
+
+def is_available():
+    return connection.vendor == "sqlite"
+
+
+def create_index_table():
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+            "title, body, extra, restriction UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+
+def index_exists():
+    return is_available() and TABLE in connection.introspection.table_names()
+
+
+def _rows(indexer, objects):
+    return [(rowid(indexer, obj.pk), *indexer.document(obj), indexer.restriction(obj)) for obj in objects]
+
+
+def _write(rows, delete_ids):
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = %s", [(row_id,) for row_id in delete_ids])
+        cursor.executemany(
+            f"INSERT INTO {TABLE} (rowid, title, body, extra, restriction) VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def index_objects(indexer, objects):
+    """Indexe (ou réindexe) des objets du modèle de ``indexer``."""
+    if not is_available() or not objects:
+        return
+    rows = _rows(indexer, objects)
+    try:
+        _write(rows, [row[0] for row in rows])
+    except DatabaseError:
+        logger.warning("Index de recherche globale indisponible, %s non indexé.", indexer.kind)
+
+
+def index_pks(model, pks):
+    """Réindexe les objets désignés (après un ``update()`` en masse, qui ne déclenche pas de signal)."""
+    indexer = get_indexer_for_model(model)
+    if indexer is not None and pks:
+        index_objects(indexer, list(indexer.get_queryset().filter(pk__in=pks)))
+
+
+def unindex(indexer, pk):
+    if not is_available():
+        return
+    try:
+        _write([], [rowid(indexer, pk)])
+    except DatabaseError:
+        logger.warning("Index de recherche globale indisponible, %s #%s non retiré.", indexer.kind, pk)
+
+
+def unindex_pks(model, pks):
+    """Retire les documents d'objets supprimés en masse (sans signal)."""
+    indexer = get_indexer_for_model(model)
+    if indexer is None or not pks or not is_available():
+        return
+    row_ids = [rowid(indexer, pk) for pk in pks]
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            for start in range(0, len(row_ids), DELETE_BATCH_SIZE):
+                batch = row_ids[start:start + DELETE_BATCH_SIZE]
+                placeholders = ", ".join(["%s"] * len(batch))
+                cursor.execute(f"DELETE FROM {TABLE} WHERE rowid IN ({placeholders})", batch)
+    except DatabaseError:
+        logger.warning("Index de recherche globale indisponible, %s documents %s non retirés.", len(row_ids), indexer.kind)
+
+
+def rebuild_index(kinds=None):
+    """Reconstruit l'index par lots. Retourne le nombre de documents par type."""
+    if not is_available():
+        return {}
+    create_index_table()
+    counts = {}
+    with transaction.atomic():
+        for kind, indexer in INDEXERS.items():
+            if kinds and kind not in kinds:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {TABLE} WHERE (rowid & %s) = %s", [KIND_MASK, indexer.code])
+            counts[kind] = 0
+            batch = []
+            for obj in indexer.get_queryset().iterator(chunk_size=REBUILD_BATCH_SIZE):
+                batch.append(obj)
+                if len(batch) >= REBUILD_BATCH_SIZE:
+                    _write(_rows(indexer, batch), [])
+                    counts[kind] += len(batch)
+                    batch = []
+            _write(_rows(indexer, batch), [])
+            counts[kind] += len(batch)
+    return counts
+
+
+def _indexed_restriction(indexer, pk):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT restriction FROM {TABLE} WHERE rowid = %s", [rowid(indexer, pk)])
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _index_on_save(sender, instance, raw=False, created=False, **kwargs):
+    if raw:
+        return
+    indexer = get_indexer_for_model(sender)
+    previous = None
+    if not created and index_exists() and indexer.dependents(instance):
+        previous = _indexed_restriction(indexer, instance.pk)
+    index_objects(indexer, [instance])
+    if previous is not None and previous != indexer.restriction(instance):
+        for dependent_indexer, queryset in indexer.dependents(instance):
+            index_objects(dependent_indexer, list(queryset))
+
+
+def _unindex_on_delete(sender, instance, **kwargs):
+    unindex(get_indexer_for_model(sender), instance.pk)
+
+
+def connect_signals():
+    for indexer in INDEXERS.values():
+        uid = f"resources.global_search:{indexer.kind}"
+        post_save.connect(_index_on_save, sender=indexer.model, dispatch_uid=uid)
+        post_delete.connect(_unindex_on_delete, sender=indexer.model, dispatch_uid=uid)
+
+
+# ============================================================
+# RECHERCHE
+# ============================================================
+
+def allowed_restrictions(user):
+    """Restrictions d'accès des documents que ``user`` peut voir."""
+    from forums.forum.access import visibility_q
+    from forums.forum.models import Forum
+
+    allowed = [RESTRICTION_PUBLIC]
+    if user.is_authenticated and user.is_staff:
+        allowed.append(RESTRICTION_STAFF)
+    forums = Forum.objects.filter(visibility_q(user))
+    allowed.extend(forum_restriction(pk) for pk in forums.values_list("pk", flat=True))
+    return allowed
+
+
+def _highlight(snippet):
+    return mark_safe(
+        escape(snippet).replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+    )
+
+
+def _hydrate(hits):
+    """``hits`` : liste de ``(rowid, rang, extrait)`` -> résultats dans le même ordre."""
+    by_kind = defaultdict(list)
+    for row_id, _rank, _snippet in hits:
+        by_kind[row_id & KIND_MASK].append(row_id >> KIND_BITS)
+
+    objects = {}
+    for code, pks in by_kind.items():
+        indexer = _indexer_for_code(code)
+        if indexer is None:
+            continue
+        for obj in indexer.get_queryset().filter(pk__in=pks):
+            objects[(code, obj.pk)] = obj
+
+    results = []
+    for row_id, rank, snippet in hits:
+        code, pk = row_id & KIND_MASK, row_id >> KIND_BITS
+        obj = objects.get((code, pk))
+        if obj is None:
+            # Entrée périmée (objet supprimé sans signal) : ignorée
+            continue
+        indexer = _indexer_for_code(code)
+        results.append(SearchResult(
+            kind=indexer.kind,
+            label=indexer.label,
+            title=indexer.title(obj),
+            snippet=_highlight(snippet),
+            url=indexer.get_url(obj),
+            rank=rank,
+            object=obj,
+        ))
+    return results
+
+
+def _fallback_search(query, user, kinds, limit):
+    """Sans index FTS5 : filtres ``icontains`` par type, sans classement."""
+    allowed = set(allowed_restrictions(user))
+    results = []
+    for kind, indexer in INDEXERS.items():
+        if kinds and kind not in kinds:
+            continue
+        condition = Q()
+        for field in indexer.search_fields:
+            condition |= Q(**{f"{field}__icontains": query})
+        for obj in indexer.get_queryset().filter(condition)[:limit]:
+            if indexer.restriction(obj) not in allowed:
+                continue
+            document = indexer.document(obj)
+            results.append(SearchResult(
+                kind=kind,
+                label=indexer.label,
+                title=indexer.title(obj),
+                snippet=escape(document[1][:200]),
+                url=indexer.get_url(obj),
+                rank=0.0,
+                object=obj,
+            ))
+    return results[:limit]
+
+
+def search(query, user, kinds=None, limit=DEFAULT_LIMIT):
+    """
+    Recherche ``query`` dans tous les types (ou ceux de ``kinds``) et retourne
+    au plus ``limit`` résultats visibles par ``user``, du plus au moins pertinent.
+    """
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    kinds = [kind for kind in (kinds or ()) if kind in INDEXERS]
+    expression = build_match_expression(query)
+    if not expression:
+        return []
+    if not index_exists():
+        return _fallback_search(query, user, kinds, limit)
+
+    allowed = allowed_restrictions(user)
+    weights = ", ".join(str(weight) for weight in COLUMN_WEIGHTS)
+    sql = (
+        f"SELECT rowid, bm25({TABLE}, {weights}) AS rank, "
+        f"snippet({TABLE}, -1, char(2), char(3), '…', 16) "
+        f"FROM {TABLE} WHERE {TABLE} MATCH %s "
+        f"AND restriction IN ({', '.join(['%s'] * len(allowed))})"
+    )
+    params = [expression, *allowed]
+    if kinds:
+        codes = [INDEXERS[kind].code for kind in kinds]
+        sql += f" AND (rowid & {KIND_MASK}) IN ({', '.join(['%s'] * len(codes))})"
+        params.extend(codes)
+    sql += " ORDER BY rank LIMIT %s"
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        hits = cursor.fetchall()
+    return _hydrate(hits)
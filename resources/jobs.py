@@ -0,0 +1,204 @@
+"""
+File d'attente locale des exports PDF, stockée en base (modèle ExportJob).
+
+Une requête d'export crée une tâche et reçoit immédiatement son identifiant ;
+la commande ``run_export_worker`` exécute les tâches en attente. Le PDF produit
+est enregistré sous ``MEDIA_ROOT/exports/`` et nommé d'après une clé de cache :
+l'empreinte SHA-256 des filtres (q, catégorie, club, portée de validation, mode)
+et de la version des données (date de soumission la plus récente et nombre
+d'éléments). Tant que les données ne changent pas, un export identique est servi
+depuis ce fichier sans nouveau rendu.
+
+Les fichiers des exports expirés (données modifiées depuis) ou anciens sont
+supprimés avec leur tâche par la commande ``purge_exports``.
+"""
+import hashlib
+import json
+import tempfile
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from . import exports
+from .mixins import is_admin
+from .models import Aid, ExportJob, Resource
+
+# Type d'export -> (modèle, titre du document, libellé, préfixe du nom de fichier)
+CATALOGUE_EXPORTS = {
+    ExportJob.KIND_RESOURCES: (Resource, "Ressources", "ressources", "ressources_export"),
+    ExportJob.KIND_AIDS: (Aid, "Aides", "aides", "aides_export"),
+}
+
+KIND_FOR_MODEL = {model: kind for kind, (model, *_rest) in CATALOGUE_EXPORTS.items()}
+
+# Un export expiré reste téléchargeable un moment par celui qui l'attendait
+EXPIRED_GRACE = timedelta(hours=1)
+DEFAULT_RETENTION = timedelta(days=7)
+
+
+def _get_evenement(params):
+    from appEvenements.models import Evenement
+    return Evenement.objects.get(pk=params['evenement'])
+
+
+def get_data_version(kind, params):
+    """Décrit l'état des données exportées : change dès que le PDF doit être régénéré."""
+    if kind == ExportJob.KIND_EVENEMENT:
+        from appEvenements.exports import evenement_cache_fields
+        return evenement_cache_fields(_get_evenement(params))
+
+    model = CATALOGUE_EXPORTS[kind][0]
+    stats = exports.get_export_queryset(model, params).order_by().aggregate(
+        latest=Max('date_submitted'),
+        total=Count('pk'),
+    )
+    return {
+        'latest': stats['latest'].isoformat() if stats['latest'] else None,
+        'total': stats['total'],
+    }
+
+
+def compute_cache_key(kind, params):
+    """Empreinte SHA-256 des paramètres et de la version des données."""
+    payload = json.dumps(
+        {'kind': kind, 'params': params, 'version': get_data_version(kind, params)},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def enqueue_export(kind, params, user=None):
+    """
+    Retourne ``(job, created)``. Une tâche déjà terminée (fichier présent) ou en
+    cours pour la même clé de cache est réutilisée au lieu d'en créer une nouvelle.
+    """
+    cache_key = compute_cache_key(kind, params)
+    existing = (
+        ExportJob.objects
+        .filter(cache_key=cache_key)
+        .exclude(status=ExportJob.STATUS_FAILED)
+        .order_by('-created_at')
+        .first()
+    )
+    if existing is not None:
+        if existing.status != ExportJob.STATUS_DONE:
+            return existing, False
+        if existing.file and existing.file.storage.exists(existing.file.name):
+            return existing, False
+
+    job = ExportJob.objects.create(
+        kind=kind,
+        params=params,
+        cache_key=cache_key,
+        requested_by=user if user is not None and user.is_authenticated else None,
+    )
+    return job, True
+
+
+def expire_cached_exports(kind):
+    """
+    Les modifications en place ne changent ni la date de soumission ni le nombre
+    d'éléments : on retire donc la clé de cache des exports terminés de ce type.
+    """
+    ExportJob.objects.filter(kind=kind, status=ExportJob.STATUS_DONE).exclude(cache_key="").update(cache_key="")
+
+
+def get_retention():
+    return getattr(settings, "RESOURCES_EXPORT_RETENTION", DEFAULT_RETENTION)
+
+
+def purge_exports(now=None):
+    """
+    Supprime les tâches terminées dont l'export a expiré depuis plus de
+    ``EXPIRED_GRACE``, ou plus anciennes que la durée de conservation, avec
+    leur fichier. Retourne le nombre de tâches supprimées.
+    """
+    now = now or timezone.now()
+    stale = ExportJob.objects.filter(
+        Q(status=ExportJob.STATUS_DONE, cache_key="", finished_at__lt=now - EXPIRED_GRACE)
+        | Q(status__in=[ExportJob.STATUS_DONE, ExportJob.STATUS_FAILED], finished_at__lt=now - get_retention())
+    )
+    count = 0
+    for job in stale.iterator():
+        # Un export relancé après expiration peut réutiliser le même nom de fichier
+        shared = ExportJob.objects.filter(file=job.file.name).exclude(pk=job.pk).exists() if job.file else True
+        if not shared:
+            job.file.storage.delete(job.file.name)
+        job.delete()
+        count += 1
+    return count
+
+
+def claim_next_job():
+    """Réserve la plus ancienne tâche en attente. Sûr avec plusieurs workers."""
+    while True:
+        job = ExportJob.objects.filter(status=ExportJob.STATUS_PENDING).order_by('created_at').first()
+        if job is None:
+            return None
+        claimed = ExportJob.objects.filter(pk=job.pk, status=ExportJob.STATUS_PENDING).update(
+            status=ExportJob.STATUS_RUNNING,
+            started_at=timezone.now(),
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def render_job(job, output):
+    """Écrit le PDF de la tâche dans ``output``."""
+    if job.kind == ExportJob.KIND_EVENEMENT:
+        from appEvenements.exports import render_evenement_pdf
+        render_evenement_pdf(_get_evenement(job.params), output)
+        return
+
+    model, title, item_label, filename_prefix = CATALOGUE_EXPORTS[job.kind]
+    export = exports.PDFExport(
+        exports.get_export_queryset(model, job.params),
+        title=title,
+        item_label=item_label,
+        filename_prefix=filename_prefix,
+        mode=job.params.get('mode', exports.MODE_FULL),
+    )
+    export.render(output)
+
+
+def run_job(job):
+    """Exécute une tâche réservée et enregistre le PDF sous la clé de cache."""
+    try:
+        with tempfile.TemporaryFile() as output:
+            render_job(job, output)
+            output.seek(0)
+            filename = f"{job.kind}_{job.cache_key}.pdf"
+            existing = job.file.field.generate_filename(job, filename)
+            if job.file.storage.exists(existing):
+                job.file.storage.delete(existing)
+            job.file.save(filename, File(output), save=False)
+        job.status = ExportJob.STATUS_DONE
+        job.error = ""
+    except Exception:
+        job.status = ExportJob.STATUS_FAILED
+        job.error = traceback.format_exc()
+    job.finished_at = timezone.now()
+    # cache_key n'est pas réécrit : il a pu être expiré pendant le rendu
+    job.save(update_fields=['status', 'file', 'error', 'finished_at'])
+    return job
+
+
+def can_access(job, user):
+    """Les exports complets (non validés inclus) sont réservés aux administrateurs."""
+    if job.kind == ExportJob.KIND_EVENEMENT:
+        return True
+    if job.params.get('scope') == exports.SCOPE_ALL:
+        return is_admin(user)
+    return user.is_authenticated
+
+
+def get_download_filename(job):
+    date_str = (job.finished_at or timezone.now()).strftime("%d_%m_%Y")
+    if job.kind == ExportJob.KIND_EVENEMENT:
+        return f"{job.params.get('titre', 'evenement')}.pdf"
+    return f"{CATALOGUE_EXPORTS[job.kind][3]}_{date_str}.pdf"
@@ -0,0 +1,35 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from resources import rollup
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Date invalide : {value} (format attendu AAAA-MM-JJ).")
+
+
+class Command(BaseCommand):
+    help = "Recalcule les statistiques journalières (DailyStat) depuis les ressources, aides et demandes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="Premier jour à recalculer (AAAA-MM-JJ).")
+        parser.add_argument("--end", help="Dernier jour à recalculer (AAAA-MM-JJ).")
+        parser.add_argument(
+            "--kind",
+            choices=list(rollup.SOURCES),
+            action="append",
+            help="Ne recalculer qu'un type (option répétable).",
+        )
+
+    def handle(self, *args, **options):
+        start = _parse_date(options["start"]) if options["start"] else None
+        end = _parse_date(options["end"]) if options["end"] else None
+        if start and end and start > end:
+            raise CommandError("--start doit précéder --end.")
+
+        count = rollup.rebuild(start=start, end=end, kinds=options["kind"])
+        self.stdout.write(self.style.SUCCESS(f"{count} agrégat(s) journalier(s) recalculé(s)."))
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from resources import storage
+
+
+class Command(BaseCommand):
+    help = "Supprime les fichiers stockés par contenu qui ne sont plus référencés."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours",
+            type=int,
+            default=int(storage.GC_GRACE.total_seconds() // 3600),
+            help="Ne supprime que les fichiers créés depuis plus de N heures.",
+        )
+        parser.add_argument(
+            "--recount",
+            action="store_true",
+            help="Recalcule d'abord tous les compteurs de références.",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Affiche le bilan sans rien supprimer.")
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, storage.ContentAddressedStorage):
+            raise CommandError("Le stockage par défaut n'est pas ContentAddressedStorage.")
+
+        if options["recount"]:
+            fixed = storage.recount()
+            self.stdout.write(f"{fixed} compteur(s) de références corrigé(s).")
+
+        removed, freed = storage.collect_garbage(
+            grace=timedelta(hours=options["grace_hours"]),
+            dry_run=options["dry_run"],
+        )
+        verb = "à supprimer" if options["dry_run"] else "supprimé(s)"
+        self.stdout.write(self.style.SUCCESS(f"{removed} fichier(s) orphelin(s) {verb} ({freed} octets)."))
@@ -0,0 +1,65 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from resources import search, synthetic
+
+
+class Command(BaseCommand):
+    help = "Remplit la base avec un jeu de données synthétique pour les mesures de performance."
+
+    def add_arguments(self, parser):
+        for name, default in synthetic.DEFAULT_VOLUMES.items():
+            parser.add_argument(
+                f"--{name.replace('_', '-')}",
+                dest=name,
+                type=int,
+                default=default,
+                help=f"Défaut : {default}.",
+            )
+        parser.add_argument("--seed", type=int, default=0, help="Graine du générateur aléatoire.")
+        parser.add_argument(
+            "--prefix",
+            default=synthetic.DEFAULT_PREFIX,
+            help="Préfixe des noms d'utilisateurs, titres et clubs créés.",
+        )
+        parser.add_argument(
+            "--password",
+            default=synthetic.DEFAULT_PASSWORD,
+            help="Mot de passe commun des utilisateurs créés.",
+        )
+        parser.add_argument("--clear", action="store_true", help="Supprime d'abord le jeu existant de même préfixe.")
+        parser.add_argument(
+            "--clear-only",
+            action="store_true",
+            help="Supprime le jeu existant sans en créer de nouveau.",
+        )
+        parser.add_argument(
+            "--skip-index",
+            action="store_true",
+            help="Ne reconstruit ni les index de recherche ni les statistiques journalières.",
+        )
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if options["clear"] or options["clear_only"]:
+            deleted = synthetic.clear(prefix)
+            self.stdout.write(f"{deleted} ligne(s) supprimée(s).")
+            if options["clear_only"]:
+                return
+        elif synthetic.exists(prefix):
+            raise CommandError(f"Un jeu « {prefix} » existe déjà : relancer avec --clear ou un autre --prefix.")
+
+        volumes = {name: options[name] for name in synthetic.DEFAULT_VOLUMES}
+        created = synthetic.generate(volumes, seed=options["seed"], prefix=prefix, password=options["password"])
+        for name, count in created.items():
+            self.stdout.write(f"{name} : {count}")
+
+        if not options["skip_index"]:
+            # bulk_create n'émet pas de signaux : index et agrégats sont reconstruits d'un coup
+            if search.is_available():
+                call_command("rebuild_search_index", stdout=self.stdout)
+            call_command("backfill_daily_stats", stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Jeu « {prefix} » créé ; administrateur : {prefix}_admin, mot de passe : {options['password']}."
+        ))
@@ -0,0 +1,23 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from resources import thumbnails
+
+
+class Command(BaseCommand):
+    help = "Génère les miniatures manquantes des fichiers déjà enregistrés."
+
+    def handle(self, *args, **options):
+        scheduled = 0
+        for label, field_name in thumbnails.THUMBNAIL_FIELDS.items():
+            model = apps.get_model(label)
+            names = set()
+            queryset = model.objects.exclude(**{field_name: ""}).exclude(**{f"{field_name}__isnull": True})
+            for obj in queryset.only("pk", field_name).iterator():
+                field_file = getattr(obj, field_name)
+                # Fichiers partagés : une seule génération par contenu
+                if field_file.name not in names and thumbnails.schedule(field_file):
+                    scheduled += 1
+                names.add(field_file.name)
+        thumbnails.wait()
+        self.stdout.write(self.style.SUCCESS(f"Miniatures générées pour {scheduled} fichier(s)."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from resources import jobs
+
+
+class Command(BaseCommand):
+    help = "Supprime les exports PDF expirés ou anciens et leurs fichiers."
+
+    def handle(self, *args, **options):
+        count = jobs.purge_exports()
+        self.stdout.write(self.style.SUCCESS(f"{count} export(s) supprimé(s)."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from resources import uploads
+
+
+class Command(BaseCommand):
+    help = "Supprime les envois par morceaux abandonnés et leurs fichiers partiels."
+
+    def handle(self, *args, **options):
+        count = uploads.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"{count} envoi(s) abandonné(s) supprimé(s)."))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from resources import global_search, search
+from resources.models import Aid, Resource
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruit l'index de recherche plein texte des ressources et des aides, "
+        "ainsi que l'index de la recherche globale."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            choices=["resource", "aid"],
+            help="Ne reconstruire que l'index d'un seul modèle.",
+        )
+        parser.add_argument(
+            "--global-only",
+            action="store_true",
+            help="Ne reconstruire que l'index de la recherche globale.",
+        )
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError("L'index FTS5 n'est disponible qu'avec une base SQLite.")
+
+        if not options["global_only"]:
+            model = {"resource": Resource, "aid": Aid}.get(options["model"])
+            counts = search.rebuild_index(model)
+            for indexed_model, count in counts.items():
+                self.stdout.write(
+                    self.style.SUCCESS(f"{indexed_model._meta.verbose_name_plural} : {count} élément(s) indexé(s).")
+                )
+            if options["model"]:
+                return
+
+        for kind, count in global_search.rebuild_index().items():
+            label = global_search.INDEXERS[kind].label
+            self.stdout.write(self.style.SUCCESS(f"Recherche globale, {label} : {count} document(s) indexé(s)."))
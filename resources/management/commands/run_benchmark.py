@@ -0,0 +1,61 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from resources import benchmark, synthetic
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure la latence (p50/p95), le nombre de requêtes SQL et le pic de mémoire "
+        "des pages principales, et écrit un rapport JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default="benchmark.json", help="Fichier du rapport JSON.")
+        parser.add_argument("--repeat", type=int, default=benchmark.DEFAULT_REPEAT, help="Appels mesurés par page.")
+        parser.add_argument("--warmup", type=int, default=benchmark.DEFAULT_WARMUP, help="Appels de chauffe par page.")
+        parser.add_argument(
+            "--page",
+            action="append",
+            choices=[target.name for target in benchmark.TARGETS],
+            help="Ne mesurer que cette page (option répétable).",
+        )
+        parser.add_argument(
+            "--prefix",
+            default=synthetic.DEFAULT_PREFIX,
+            help="Préfixe du jeu synthétique dont on utilise les comptes.",
+        )
+        parser.add_argument("--compare", help="Rapport JSON précédent à mettre en regard.")
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("--repeat doit être au moins 1.")
+        User = get_user_model()
+        prefix = options["prefix"]
+        admin = User.objects.filter(username=f"{prefix}_admin").first()
+        member = User.objects.filter(username__startswith=f"{prefix}_user_").order_by("pk").first()
+        if admin is None or member is None:
+            raise CommandError(f"Aucun jeu « {prefix} » : lancer d'abord generate_synthetic_data.")
+
+        def progress(name, result):
+            self.stdout.write(
+                f"{name:<24} p50 {result['p50_ms']:>8.1f} ms  p95 {result['p95_ms']:>8.1f} ms  "
+                f"{result['queries']:>4} requêtes  {result['peak_memory_kb']:>8.0f} Ko  (HTTP {result['status']})"
+            )
+
+        report = benchmark.run(
+            member, admin, names=options["page"], repeat=options["repeat"], warmup=options["warmup"],
+            progress=progress,
+        )
+        with open(options["output"], "w", encoding="utf-8") as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Rapport écrit dans {options['output']}."))
+
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as baseline_file:
+                baseline = json.load(baseline_file)
+            for name, metric, before, after, change in benchmark.compare(baseline, report):
+                variation = f"{change:+.1f} %" if change is not None else "n/a"
+                self.stdout.write(f"{name:<24} {metric:<15} {before:>10} -> {after:<10} {variation}")
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from resources import jobs
+
+
+class Command(BaseCommand):
+    help = "Exécute les exports PDF en attente (file ExportJob)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Traiter les tâches en attente puis s'arrêter.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Délai en secondes entre deux vérifications de la file (défaut : 2).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            job = jobs.claim_next_job()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["interval"])
+                continue
+
+            job = jobs.run_job(job)
+            if job.status == job.STATUS_DONE:
+                self.stdout.write(self.style.SUCCESS(f"{job} : {job.file.name}"))
+            else:
+                self.stderr.write(self.style.ERROR(f"{job} :\n{job.error}"))
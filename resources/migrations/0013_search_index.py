@@ -0,0 +1,42 @@
+from django.db import migrations
+
+
+TABLES = {
+    "resources_resource_fts": "resources_resource",
+    "resources_aid_fts": "resources_aid",
+}
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for table, source in TABLES.items():
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+            "title, description, category, club, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {table} (rowid, title, description, category, club) "
+            "SELECT o.id, o.title, o.description, c.name, COALESCE(cl.name, '') "
+            f"FROM {source} o "
+            "INNER JOIN resources_category c ON c.id = o.category_id "
+            "LEFT OUTER JOIN resources_club cl ON cl.id = o.club_id"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for table in TABLES:
+        schema_editor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0012_favorite'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0014_exportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Jour')),
+                ('kind', models.CharField(choices=[('resource', 'Ressource'), ('aid', 'Aide'), ('request', 'Demande')], max_length=20, verbose_name='Type')),
+                ('total', models.IntegerField(default=0, verbose_name='Soumissions')),
+                ('validated', models.IntegerField(default=0, verbose_name='Validées')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='resources.category', verbose_name='Catégorie')),
+                ('club', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='resources.club', verbose_name='Club')),
+            ],
+            options={
+                'verbose_name': 'Statistique journalière',
+                'verbose_name_plural': 'Statistiques journalières',
+                'ordering': ['date'],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'date', 'club', 'category'), name='dailystat_unique_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:15
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0015_dailystat'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('target', models.CharField(choices=[('resource', 'Ressource'), ('aid', 'Aide')], max_length=20, verbose_name='Destination')),
+                ('filename', models.CharField(max_length=255, verbose_name='Nom du fichier')),
+                ('size', models.BigIntegerField(verbose_name='Taille annoncée')),
+                ('received', models.BigIntegerField(default=0, verbose_name='Octets reçus')),
+                ('expected_sha256', models.CharField(blank=True, max_length=64, verbose_name='SHA-256 annoncé')),
+                ('sha256', models.CharField(blank=True, db_index=True, max_length=64, verbose_name='SHA-256')),
+                ('status', models.CharField(choices=[('uploading', 'En cours'), ('complete', 'Terminé')], default='uploading', max_length=20, verbose_name='Statut')),
+                ('file', models.CharField(blank=True, max_length=255, verbose_name='Fichier enregistré')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Mis à jour le')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Envoi par morceaux',
+                'verbose_name_plural': 'Envois par morceaux',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
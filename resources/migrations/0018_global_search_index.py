@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+TABLE = "global_search_fts"
+
+
+def create_global_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    # Table vide : remplie par la migration 0020
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+        "title, body, extra, restriction UNINDEXED, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+
+
+def drop_global_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0017_storedblob'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_global_search_index, drop_global_search_index),
+    ]
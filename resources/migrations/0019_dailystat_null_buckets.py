@@ -0,0 +1,44 @@
+# Generated by Django 5.2.9 on 2026-10-18 12:26
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_buckets(apps, schema_editor):
+    # Seaux sans club ou sans catégorie créés en double avant ces contraintes
+    DailyStat = apps.get_model("resources", "DailyStat")
+    duplicates = (
+        DailyStat.objects.order_by()
+        .values("kind", "date", "club", "category")
+        .annotate(rows=Count("pk"), keep=Min("pk"), sum_total=Sum("total"), sum_validated=Sum("validated"))
+        .filter(rows__gt=1)
+    )
+    for bucket in duplicates:
+        rows = DailyStat.objects.filter(
+            kind=bucket["kind"], date=bucket["date"], club=bucket["club"], category=bucket["category"],
+        )
+        rows.exclude(pk=bucket["keep"]).delete()
+        rows.update(total=bucket["sum_total"], validated=bucket["sum_validated"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0018_global_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_buckets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailystat',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', False), ('club__isnull', True)), fields=('kind', 'date', 'category'), name='dailystat_unique_bucket_no_club'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailystat',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True), ('club__isnull', False)), fields=('kind', 'date', 'club'), name='dailystat_unique_bucket_no_category'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailystat',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True), ('club__isnull', True)), fields=('kind', 'date'), name='dailystat_unique_bucket_global'),
+        ),
+    ]
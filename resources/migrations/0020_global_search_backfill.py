@@ -0,0 +1,68 @@
+from django.db import migrations
+
+
+TABLE = "global_search_fts"
+
+# rowid = (pk << 3) | code, avec les codes des indexeurs de resources.global_search
+DOCUMENTS = {
+    "resource": (
+        "SELECT (o.id << 3) | 1, o.title, o.description, "
+        "TRIM(c.name || ' ' || COALESCE(cl.name, '')), "
+        "CASE WHEN o.is_validated THEN '' ELSE 'staff' END "
+        "FROM resources_resource o "
+        "INNER JOIN resources_category c ON c.id = o.category_id "
+        "LEFT OUTER JOIN resources_club cl ON cl.id = o.club_id"
+    ),
+    "aid": (
+        "SELECT (o.id << 3) | 2, o.title, o.description, "
+        "TRIM(c.name || ' ' || COALESCE(cl.name, '')), "
+        "CASE WHEN o.is_validated THEN '' ELSE 'staff' END "
+        "FROM resources_aid o "
+        "INNER JOIN resources_category c ON c.id = o.category_id "
+        "LEFT OUTER JOIN resources_club cl ON cl.id = o.club_id"
+    ),
+    "event": (
+        "SELECT (e.id << 3) | 3, e.titre, COALESCE(e.description, ''), "
+        "TRIM(COALESCE(e.lieu, '') || ' ' || COALESCE(e.promotion_description, '')), '' "
+        "FROM appEvenements_evenement e"
+    ),
+    "club": (
+        "SELECT (c.club_id << 3) | 4, c.name, COALESCE(c.description, ''), '', '' "
+        "FROM clubApp_club c"
+    ),
+    "thread": (
+        "SELECT (t.id << 3) | 5, t.title, t.body, f.title, 'forum:' || t.forum_id "
+        "FROM forum_thread t "
+        "INNER JOIN forum_forum f ON f.id = t.forum_id"
+    ),
+    "post": (
+        "SELECT (p.id << 3) | 6, '', p.content, t.title, 'forum:' || t.forum_id "
+        "FROM forum_post p "
+        "INNER JOIN forum_thread t ON t.id = p.thread_id"
+    ),
+}
+
+
+def fill_global_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    # Les objets créés depuis 0018 ont pu être indexés par les signaux : on repart de zéro
+    schema_editor.execute(f"DELETE FROM {TABLE}")
+    for select in DOCUMENTS.values():
+        schema_editor.execute(
+            f"INSERT INTO {TABLE} (rowid, title, body, extra, restriction) {select}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0019_dailystat_null_buckets'),
+        ('appEvenements', '0009_evenement_calendar_window'),
+        ('clubApp', '0001_initial'),
+        ('forum', '0007_notification_url'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_global_search_index, migrations.RunPython.noop),
+    ]
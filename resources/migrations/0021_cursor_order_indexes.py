@@ -0,0 +1,27 @@
+# Generated by Django 5.2.9 on 2026-10-18 13:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0020_global_search_backfill'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aid',
+            index=models.Index(fields=['date_submitted', 'id'], name='aid_submitted_order'),
+        ),
+        migrations.AddIndex(
+            model_name='favorite',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='favorite_user_order'),
+        ),
+        migrations.AddIndex(
+            model_name='resource',
+            index=models.Index(fields=['date_submitted', 'id'], name='resource_submitted_order'),
+        ),
+    ]
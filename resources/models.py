@@ -1,8 +1,12 @@
+import uuid
+
 from django.conf import settings
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
 
+from .storage import generated_files_storage
+
 
 class Club(models.Model):
     """Modèle pour représenter un club universitaire."""
@@ -58,6 +62,10 @@ class Resource(models.Model):
 
     class Meta:
         ordering = ["-date_submitted"]
+        indexes = [
+            # Tri de la liste et pagination par curseur sur (date_submitted, id)
+            models.Index(fields=["date_submitted", "id"], name="resource_submitted_order"),
+        ]
 
     def __str__(self) -> str:
         return self.title
@@ -93,6 +101,10 @@ class Aid(models.Model):
 
     class Meta:
         ordering = ["-date_submitted"]
+        indexes = [
+            # Tri de la liste et pagination par curseur sur (date_submitted, id)
+            models.Index(fields=["date_submitted", "id"], name="aid_submitted_order"),
+        ]
 
     def __str__(self) -> str:
         return self.title
@@ -233,6 +245,10 @@ class Favorite(models.Model):
             )
         ]
         ordering = ['-created_at']
+        indexes = [
+            # Favoris d'un utilisateur triés pour la pagination par curseur sur (created_at, id)
+            models.Index(fields=['user', 'created_at', 'id'], name='favorite_user_order'),
+        ]
 
     def __str__(self):
         if self.resource:
@@ -249,3 +265,209 @@ class Favorite(models.Model):
         if self.resource and self.aid:
             raise ValidationError("Un favori ne peut pas être associé à la fois à une ressource et une aide.")
 
+
+
+class ExportJob(models.Model):
+    """
+    Export PDF exécuté en arrière-plan par la commande ``run_export_worker``.
+    Le fichier produit est partagé entre toutes les tâches de même ``cache_key``.
+    """
+    KIND_RESOURCES = "resources"
+    KIND_AIDS = "aids"
+    KIND_EVENEMENT = "evenement"
+    KIND_CHOICES = [
+        (KIND_RESOURCES, "Ressources"),
+        (KIND_AIDS, "Aides"),
+        (KIND_EVENEMENT, "Événement"),
+    ]
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "En attente"),
+        (STATUS_RUNNING, "En cours"),
+        (STATUS_DONE, "Terminé"),
+        (STATUS_FAILED, "Échec"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Type")
+    params = models.JSONField(default=dict, blank=True, verbose_name="Paramètres")
+    cache_key = models.CharField(max_length=64, db_index=True, verbose_name="Clé de cache")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name="Statut")
+    file = models.FileField(
+        upload_to="exports/",
+        storage=generated_files_storage,
+        blank=True,
+        null=True,
+        verbose_name="Fichier",
+    )
+    error = models.TextField(blank=True, verbose_name="Erreur")
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="export_jobs",
+        verbose_name="Demandé par",
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de demande")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Début")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Fin")
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Export PDF"
+        verbose_name_plural = "Exports PDF"
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="exportjob_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def is_done(self):
+        return self.status == self.STATUS_DONE and bool(self.file)
+
+
+class DailyStat(models.Model):
+    """
+    Agrégat journalier des soumissions, par type d'objet, club et catégorie.
+    Tenu à jour par les signaux de ``resources.signals`` (voir ``resources.rollup``)
+    et reconstruit avec ``python manage.py backfill_daily_stats``.
+    """
+    KIND_RESOURCE = "resource"
+    KIND_AID = "aid"
+    KIND_REQUEST = "request"
+    KIND_CHOICES = [
+        (KIND_RESOURCE, "Ressource"),
+        (KIND_AID, "Aide"),
+        (KIND_REQUEST, "Demande"),
+    ]
+
+    date = models.DateField(verbose_name="Jour")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Type")
+    club = models.ForeignKey(
+        Club,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="daily_stats",
+        verbose_name="Club",
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="daily_stats",
+        verbose_name="Catégorie",
+    )
+    # Éléments soumis ce jour-là, et parmi eux ceux validés (demandes : approuvées)
+    total = models.IntegerField(default=0, verbose_name="Soumissions")
+    validated = models.IntegerField(default=0, verbose_name="Validées")
+
+    class Meta:
+        ordering = ["date"]
+        verbose_name = "Statistique journalière"
+        verbose_name_plural = "Statistiques journalières"
+        # NULL n'est égal à rien en SQL : un seau sans club ou sans catégorie (toutes
+        # les demandes) a besoin de sa propre contrainte, limitée aux lignes concernées
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "date", "club", "category"],
+                name="dailystat_unique_bucket",
+            ),
+            models.UniqueConstraint(
+                fields=["kind", "date", "category"],
+                condition=models.Q(club__isnull=True, category__isnull=False),
+                name="dailystat_unique_bucket_no_club",
+            ),
+            models.UniqueConstraint(
+                fields=["kind", "date", "club"],
+                condition=models.Q(club__isnull=False, category__isnull=True),
+                name="dailystat_unique_bucket_no_category",
+            ),
+            models.UniqueConstraint(
+                fields=["kind", "date"],
+                condition=models.Q(club__isnull=True, category__isnull=True),
+                name="dailystat_unique_bucket_global",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} - {self.date} : {self.total}"
+
+
+class UploadSession(models.Model):
+    """
+    Envoi d'un fichier par morceaux (voir ``resources.uploads``). Les octets reçus
+    sont ajoutés à un fichier partiel ; la validation finale le place sous
+    ``MEDIA_ROOT`` et enregistre son empreinte SHA-256.
+    """
+    TARGET_RESOURCE = "resource"
+    TARGET_AID = "aid"
+    TARGET_CHOICES = [
+        (TARGET_RESOURCE, "Ressource"),
+        (TARGET_AID, "Aide"),
+    ]
+
+    STATUS_UPLOADING = "uploading"
+    STATUS_COMPLETE = "complete"
+    STATUS_CHOICES = [
+        (STATUS_UPLOADING, "En cours"),
+        (STATUS_COMPLETE, "Terminé"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="upload_sessions",
+        verbose_name="Utilisateur",
+    )
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES, verbose_name="Destination")
+    filename = models.CharField(max_length=255, verbose_name="Nom du fichier")
+    size = models.BigIntegerField(verbose_name="Taille annoncée")
+    received = models.BigIntegerField(default=0, verbose_name="Octets reçus")
+    expected_sha256 = models.CharField(max_length=64, blank=True, verbose_name="SHA-256 annoncé")
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True, verbose_name="SHA-256")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_UPLOADING, verbose_name="Statut")
+    file = models.CharField(max_length=255, blank=True, verbose_name="Fichier enregistré")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Mis à jour le")
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Envoi par morceaux"
+        verbose_name_plural = "Envois par morceaux"
+
+    def __str__(self) -> str:
+        return f"{self.filename} ({self.received}/{self.size})"
+
+    @property
+    def is_complete(self):
+        return self.status == self.STATUS_COMPLETE
+
+
+class StoredBlob(models.Model):
+    """
+    Fichier du stockage adressé par contenu (voir ``resources.storage``).
+    ``ref_count`` compte les champs ``FileField`` qui le désignent, tous modèles
+    confondus ; à zéro, le fichier peut être supprimé par ``gc_media_blobs``.
+    """
+    name = models.CharField(max_length=255, unique=True, verbose_name="Nom de stockage")
+    sha256 = models.CharField(max_length=64, db_index=True, verbose_name="SHA-256")
+    size = models.BigIntegerField(default=0, verbose_name="Taille")
+    ref_count = models.IntegerField(default=0, db_index=True, verbose_name="Références")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Fichier stocké"
+        verbose_name_plural = "Fichiers stockés"
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.ref_count})"
@@ -0,0 +1,293 @@
+"""
+Modération en masse des ressources, aides et demandes.
+
+Une opération porte sur une liste d'identifiants ou sur des critères de filtre
+et s'exécute dans une seule transaction. Validation et décision sur les demandes
+passent par un seul ``queryset.update()``, en un nombre fixe de requêtes. Le
+rejet d'une ressource ou d'une aide la supprime, comme la vue de rejet
+unitaire, par une seule instruction ``DELETE`` tant que toutes les relations
+vers le modèle sont connues (``BULK_DELETE_RELATIONS``) ; sinon par
+``delete()``, par lots. Les auteurs concernés reçoivent
+ensuite une notification chacune, créées en un seul ``bulk_create`` après la
+validation de la transaction.
+
+Ni ``update()`` ni la suppression directe ne déclenchent les signaux des
+modèles : les agrégats journaliers, les facettes, les exports en cache, les
+index de recherche, les favoris et les références des fichiers sont donc mis à
+jour ici, en masse.
+"""
+from collections import Counter, defaultdict
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.urls import reverse
+
+from . import facets, favorites, global_search, jobs, rollup, search, storage
+from .models import Aid, AidRequest, Favorite, Resource
+
+DEFAULT_MAX_ITEMS = 5000
+
+ACTION_VALIDATE = "validate"
+ACTION_APPROVE = "approve"
+ACTION_REJECT = "reject"
+
+# Liste ouverte par les notifications de modération
+NOTIFICATION_URLS = {
+    Resource: "resources:resource_list",
+    Aid: "resources:aid_list",
+    AidRequest: "resources:aidrequest_list",
+}
+
+# Cible -> (modèle, actions possibles)
+TARGETS = {
+    "resource": (Resource, (ACTION_VALIDATE, ACTION_REJECT)),
+    "aid": (Aid, (ACTION_VALIDATE, ACTION_REJECT)),
+    "request": (AidRequest, (ACTION_APPROVE, ACTION_REJECT)),
+}
+
+# Relations inverses traitées par la suppression en masse : toute autre clé
+# étrangère vers Resource ou Aid renvoie vers delete() et ses cascades
+BULK_DELETE_RELATIONS = {
+    (Favorite, "resource"),
+    (Favorite, "aid"),
+}
+
+# Issue par élément
+OUTCOME_UPDATED = "updated"
+OUTCOME_DELETED = "deleted"
+OUTCOME_UNCHANGED = "unchanged"
+OUTCOME_NOT_FOUND = "not_found"
+
+
+class ModerationError(ValueError):
+    """Demande de modération invalide (cible, action, filtres ou volume)."""
+
+
+def get_max_items():
+    return getattr(settings, "RESOURCES_BULK_MODERATION_MAX", DEFAULT_MAX_ITEMS)
+
+
+def _parse_date(value, name):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ModerationError(f"Filtre {name} invalide (format attendu AAAA-MM-JJ).")
+
+
+def filter_queryset(model, filters):
+    """
+    Applique les critères : ``category``, ``club``, ``submitted_by`` et
+    ``is_validated`` pour les ressources et aides ; ``type``, ``status`` et
+    ``requested_by`` pour les demandes ; ``date_from``/``date_to`` pour tous.
+    """
+    allowed = (
+        {"type", "status", "requested_by", "date_from", "date_to"}
+        if model is AidRequest
+        else {"category", "club", "submitted_by", "is_validated", "date_from", "date_to"}
+    )
+    unknown = set(filters) - allowed
+    if unknown:
+        raise ModerationError(f"Filtre inconnu : {', '.join(sorted(unknown))}.")
+
+    date_field = "date_requested" if model is AidRequest else "date_submitted"
+    queryset = model.objects.all()
+    for name, value in filters.items():
+        if name == "date_from":
+            queryset = queryset.filter(**{f"{date_field}__date__gte": _parse_date(value, name)})
+        elif name == "date_to":
+            queryset = queryset.filter(**{f"{date_field}__date__lte": _parse_date(value, name)})
+        elif name == "is_validated":
+            queryset = queryset.filter(is_validated=value in (True, "true", "1", 1))
+        elif name in ("category", "club", "submitted_by", "requested_by"):
+            try:
+                queryset = queryset.filter(**{f"{name}_id": int(value)})
+            except (TypeError, ValueError):
+                raise ModerationError(f"Filtre {name} invalide.")
+        else:
+            choices = AidRequest.TYPE_CHOICES if name == "type" else AidRequest.STATUS_CHOICES
+            if value not in dict(choices):
+                raise ModerationError(f"Filtre {name} invalide.")
+            queryset = queryset.filter(**{name: value})
+    return queryset
+
+
+def _target_state(model, action):
+    """Champ et valeur visés par l'action (None pour une suppression)."""
+    if model is AidRequest:
+        status = AidRequest.STATUS_APPROVED if action == ACTION_APPROVE else AidRequest.STATUS_REJECTED
+        return "status", status
+    if action == ACTION_VALIDATE:
+        return "is_validated", True
+    return None
+
+
+def _rollup_groups(model, queryset):
+    """``(seau journalier, compté comme validé ?, nombre d'éléments)`` pour ``queryset``, en une requête."""
+    kind = rollup.KIND_FOR_MODEL[model]
+    date_field = rollup.SOURCES[kind][1]
+    group = ("status",) if model is AidRequest else ("club", "category", "is_validated")
+    rows = (
+        queryset
+        .annotate(day=TruncDate(date_field))
+        .order_by()
+        .values("day", *group)
+        .annotate(total=Count("pk"))
+    )
+    for row in rows:
+        if model is AidRequest:
+            yield (kind, row["day"], None, None), row["status"] == AidRequest.STATUS_APPROVED, row["total"]
+        else:
+            yield (kind, row["day"], row["club"], row["category"]), row["is_validated"], row["total"]
+
+
+def _rollup_deltas(model, queryset, value):
+    """
+    Variation du nombre d'éléments validés (demandes : approuvées) par seau
+    journalier, pour les éléments de ``queryset`` qui passent à ``value``.
+    """
+    is_counted = value == AidRequest.STATUS_APPROVED if model is AidRequest else value
+    deltas = Counter()
+    for bucket, was_counted, total in _rollup_groups(model, queryset):
+        deltas[bucket] += (int(is_counted) - int(was_counted)) * total
+    return deltas
+
+
+def _rollup_removals(model, queryset):
+    """``{seau: (total, validés)}`` à retirer des agrégats pour les éléments supprimés de ``queryset``."""
+    removals = defaultdict(lambda: [0, 0])
+    for bucket, was_counted, total in _rollup_groups(model, queryset):
+        removals[bucket][0] -= total
+        removals[bucket][1] -= total if was_counted else 0
+    return removals
+
+
+def can_delete_in_bulk(model):
+    """Vrai si ``_delete_in_bulk`` traite toutes les relations qui pointent vers ``model``."""
+    return all(
+        (relation.related_model, relation.field.name) in BULK_DELETE_RELATIONS
+        for relation in model._meta.related_objects
+    )
+
+
+def _delete_in_bulk(model, affected, pks):
+    """
+    Supprime les éléments sans passer par ``delete()``, qui chargerait chaque
+    objet et enverrait ses signaux ; leurs effets sont appliqués ici en un
+    nombre de requêtes qui ne dépend pas du nombre d'éléments.
+
+    Si une relation inconnue pointe vers le modèle, la suppression passe par
+    ``delete()``, par lots : cascades et signaux de chaque objet s'appliquent.
+    """
+    if not can_delete_in_bulk(model):
+        deleted = 0
+        for start in range(0, len(pks), search.DELETE_BATCH_SIZE):
+            batch = model.objects.filter(pk__in=pks[start:start + search.DELETE_BATCH_SIZE])
+            deleted += batch.delete()[1].get(model._meta.label, 0)
+        return deleted
+    for bucket, (total, validated) in _rollup_removals(model, affected).items():
+        rollup.apply_delta(bucket, total, validated)
+    storage.release_references(model, affected)
+    favorites.delete_favorites(model, pks)
+    search.unindex_pks(model, pks)
+    global_search.unindex_pks(model, pks)
+    return affected._raw_delete(affected.db)
+
+
+def _notify(model, action, recipients, actor):
+    """Une notification par auteur concerné, créée en une seule insertion groupée."""
+    from forums.forum.models import Notification
+
+    if model is AidRequest:
+        verb = "approuvée" if action == ACTION_APPROVE else "rejetée"
+        singular, plural = f"Votre demande a été {verb}.", f"{{count}} de vos demandes ont été {verb}s."
+    else:
+        label = "ressource" if model is Resource else "aide"
+        verb = "validée" if action == ACTION_VALIDATE else "rejetée"
+        singular = f"Votre {label} « {{title}} » a été {verb} par un administrateur."
+        plural = f"{{count}} de vos {label}s ont été {verb}s par un administrateur."
+
+    url = reverse(NOTIFICATION_URLS[model])
+    notifications = []
+    for user_id, titles in recipients.items():
+        if len(titles) == 1:
+            message = singular.format(title=titles[0])
+        else:
+            message = plural.format(count=len(titles))
+        notifications.append(Notification(
+            recipient_id=user_id,
+            actor=actor,
+            notif_type="moderation",
+            message=message[:255],
+            url=url,
+        ))
+    Notification.objects.bulk_create(notifications, batch_size=500)
+
+
+def moderate(target, action, ids=None, filters=None, actor=None, notify=True):
+    """
+    Applique ``action`` aux éléments de ``target`` désignés par ``ids`` ou par
+    ``filters``. Retourne ``{"updated": n, "outcomes": {pk: issue}}``.
+    """
+    if target not in TARGETS:
+        raise ModerationError("Cible inconnue.")
+    model, actions = TARGETS[target]
+    if action not in actions:
+        raise ModerationError("Action invalide pour cette cible.")
+    if not ids and not filters:
+        raise ModerationError("Indiquez des identifiants ou des critères de filtre.")
+
+    max_items = get_max_items()
+    if ids:
+        try:
+            ids = sorted({int(pk) for pk in ids})
+        except (TypeError, ValueError):
+            raise ModerationError("Identifiants invalides.")
+        if len(ids) > max_items:
+            raise ModerationError(f"Au plus {max_items} éléments par opération.")
+        queryset = model.objects.filter(pk__in=ids)
+        if filters:
+            queryset = queryset & filter_queryset(model, filters)
+    else:
+        queryset = filter_queryset(model, filters)
+
+    author_field = "requested_by_id" if model is AidRequest else "submitted_by_id"
+    title_field = "description" if model is AidRequest else "title"
+    state = _target_state(model, action)
+
+    with transaction.atomic():
+        rows = list(queryset.values_list("pk", author_field, title_field, state[0] if state else "pk")[:max_items + 1])
+        if len(rows) > max_items:
+            raise ModerationError(f"Au plus {max_items} éléments par opération ; affinez les filtres.")
+
+        outcomes = {pk: OUTCOME_NOT_FOUND for pk in ids or ()}
+        changed, recipients = [], defaultdict(list)
+        for pk, author_id, title, current in rows:
+            if state and current == state[1]:
+                outcomes[pk] = OUTCOME_UNCHANGED
+                continue
+            outcomes[pk] = OUTCOME_UPDATED if state else OUTCOME_DELETED
+            changed.append(pk)
+            recipients[author_id].append(title)
+
+        affected = model.objects.filter(pk__in=changed)
+        if state:
+            field, value = state
+            for bucket, delta in _rollup_deltas(model, affected, value).items():
+                rollup.apply_delta(bucket, validated=delta)
+            updated = affected.update(**{field: value})
+            # update() ne passe pas par les signaux : la restriction d'accès des
+            # documents de la recherche globale est mise à jour ici
+            global_search.index_pks(model, changed)
+        else:
+            updated = _delete_in_bulk(model, affected, changed)
+
+        if model is not AidRequest:
+            facets.expire_facets(model)
+            jobs.expire_cached_exports(jobs.KIND_FOR_MODEL[model])
+        if notify and recipients:
+            transaction.on_commit(lambda: _notify(model, action, recipients, actor))
+
+    return {"updated": updated, "outcomes": outcomes}
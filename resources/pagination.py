@@ -0,0 +1,181 @@
+"""
+Pagination par curseur (keyset) pour les vues de liste.
+
+Au lieu d'un OFFSET et d'un COUNT(*) à chaque page, la page suivante est
+obtenue par une comparaison sur la clé de tri (par exemple ``date_submitted``)
+complétée par la clé primaire pour départager les égalités :
+
+    WHERE (date_submitted, id) < (:date, :id) ORDER BY date_submitted DESC, id DESC
+
+Le coût d'une page ne dépend donc plus de sa profondeur. Les curseurs transmis
+dans l'URL (paramètre ``cursor``) sont signés et opaques pour le client.
+
+Pour activer ce mode sur une ListView, il suffit d'ajouter
+``CursorPaginationMixin`` en tête de ses classes parentes.
+"""
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+
+CURSOR_SALT = "resources.pagination.cursor"
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+class CursorPaginator:
+    """Découpe un queryset en pages successives selon ``(champ, pk)``."""
+
+    def __init__(self, queryset, per_page, field_name, descending=True, count=False):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field_name = field_name
+        self.descending = descending
+        self.field = queryset.model._meta.get_field(field_name)
+        self._with_count = count
+        self._count = None
+
+    @property
+    def count(self):
+        """Nombre total d'éléments, ou None si le comptage est désactivé."""
+        if self._with_count and self._count is None:
+            self._count = self.queryset.count()
+        return self._count
+
+    def encode_cursor(self, obj, direction):
+        value = self.field.value_to_string(obj)
+        return signing.dumps([direction, value, obj.pk], salt=CURSOR_SALT, compress=True)
+
+    def decode_cursor(self, token):
+        """Retourne ``(direction, valeur, pk)`` ou None si le curseur est absent ou invalide."""
+        if not token:
+            return None
+        try:
+            direction, value, pk = signing.loads(token, salt=CURSOR_SALT)
+            return direction, self.field.to_python(value), pk
+        except (signing.BadSignature, TypeError, ValueError):
+            return None
+
+    def _ordering(self, reverse=False):
+        descending = self.descending != reverse
+        prefix = "-" if descending else ""
+        return [f"{prefix}{self.field_name}", f"{prefix}pk"]
+
+    def _after(self, value, pk, reverse=False):
+        """Éléments situés après ``(value, pk)`` dans l'ordre de parcours."""
+        lookup = "lt" if self.descending != reverse else "gt"
+        return Q(**{f"{self.field_name}__{lookup}": value}) | Q(
+            **{self.field_name: value, f"pk__{lookup}": pk}
+        )
+
+    def page(self, token=None):
+        cursor = self.decode_cursor(token)
+        queryset = self.queryset
+        backwards = cursor is not None and cursor[0] == PREVIOUS
+        if cursor is not None:
+            queryset = queryset.filter(self._after(cursor[1], cursor[2], reverse=backwards))
+        rows = list(queryset.order_by(*self._ordering(reverse=backwards))[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            return CursorPage(rows, self, has_next=True, has_previous=has_more)
+        return CursorPage(rows, self, has_next=has_more, has_previous=cursor is not None)
+
+
+class CursorPage:
+    """Page de résultats ; expose une partie de l'interface de ``django.core.paginator.Page``."""
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next and bool(object_list)
+        self._has_previous = has_previous and bool(object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1], NEXT)
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], PREVIOUS)
+
+
+class CursorPaginationMixin:
+    """
+    Remplace la pagination par numéro de page d'une ListView par une pagination
+    par curseur, lorsque le queryset est trié sur un seul champ du modèle
+    (éventuellement suivi de la clé primaire). Sinon, par exemple pour un tri par
+    pertinence, la pagination Django habituelle est conservée.
+
+    ``cursor_count`` : calculer le nombre total d'éléments (un COUNT(*) par page).
+    """
+    cursor_query_param = "cursor"
+    cursor_count = False
+
+    def get_cursor_ordering(self, queryset):
+        """Retourne ``(nom du champ, décroissant)`` ou None si le tri ne s'y prête pas."""
+        query = queryset.query
+        if query.order_by:
+            ordering = list(query.order_by)
+        elif query.default_ordering:
+            ordering = list(queryset.model._meta.ordering)
+        else:
+            ordering = []
+        if not ordering or not all(isinstance(term, str) for term in ordering):
+            return None
+
+        pk_names = {"pk", queryset.model._meta.pk.name}
+        if len(ordering) > 1 and ordering[-1].lstrip("-") in pk_names:
+            if ordering[-1].startswith("-") != ordering[0].startswith("-"):
+                return None
+            ordering = ordering[:-1]
+        if len(ordering) != 1:
+            return None
+
+        name = ordering[0].lstrip("-")
+        if name in query.annotations or "__" in name:
+            return None
+        try:
+            field = queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete or field.is_relation:
+            return None
+        return name, ordering[0].startswith("-")
+
+    def paginate_queryset(self, queryset, page_size):
+        ordering = self.get_cursor_ordering(queryset)
+        if ordering is None:
+            return super().paginate_queryset(queryset, page_size)
+        field_name, descending = ordering
+        paginator = CursorPaginator(
+            queryset,
+            page_size,
+            field_name,
+            descending=descending,
+            count=self.cursor_count,
+        )
+        page = paginator.page(self.request.GET.get(self.cursor_query_param))
+        return paginator, page, page.object_list, page.has_other_pages()
+
@@ -0,0 +1,218 @@
+"""
+Mesure des requêtes SQL par vue et budgets de requêtes.
+
+``QueryBudgetMiddleware`` compte les requêtes SQL de chaque réponse, leur durée
+cumulée et les requêtes répétées (même empreinte, paramètres mis à part : le
+signe d'un N+1). Le résultat est :
+
+- ajouté en en-tête ``Server-Timing`` (``db`` et ``app``) quand ``DEBUG`` est
+  actif ou que l'utilisateur est administrateur ;
+- écrit, une ligne JSON par requête HTTP, dans ``RESOURCES_QUERY_BUDGET_LOG``
+  si ce chemin est défini ;
+- journalisé (logger ``resources.querybudget``) quand la vue dépasse son budget
+  ou répète une même requête au moins ``RESOURCES_QUERY_BUDGET_DUPLICATES`` fois.
+
+Une vue déclare son budget avec le décorateur ``@query_budget(n)`` ou, pour une
+vue basée sur une classe, l'attribut ``query_budget = n``.
+``RESOURCES_QUERY_BUDGET_DEFAULT`` s'applique aux autres vues. Avec
+``RESOURCES_QUERY_BUDGET_STRICT``, un dépassement lève ``QueryBudgetExceeded`` :
+c'est ce qu'utilisent les tests (voir ``QueryBudgetTestMixin``).
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DUPLICATE_THRESHOLD = 5
+
+_IN_LIST_RE = re.compile(r"\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)", re.IGNORECASE)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_SPACE_RE = re.compile(r"\s+")
+
+_sink_lock = threading.Lock()
+
+
+class QueryBudgetExceeded(Exception):
+    """Une vue a exécuté plus de requêtes que son budget."""
+
+    def __init__(self, report):
+        self.report = report
+        duplicates = "".join(
+            f"\n  {count} x {fingerprint}" for fingerprint, count in report["duplicates"]
+        )
+        super().__init__(
+            f"{report['view']} : {report['queries']} requêtes pour un budget de {report['budget']}."
+            f"{duplicates}"
+        )
+
+
+def query_budget(budget):
+    """Déclare le nombre maximal de requêtes SQL d'une vue fonction."""
+    def decorator(view_func):
+        view_func.query_budget = budget
+        return view_func
+    return decorator
+
+
+def get_view_budget(view_func):
+    view_class = getattr(view_func, "view_class", None)
+    budget = getattr(view_class, "query_budget", None) if view_class else None
+    if budget is None:
+        budget = getattr(view_func, "query_budget", None)
+    if budget is None:
+        budget = getattr(settings, "RESOURCES_QUERY_BUDGET_DEFAULT", None)
+    return budget
+
+
+def get_view_name(view_func):
+    view_class = getattr(view_func, "view_class", None)
+    target = view_class or view_func
+    return f"{target.__module__}.{target.__qualname__}"
+
+
+def fingerprint(sql):
+    """Empreinte d'une requête : littéraux et listes ``IN (...)`` neutralisés."""
+    sql = _IN_LIST_RE.sub("IN (...)", sql)
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+class QueryRecorder:
+    """Enveloppe d'exécution (``connection.execute_wrapper``) qui compte et chronomètre les requêtes."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @contextmanager
+    def record(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def duplicates(self, threshold):
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count >= threshold]
+
+
+def get_duplicate_threshold():
+    return getattr(settings, "RESOURCES_QUERY_BUDGET_DUPLICATES", DEFAULT_DUPLICATE_THRESHOLD)
+
+
+def write_to_sink(report):
+    path = getattr(settings, "RESOURCES_QUERY_BUDGET_LOG", None)
+    if not path:
+        return
+    line = json.dumps(report, ensure_ascii=False)
+    with _sink_lock, open(path, "a", encoding="utf-8") as sink:
+        sink.write(line + "\n")
+
+
+def _server_timing(report):
+    return (
+        f'db;dur={report["db_ms"]:.1f};desc="{report["queries"]} requetes, '
+        f'{len(report["duplicates"])} repetees", app;dur={report["total_ms"]:.1f}'
+    )
+
+
+class QueryBudgetMiddleware:
+    """Compte les requêtes SQL de chaque vue et applique son budget."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with recorder.record():
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        view_name = getattr(request, "_query_budget_view", None)
+        if view_name is None:
+            # Pas de vue résolue (404, fichiers statiques) : rien à mesurer
+            return response
+
+        budget = request._query_budget
+        report = {
+            "view": view_name,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": recorder.count,
+            "db_ms": round(recorder.duration * 1000, 2),
+            "total_ms": round(total * 1000, 2),
+            "budget": budget,
+            "duplicates": recorder.duplicates(get_duplicate_threshold()),
+        }
+        write_to_sink(report)
+
+        if report["duplicates"]:
+            logger.warning(
+                "%s : requête répétée %s fois (N+1 probable) : %s",
+                view_name, report["duplicates"][0][1], report["duplicates"][0][0],
+            )
+        if budget is not None and recorder.count > budget:
+            if getattr(settings, "RESOURCES_QUERY_BUDGET_STRICT", False):
+                raise QueryBudgetExceeded(report)
+            logger.warning("%s : %s requêtes pour un budget de %s.", view_name, recorder.count, budget)
+
+        user = getattr(request, "user", None)
+        if settings.DEBUG or (user is not None and user.is_authenticated and user.is_staff):
+            response["Server-Timing"] = _server_timing(report)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget_view = get_view_name(view_func)
+        request._query_budget = get_view_budget(view_func)
+
+
+class QueryBudgetTestMixin:
+    """
+    À mélanger à un ``TestCase`` : les vues qui dépassent leur budget font
+    échouer le test, et ``assertMaxQueries`` borne un bloc de code.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        from django.test.utils import override_settings
+
+        super().setUpClass()
+        cls._query_budget_settings = override_settings(RESOURCES_QUERY_BUDGET_STRICT=True)
+        cls._query_budget_settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._query_budget_settings.disable()
+        super().tearDownClass()
+
+    @contextmanager
+    def assertMaxQueries(self, budget):
+        recorder = QueryRecorder()
+        with recorder.record():
+            yield recorder
+        if recorder.count > budget:
+            duplicates = "".join(
+                f"\n  {count} x {sql}" for sql, count in recorder.duplicates(2)
+            )
+            self.fail(f"{recorder.count} requêtes pour un budget de {budget}.{duplicates}")
@@ -0,0 +1,205 @@
+"""
+Agrégats journaliers (modèle DailyStat) des ressources, aides et demandes.
+
+Chaque objet compte pour une unité dans le « seau » (type, jour de soumission,
+club, catégorie) auquel il appartient, et pour une unité validée s'il est validé
+(demandes : approuvées). Les signaux appliquent la différence entre l'état avant
+et après chaque enregistrement ou suppression ; ``rebuild`` recalcule les seaux
+depuis les tables sources. Les séries sur une période lisent uniquement DailyStat :
+leur coût dépend du nombre de jours, pas du nombre d'objets.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import Aid, AidRequest, DailyStat, Resource
+
+# Type de statistique -> (modèle source, champ de date)
+SOURCES = {
+    DailyStat.KIND_RESOURCE: (Resource, "date_submitted"),
+    DailyStat.KIND_AID: (Aid, "date_submitted"),
+    DailyStat.KIND_REQUEST: (AidRequest, "date_requested"),
+}
+
+KIND_FOR_MODEL = {model: kind for kind, (model, _field) in SOURCES.items()}
+
+
+def _state_fields(model):
+    if model is AidRequest:
+        return ("date_requested", "status")
+    return ("date_submitted", "club_id", "category_id", "is_validated")
+
+
+def _local_date(moment):
+    return timezone.localdate(moment) if timezone.is_aware(moment) else moment.date()
+
+
+def _state_from_values(model, values):
+    """Retourne ``(seau, validé)`` ou None si l'objet n'a pas encore de date."""
+    kind = KIND_FOR_MODEL[model]
+    moment = values[SOURCES[kind][1]]
+    if moment is None:
+        return None
+    if model is AidRequest:
+        return (kind, _local_date(moment), None, None), values["status"] == AidRequest.STATUS_APPROVED
+    return (kind, _local_date(moment), values["club_id"], values["category_id"]), values["is_validated"]
+
+
+def get_state(instance):
+    """État courant (en mémoire) d'un objet suivi."""
+    model = type(instance)
+    return _state_from_values(model, {field: getattr(instance, field) for field in _state_fields(model)})
+
+
+def load_state(model, pk):
+    """État enregistré en base d'un objet suivi, avant sa modification."""
+    values = model.objects.filter(pk=pk).values(*_state_fields(model)).first()
+    return _state_from_values(model, values) if values else None
+
+
+def apply_delta(bucket, total=0, validated=0):
+    """Ajoute ``total`` et ``validated`` au seau, en le créant au besoin."""
+    if not total and not validated:
+        return
+    kind, day, club_id, category_id = bucket
+    rows = DailyStat.objects.filter(kind=kind, date=day, club_id=club_id, category_id=category_id)
+    changes = {"total": F("total") + total, "validated": F("validated") + validated}
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            DailyStat.objects.create(
+                kind=kind,
+                date=day,
+                club_id=club_id,
+                category_id=category_id,
+                total=total,
+                validated=validated,
+            )
+    except IntegrityError:
+        # Seau créé entre-temps par une autre requête
+        rows.update(**changes)
+
+
+def record_change(previous, current):
+    """Retire la contribution de l'ancien état et ajoute celle du nouvel état."""
+    if previous == current:
+        return
+    deltas = defaultdict(lambda: [0, 0])
+    if previous is not None:
+        bucket, is_validated = previous
+        deltas[bucket][0] -= 1
+        deltas[bucket][1] -= int(is_validated)
+    if current is not None:
+        bucket, is_validated = current
+        deltas[bucket][0] += 1
+        deltas[bucket][1] += int(is_validated)
+    for bucket, (total, validated) in deltas.items():
+        apply_delta(bucket, total, validated)
+
+
+def detach_club(club):
+    """
+    Les objets d'un club supprimé passent à « sans club » (SET_NULL) : on reporte
+    ses agrégats sur les seaux sans club avant leur suppression en cascade.
+    """
+    for row in club.daily_stats.all():
+        apply_delta((row.kind, row.date, None, row.category_id), row.total, row.validated)
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def rebuild(start=None, end=None, kinds=None):
+    """
+    Recalcule les agrégats depuis les tables sources, éventuellement limités à
+    l'intervalle de jours ``[start, end]``. Retourne le nombre de seaux écrits.
+    """
+    kinds = list(kinds or SOURCES)
+    rows = []
+    with transaction.atomic():
+        stale = DailyStat.objects.filter(kind__in=kinds)
+        if start:
+            stale = stale.filter(date__gte=start)
+        if end:
+            stale = stale.filter(date__lte=end)
+        stale.delete()
+
+        for kind in kinds:
+            model, date_field = SOURCES[kind]
+            queryset = model.objects.all()
+            if start:
+                queryset = queryset.filter(**{f"{date_field}__gte": _start_of_day(start)})
+            if end:
+                queryset = queryset.filter(**{f"{date_field}__lt": _start_of_day(end + timedelta(days=1))})
+            if model is AidRequest:
+                group, is_validated = (), Q(status=AidRequest.STATUS_APPROVED)
+            else:
+                group, is_validated = ("club", "category"), Q(is_validated=True)
+            buckets = (
+                queryset
+                .annotate(day=TruncDate(date_field))
+                .order_by()
+                .values("day", *group)
+                .annotate(total=Count("pk"), validated=Count("pk", filter=is_validated))
+            )
+            rows.extend(
+                DailyStat(
+                    kind=kind,
+                    date=bucket["day"],
+                    club_id=bucket.get("club"),
+                    category_id=bucket.get("category"),
+                    total=bucket["total"],
+                    validated=bucket["validated"],
+                )
+                for bucket in buckets
+            )
+        DailyStat.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def _range_queryset(kind, start, end, club=None, category=None):
+    queryset = DailyStat.objects.filter(kind=kind, date__gte=start, date__lte=end)
+    if club is not None:
+        queryset = queryset.filter(club=club)
+    if category is not None:
+        queryset = queryset.filter(category=category)
+    return queryset
+
+
+def daily_series(kind, start, end, club=None, category=None):
+    """
+    Série jour par jour sur ``[start, end]`` (jours sans soumission inclus) :
+    liste de dictionnaires ``{"date", "total", "validated"}``.
+    """
+    per_day = {
+        row["date"]: row
+        for row in _range_queryset(kind, start, end, club, category)
+        .order_by()
+        .values("date")
+        .annotate(day_total=Sum("total"), day_validated=Sum("validated"))
+    }
+    series = []
+    day = start
+    while day <= end:
+        row = per_day.get(day)
+        series.append({
+            "date": day,
+            "total": row["day_total"] if row else 0,
+            "validated": row["day_validated"] if row else 0,
+        })
+        day += timedelta(days=1)
+    return series
+
+
+def range_totals(kind, start, end, club=None, category=None):
+    """Totaux sur ``[start, end]`` : ``{"total", "validated"}``."""
+    return _range_queryset(kind, start, end, club, category).aggregate(
+        total=Coalesce(Sum("total"), Value(0)),
+        validated=Coalesce(Sum("validated"), Value(0)),
+    )
@@ -0,0 +1,188 @@
+"""
+Index de recherche plein texte (SQLite FTS5) pour les ressources et les aides.
+
+Chaque modèle indexé possède sa propre table virtuelle FTS5 dont le ``rowid``
+est la clé primaire de l'objet. Les colonnes indexées sont le titre, la
+description, le nom de la catégorie et le nom du club. L'index est tenu à jour
+par les signaux de ``resources.signals`` et peut être reconstruit en masse avec
+``python manage.py rebuild_search_index``.
+
+Sur une base autre que SQLite, la recherche retombe sur un filtre ``icontains``.
+"""
+import logging
+import re
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Aid, Resource
+
+logger = logging.getLogger(__name__)
+
+# Poids BM25 des colonnes : titre, description, catégorie, club
+COLUMN_WEIGHTS = (10.0, 2.0, 1.0, 1.0)
+
+INDEXES = {
+    Resource: "resources_resource_fts",
+    Aid: "resources_aid_fts",
+}
+
+# Identifiants par instruction DELETE lors d'un retrait en masse
+DELETE_BATCH_SIZE = 500
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def is_available():
+    """True si la base courante supporte l'index FTS5."""
+    return connection.vendor == "sqlite"
+
+
+def create_index_tables():
+    """Crée les tables virtuelles FTS5 si elles n'existent pas encore."""
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        for table in INDEXES.values():
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+                "title, description, category, club, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+
+
+def drop_index_tables():
+    """Supprime les tables virtuelles FTS5."""
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        for table in INDEXES.values():
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def rebuild_index(model=None):
+    """
+    Reconstruit l'index en une seule requête INSERT ... SELECT par modèle.
+    Retourne le nombre de lignes indexées par modèle.
+    """
+    if not is_available():
+        return {}
+    create_index_tables()
+    counts = {}
+    models = [model] if model else list(INDEXES)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for current in models:
+            table = INDEXES[current]
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(
+                f"INSERT INTO {table} (rowid, title, description, category, club) "
+                "SELECT o.id, o.title, o.description, c.name, COALESCE(cl.name, '') "
+                f"FROM {current._meta.db_table} o "
+                "INNER JOIN resources_category c ON c.id = o.category_id "
+                "LEFT OUTER JOIN resources_club cl ON cl.id = o.club_id"
+            )
+            counts[current] = cursor.rowcount
+    return counts
+
+
+def index_objects(model, objects):
+    """Indexe (ou réindexe) une liste d'objets du même modèle."""
+    if not is_available() or not objects:
+        return
+    table = INDEXES[model]
+    rows = [
+        (
+            obj.pk,
+            obj.title,
+            obj.description,
+            obj.category.name if obj.category_id else "",
+            obj.club.name if obj.club_id else "",
+        )
+        for obj in objects
+    ]
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {table} WHERE rowid = %s", [(row[0],) for row in rows])
+            cursor.executemany(
+                f"INSERT INTO {table} (rowid, title, description, category, club) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                rows,
+            )
+    except DatabaseError:
+        logger.warning("Index de recherche indisponible, %s non indexé.", model.__name__)
+
+
+def unindex_object(model, pk):
+    """Retire un objet de l'index."""
+    if not is_available():
+        return
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {INDEXES[model]} WHERE rowid = %s", [pk])
+    except DatabaseError:
+        logger.warning("Index de recherche indisponible, %s #%s non retiré.", model.__name__, pk)
+
+
+def unindex_pks(model, pks):
+    """Retire de l'index des objets supprimés en masse (sans signal)."""
+    if not is_available() or not pks:
+        return
+    pks = list(pks)
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            for start in range(0, len(pks), DELETE_BATCH_SIZE):
+                batch = pks[start:start + DELETE_BATCH_SIZE]
+                placeholders = ", ".join(["%s"] * len(batch))
+                cursor.execute(f"DELETE FROM {INDEXES[model]} WHERE rowid IN ({placeholders})", batch)
+    except DatabaseError:
+        logger.warning("Index de recherche indisponible, %s objets %s non retirés.", len(pks), model.__name__)
+
+
+def build_match_expression(query):
+    """
+    Transforme une saisie utilisateur en expression MATCH FTS5 sûre :
+    chaque mot devient un préfixe entre guillemets, combinés par ET.
+    """
+    tokens = _TOKEN_RE.findall(query or "")
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def index_exists(model):
+    """True si la table FTS5 du modèle a été créée (migration ou reconstruction)."""
+    return is_available() and INDEXES[model] in connection.introspection.table_names()
+
+
+def match_queryset(queryset, query):
+    """
+    Filtre un queryset de Resource ou d'Aid selon la requête, sans tri ni score.
+    Une requête sans mot laisse le queryset inchangé.
+    """
+    model = queryset.model
+    expression = build_match_expression(query)
+    if not expression:
+        return queryset
+    if not index_exists(model):
+        return queryset.filter(Q(title__icontains=query) | Q(description__icontains=query))
+    table = INDEXES[model]
+    return queryset.filter(pk__in=RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [expression]))
+
+
+def search_queryset(queryset, query):
+    """
+    Filtre un queryset de Resource ou d'Aid selon la requête et le trie par score BM25.
+    Les autres filtres déjà appliqués au queryset (validation, catégorie, club) sont conservés.
+    """
+    model = queryset.model
+    expression = build_match_expression(query)
+    if not expression or not index_exists(model):
+        return match_queryset(queryset, query).order_by("-date_submitted")
+
+    table = INDEXES[model]
+    weights = ", ".join(str(weight) for weight in COLUMN_WEIGHTS)
+    rank = RawSQL(
+        f"SELECT bm25({table}, {weights}) FROM {table} "
+        f"WHERE {table} MATCH %s AND rowid = {model._meta.db_table}.id",
+        [expression],
+        output_field=FloatField(),
+    )
+    return match_queryset(queryset, query).annotate(search_rank=rank).order_by("search_rank", "-date_submitted")
@@ -0,0 +1,128 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import facets, favorites, global_search, jobs, rollup, search, storage, thumbnails
+from .models import Aid, AidRequest, Category, Club, Favorite, Resource
+
+
+@receiver(post_save, sender=Resource)
+@receiver(post_save, sender=Aid)
+def index_on_save(sender, instance, **kwargs):
+    """Met à jour l'entrée de l'index de recherche après chaque enregistrement."""
+    search.index_objects(sender, [instance])
+
+
+@receiver(post_delete, sender=Resource)
+@receiver(post_delete, sender=Aid)
+def unindex_on_delete(sender, instance, **kwargs):
+    """Retire l'objet supprimé de l'index de recherche."""
+    search.unindex_object(sender, instance.pk)
+
+
+def _reindex_related(resource_ids, aid_ids):
+    search.index_objects(Resource, list(Resource.objects.filter(pk__in=resource_ids).select_related("category", "club")))
+    search.index_objects(Aid, list(Aid.objects.filter(pk__in=aid_ids).select_related("category", "club")))
+    global_search.index_pks(Resource, list(resource_ids))
+    global_search.index_pks(Aid, list(aid_ids))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Club)
+def reindex_on_rename(sender, instance, created, **kwargs):
+    """Le nom de la catégorie ou du club est indexé : on réindexe les objets liés."""
+    if created:
+        return
+    for kind in jobs.CATALOGUE_EXPORTS:
+        jobs.expire_cached_exports(kind)
+    facets.expire_all_facets()
+    _reindex_related(
+        instance.resources.values_list("pk", flat=True),
+        instance.aids.values_list("pk", flat=True),
+    )
+
+
+@receiver(pre_delete, sender=Club)
+def remember_club_objects(sender, instance, **kwargs):
+    """Mémorise les objets liés avant que le club ne soit détaché (SET_NULL)."""
+    instance._search_related_ids = (
+        list(instance.resources.values_list("pk", flat=True)),
+        list(instance.aids.values_list("pk", flat=True)),
+    )
+
+
+@receiver(post_delete, sender=Club)
+def reindex_on_club_delete(sender, instance, **kwargs):
+    facets.expire_all_facets()
+    related = getattr(instance, "_search_related_ids", None)
+    if related:
+        _reindex_related(*related)
+
+
+@receiver(post_save, sender=Resource)
+@receiver(post_save, sender=Aid)
+@receiver(post_delete, sender=Resource)
+@receiver(post_delete, sender=Aid)
+def expire_exports_on_change(sender, **kwargs):
+    """Les exports PDF en cache ne reflètent plus les données : on les expire."""
+    jobs.expire_cached_exports(jobs.KIND_FOR_MODEL[sender])
+
+
+@receiver(post_save, sender=Resource)
+@receiver(post_save, sender=Aid)
+@receiver(post_delete, sender=Resource)
+@receiver(post_delete, sender=Aid)
+def expire_facets_on_change(sender, **kwargs):
+    """Les compteurs des facettes de la liste changent : on invalide leur cache."""
+    facets.expire_facets(sender)
+
+
+@receiver(pre_save, sender=Resource)
+@receiver(pre_save, sender=Aid)
+@receiver(pre_save, sender=AidRequest)
+def remember_rollup_state(sender, instance, raw=False, **kwargs):
+    """Mémorise l'état enregistré (jour, club, catégorie, validation) avant modification."""
+    if raw:
+        return
+    instance._rollup_previous = None if instance._state.adding else rollup.load_state(sender, instance.pk)
+
+
+@receiver(post_save, sender=Resource)
+@receiver(post_save, sender=Aid)
+@receiver(post_save, sender=AidRequest)
+def update_rollup_on_save(sender, instance, raw=False, **kwargs):
+    """Reporte la création, la validation ou le changement de club/catégorie dans DailyStat."""
+    if raw:
+        return
+    rollup.record_change(getattr(instance, "_rollup_previous", None), rollup.get_state(instance))
+
+
+@receiver(post_delete, sender=Resource)
+@receiver(post_delete, sender=Aid)
+@receiver(post_delete, sender=AidRequest)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    rollup.record_change(rollup.get_state(instance), None)
+
+
+@receiver(pre_delete, sender=Club)
+def detach_club_stats(sender, instance, **kwargs):
+    """Les agrégats du club supprimé sont reportés sur les seaux sans club."""
+    rollup.detach_club(instance)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def expire_favorites_on_change(sender, instance, raw=False, **kwargs):
+    """Invalide les favoris en cache de l'utilisateur après validation de la transaction."""
+    if not raw:
+        favorites.expire_favorite_ids([instance.user_id])
+
+
+# Compteurs de références des fichiers stockés par contenu, pour tous les
+# modèles dont un FileField utilise ce stockage (ressources, aides, événements...)
+storage.connect_signals()
+
+# Miniatures des fichiers des ressources, des aides et des événements
+thumbnails.connect_signals()
+
+# Recherche globale : ressources, aides, événements, clubs, fils et messages du forum
+global_search.connect_signals()
@@ -0,0 +1,139 @@
+"""
+Statistiques du tableau de bord administrateur des ressources.
+
+Tous les compteurs sont calculés par agrégation conditionnelle et la série
+mensuelle par ``TruncMonth`` : le coût en requêtes est constant, quelle que soit
+la profondeur de l'historique. Le résultat est mis en cache pour une courte durée
+(``RESOURCES_DASHBOARD_CACHE_TTL`` secondes, 60 par défaut).
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .models import Aid, AidRequest, Club, Resource
+
+DEFAULT_CACHE_TTL = 60
+MONTHS = 6
+TOP_CLUBS_LIMIT = 5
+CACHE_KEY = "resources:dashboard_stats:{}"
+
+
+def get_cache_ttl():
+    return getattr(settings, "RESOURCES_DASHBOARD_CACHE_TTL", DEFAULT_CACHE_TTL)
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def _month_starts(today, count=MONTHS):
+    """Premiers jours des ``count`` derniers mois, du plus ancien au plus récent."""
+    months = []
+    year, month = today.year, today.month
+    for _ in range(count):
+        months.append(today.replace(year=year, month=month, day=1))
+        month -= 1
+        if month == 0:
+            month, year = 12, year - 1
+    return list(reversed(months))
+
+
+def _submission_counts(model, start_of_week, start_of_month, first_month):
+    """Compteurs de la semaine et du mois (une requête) puis série mensuelle (une requête)."""
+    counters = model.objects.aggregate(
+        this_week=Count("pk", filter=Q(date_submitted__gte=start_of_week)),
+        this_month=Count("pk", filter=Q(date_submitted__gte=start_of_month)),
+    )
+    per_month = (
+        model.objects
+        .filter(date_submitted__gte=first_month)
+        .annotate(month=TruncMonth("date_submitted"))
+        .order_by()
+        .values("month")
+        .annotate(total=Count("pk"))
+    )
+    counters["by_month"] = {
+        (row["month"].year, row["month"].month): row["total"] for row in per_month
+    }
+    return counters
+
+
+def _count_subquery(model):
+    """Nombre d'objets du modèle rattachés au club courant."""
+    counts = (
+        model.objects
+        .filter(club=OuterRef("pk"))
+        .order_by()
+        .values("club")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def get_top_clubs(limit=TOP_CLUBS_LIMIT):
+    """
+    Clubs les plus actifs (ressources + aides). Les totaux viennent de
+    sous-requêtes corrélées : pas de jointure double qui multiplierait les lignes.
+    """
+    return list(
+        Club.objects
+        .annotate(
+            total_resources=_count_subquery(Resource),
+            total_aids=_count_subquery(Aid),
+        )
+        .annotate(total_activities=F("total_resources") + F("total_aids"))
+        .filter(total_activities__gt=0)
+        .order_by("-total_activities", "name")[:limit]
+    )
+
+
+def compute_dashboard_stats():
+    """Calcule les statistiques du tableau de bord sans passer par le cache."""
+    today = timezone.localdate()
+    start_of_week = _start_of_day(today - timedelta(days=today.weekday()))
+    start_of_month = _start_of_day(today.replace(day=1))
+    months = _month_starts(today)
+    first_month = _start_of_day(months[0])
+
+    resources = _submission_counts(Resource, start_of_week, start_of_month, first_month)
+    aids = _submission_counts(Aid, start_of_week, start_of_month, first_month)
+
+    aid_requests = AidRequest.objects.aggregate(
+        pending=Count("pk", filter=Q(status=AidRequest.STATUS_PENDING)),
+        approved=Count("pk", filter=Q(status=AidRequest.STATUS_APPROVED)),
+        rejected=Count("pk", filter=Q(status=AidRequest.STATUS_REJECTED)),
+    )
+
+    month_keys = [(month.year, month.month) for month in months]
+    return {
+        "resources_this_week": resources["this_week"],
+        "resources_this_month": resources["this_month"],
+        "aids_this_week": aids["this_week"],
+        "aids_this_month": aids["this_month"],
+        "aid_requests_pending": aid_requests["pending"],
+        "aid_requests_approved": aid_requests["approved"],
+        "aid_requests_rejected": aid_requests["rejected"],
+        "top_clubs": get_top_clubs(),
+        "months_data": [month.strftime("%b %Y") for month in months],
+        "resources_by_month": [resources["by_month"].get(key, 0) for key in month_keys],
+        "aids_by_month": [aids["by_month"].get(key, 0) for key in month_keys],
+    }
+
+
+def get_dashboard_stats():
+    """Statistiques du tableau de bord, servies depuis le cache tant qu'elles sont fraîches."""
+    key = CACHE_KEY.format(timezone.localdate().isoformat())
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_dashboard_stats()
+        cache.set(key, stats, get_cache_ttl())
+    return stats
+
+
+def clear_dashboard_stats():
+    cache.delete(CACHE_KEY.format(timezone.localdate().isoformat()))
@@ -0,0 +1,299 @@
+"""
+Stockage des fichiers envoyés adressé par contenu.
+
+``ContentAddressedStorage`` est le stockage par défaut (``STORAGES["default"]``) :
+chaque fichier enregistré par un ``FileField`` est rangé sous
+
+    cas/<2 premiers caractères>/<2 suivants>/<sha256><extension>
+
+Un même document envoyé par plusieurs clubs n'occupe donc qu'une place sur le
+disque. Le nom renvoyé au champ est celui du fichier partagé : les modèles,
+formulaires et URL n'ont rien à changer. Les fichiers enregistrés avant
+l'activation de ce stockage gardent leur nom et restent servis tels quels.
+Les exports PDF, nommés d'après leur clé de cache, utilisent
+``generated_files_storage``.
+
+Chaque fichier partagé a une ligne ``StoredBlob`` dont ``ref_count`` compte les
+champs qui le désignent, tous modèles confondus. Le compteur est tenu à jour par
+les signaux des modèles concernés (voir ``connect_signals``) ; ``delete`` ne
+supprime un fichier que s'il n'est plus référencé. Les fichiers orphelins sont
+supprimés par la commande ``gc_media_blobs``, qui recompte les références avant
+de supprimer quoi que ce soit.
+"""
+import hashlib
+import os
+import re
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db.models import F, FileField
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from . import thumbnails
+
+BLOB_PREFIX = "cas"
+READ_BLOCK = 64 * 1024
+GC_GRACE = timedelta(hours=24)
+BATCH_SIZE = 500
+
+_BLOB_NAME_RE = re.compile(r"^cas/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(\.[0-9a-z]{1,10})?$")
+
+
+def blob_name(digest, filename):
+    """Nom de stockage d'un contenu d'empreinte ``digest`` (l'extension est conservée)."""
+    extension = os.path.splitext(filename or "")[1].lower()
+    if not re.match(r"^\.[0-9a-z]{1,10}$", extension):
+        extension = ""
+    return f"{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+def is_blob_name(name):
+    return bool(name) and _BLOB_NAME_RE.match(name) is not None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """``FileSystemStorage`` qui range les fichiers par empreinte SHA-256."""
+
+    def get_available_name(self, name, max_length=None):
+        # Le nom définitif est calculé par _save à partir du contenu ; seul un
+        # enregistrement concurrent du même contenu demande un nom de repli
+        if is_blob_name(name):
+            return super().get_available_name(name, max_length)
+        return name
+
+    def _save(self, name, content):
+        from .models import StoredBlob
+
+        # Un appelant qui connaît déjà l'empreinte (envoi par morceaux) évite une relecture
+        digest = getattr(content, "sha256", None)
+        if not digest:
+            hasher = hashlib.sha256()
+            for chunk in content.chunks(READ_BLOCK):
+                hasher.update(chunk)
+            digest = hasher.hexdigest()
+            if hasattr(content, "seek"):
+                content.seek(0)
+
+        target = blob_name(digest, name)
+        if not self.exists(target):
+            saved = super()._save(target, content)
+            if saved != target:
+                # Enregistrement concurrent du même contenu : on garde le premier
+                super().delete(saved)
+
+        StoredBlob.objects.get_or_create(name=target, defaults={"sha256": digest, "size": self.size(target)})
+        return target
+
+    def delete(self, name):
+        """Un fichier partagé n'est supprimé que s'il n'est plus référencé."""
+        if not is_blob_name(name):
+            super().delete(name)
+            thumbnails.delete_derivatives(self, name)
+            return
+
+        from .models import StoredBlob
+
+        deleted, _ = StoredBlob.objects.filter(name=name, ref_count__lte=0).delete()
+        if deleted or not StoredBlob.objects.filter(name=name).exists():
+            self.delete_blob(name)
+
+    def delete_blob(self, name):
+        """Supprime le fichier (et ses miniatures) sans consulter son compteur de références."""
+        super().delete(name)
+        thumbnails.delete_derivatives(self, name)
+
+
+_generated_files_storage = FileSystemStorage()
+
+
+def generated_files_storage():
+    """
+    Stockage classique sous ``MEDIA_ROOT`` pour les fichiers produits par
+    l'application (exports PDF) : ils sont retrouvés par leur nom et n'ont
+    rien à gagner à la déduplication.
+    """
+    return _generated_files_storage
+
+
+# ============================================================
+# COMPTAGE DES RÉFÉRENCES
+# ============================================================
+
+def tracked_fields():
+    """``{modèle: [attributs]}`` des ``FileField`` enregistrés dans ce stockage."""
+    tracked = {}
+    for model in apps.get_models():
+        if model._meta.proxy:
+            continue
+        names = [
+            field.attname
+            for field in model._meta.concrete_fields
+            if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage)
+        ]
+        if names:
+            tracked[model] = names
+    return tracked
+
+
+def _instance_names(instance, attnames):
+    names = []
+    for attname in attnames:
+        value = getattr(instance, attname)
+        name = getattr(value, "name", value)
+        if is_blob_name(name):
+            names.append(name)
+    return names
+
+
+def adjust_references(deltas):
+    """Applique ``{nom: variation}`` aux compteurs de références, un ``UPDATE`` par variation distincte."""
+    from .models import StoredBlob
+
+    names_by_delta = defaultdict(list)
+    for name, delta in deltas.items():
+        if delta:
+            names_by_delta[delta].append(name)
+    for delta, names in names_by_delta.items():
+        for start in range(0, len(names), BATCH_SIZE):
+            batch = names[start:start + BATCH_SIZE]
+            updated = StoredBlob.objects.filter(name__in=batch).update(ref_count=F("ref_count") + delta)
+            if updated < len(batch) and delta > 0:
+                # Fichiers partagés sans ligne (enregistrés avant la migration par exemple)
+                known = set(StoredBlob.objects.filter(name__in=batch).values_list("name", flat=True))
+                StoredBlob.objects.bulk_create(
+                    [
+                        StoredBlob(name=name, sha256=_BLOB_NAME_RE.match(name).group(1), ref_count=delta)
+                        for name in batch
+                        if name not in known
+                    ],
+                    ignore_conflicts=True,
+                )
+
+
+def release_references(model, queryset):
+    """Retire les références des fichiers de ``queryset`` avant sa suppression en masse (sans signal)."""
+    attnames = _TRACKED.get(model, ())
+    if not attnames:
+        return
+    deltas = Counter()
+    for names in queryset.values_list(*attnames):
+        deltas.subtract(name for name in names if is_blob_name(name))
+    adjust_references(deltas)
+
+
+def _remember_previous(sender, instance, raw=False, update_fields=None, **kwargs):
+    attnames = _TRACKED.get(sender, ())
+    instance._stored_blobs = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(attnames):
+        return
+    previous = sender._base_manager.filter(pk=instance.pk).values_list(*attnames).first()
+    instance._stored_blobs = [name for name in previous or () if is_blob_name(name)]
+
+
+def _count_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_stored_blobs", None)
+    if previous is None and not created:
+        # Champs de fichier non concernés par cet enregistrement
+        return
+    deltas = Counter(_instance_names(instance, _TRACKED.get(sender, ())))
+    deltas.subtract(previous or ())
+    adjust_references(deltas)
+    instance._stored_blobs = None
+
+
+def _count_deleted(sender, instance, **kwargs):
+    deltas = Counter()
+    deltas.subtract(_instance_names(instance, _TRACKED.get(sender, ())))
+    adjust_references(deltas)
+
+
+_TRACKED = {}
+
+
+def connect_signals():
+    """Branche le comptage des références sur tous les modèles concernés."""
+    _TRACKED.clear()
+    _TRACKED.update(tracked_fields())
+    for model in _TRACKED:
+        uid = f"resources.storage:{model._meta.label}"
+        pre_save.connect(_remember_previous, sender=model, dispatch_uid=uid)
+        post_save.connect(_count_saved, sender=model, dispatch_uid=uid)
+        post_delete.connect(_count_deleted, sender=model, dispatch_uid=uid)
+
+
+# ============================================================
+# RECOMPTAGE ET NETTOYAGE
+# ============================================================
+
+def count_references(names=None):
+    """Nombre réel de références à chaque fichier partagé (limité à ``names`` si fourni)."""
+    counts = Counter()
+    for model, attnames in tracked_fields().items():
+        for attname in attnames:
+            field_name = model._meta.get_field(attname).name
+            queryset = model._base_manager.filter(**{f"{field_name}__startswith": f"{BLOB_PREFIX}/"})
+            if names is not None:
+                queryset = queryset.filter(**{f"{field_name}__in": names})
+            counts.update(name for name in queryset.values_list(field_name, flat=True).iterator() if is_blob_name(name))
+    return counts
+
+
+def recount():
+    """Recalcule tous les compteurs (après des ``update()`` en masse par exemple). Retourne le nombre corrigé."""
+    from .models import StoredBlob
+
+    counts = count_references()
+    changed = []
+    for blob in StoredBlob.objects.only("pk", "name", "ref_count").iterator():
+        actual = counts.pop(blob.name, 0)
+        if blob.ref_count != actual:
+            blob.ref_count = actual
+            changed.append(blob)
+    StoredBlob.objects.bulk_update(changed, ["ref_count"], batch_size=BATCH_SIZE)
+    # Fichiers référencés sans ligne de suivi
+    adjust_references(counts)
+    return len(changed) + len(counts)
+
+
+def collect_garbage(grace=GC_GRACE, dry_run=False, now=None):
+    """
+    Supprime les fichiers partagés sans référence depuis plus de ``grace``.
+    Les références sont revérifiées en base ; un fichier envoyé par morceaux
+    récemment, pas encore rattaché à un objet, est conservé.
+    Retourne ``(nombre de fichiers, octets libérés)``.
+    """
+    from .models import StoredBlob, UploadSession
+
+    cutoff = (now or timezone.now()) - grace
+    candidates = list(
+        StoredBlob.objects.filter(ref_count__lte=0, created_at__lt=cutoff).values_list("name", "size")
+    )
+    removed, freed = 0, 0
+    for start in range(0, len(candidates), BATCH_SIZE):
+        batch = dict(candidates[start:start + BATCH_SIZE])
+        referenced = count_references(list(batch))
+        pending = set(
+            UploadSession.objects
+            .filter(status=UploadSession.STATUS_COMPLETE, updated_at__gte=cutoff, file__in=list(batch))
+            .values_list("file", flat=True)
+        )
+        orphans = [name for name in batch if name not in referenced and name not in pending]
+        if not dry_run:
+            for name, count in referenced.items():
+                StoredBlob.objects.filter(name=name).update(ref_count=count)
+            StoredBlob.objects.filter(name__in=orphans, ref_count__lte=0).delete()
+            # Un fichier référencé entre-temps garde sa ligne et n'est pas supprimé
+            kept = set(StoredBlob.objects.filter(name__in=orphans).values_list("name", flat=True))
+            orphans = [name for name in orphans if name not in kept]
+            for name in orphans:
+                default_storage.delete_blob(name)
+        removed += len(orphans)
+        freed += sum(batch[name] for name in orphans)
+    return removed, freed
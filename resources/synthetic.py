@@ -0,0 +1,260 @@
+"""
+Jeux de données synthétiques pour les mesures de performance.
+
+``generate`` remplit la base avec des volumes réalistes : utilisateurs, clubs,
+forums privés et membres, événements et participations, sujets et messages,
+sondages et votes, ressources, aides et favoris. Les lignes sont insérées par
+``bulk_create`` (les signaux ne sont pas émis) ; les index de recherche et les
+statistiques journalières sont reconstruits ensuite par la commande
+``generate_synthetic_data``.
+
+Tout ce qui est créé porte le préfixe ``prefix`` (nom d'utilisateur, titre,
+nom de club), ce qui permet à ``clear`` de le retrouver et de le supprimer
+sans toucher aux données réelles. Une même graine produit le même jeu.
+"""
+import random
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+DEFAULT_PREFIX = "bench"
+DEFAULT_PASSWORD = "bench-password"
+BATCH_SIZE = 1000
+
+# Volumes par défaut ; les valeurs "par" sont des moyennes
+DEFAULT_VOLUMES = {
+    "users": 1000,
+    "clubs": 20,
+    "members_per_club": 40,
+    "events": 200,
+    "participants_per_event": 30,
+    "threads": 500,
+    "posts_per_thread": 20,
+    "surveys": 50,
+    "votes_per_survey": 60,
+    "resources": 500,
+    "aids": 200,
+    "favorites_per_user": 5,
+}
+
+WORDS = (
+    "atelier club projet robotique musique sport cuisine theatre lecture cinema "
+    "photo science debat echecs jardin voyage danse code association solidarite "
+    "tournoi concert soiree reunion formation conference cours examen revision"
+).split()
+
+
+def _sentence(rng, words=8):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def _spread(rng, average, cap):
+    """Taille d'un échantillon autour de ``average`` (entre 0 et 2x), bornée par ``cap``."""
+    return min(cap, rng.randint(0, 2 * average)) if average else 0
+
+
+def _bulk(model, objects):
+    return model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+
+
+def generate(volumes=None, seed=0, prefix=DEFAULT_PREFIX, password=DEFAULT_PASSWORD):
+    """
+    Crée un jeu de données ; ``volumes`` complète ``DEFAULT_VOLUMES``.
+    Retourne le nombre de lignes créées par modèle.
+    """
+    from appEvenements.feed import expire_feed
+    from appEvenements.models import Evenement, Participation
+    from forums.forum.access import rebuild as rebuild_forum_access
+    from forums.forum.counters import reconcile as reconcile_forum_counters
+    from clubApp.models import Club as StudentClub
+    from forums.forum.models import Club as ForumClub, Forum, Post, Survey, SurveyOption, SurveyVote, Thread
+
+    from .models import Aid, Category, Club, Favorite, Resource
+
+    User = get_user_model()
+    volumes = {**DEFAULT_VOLUMES, **(volumes or {})}
+    rng = random.Random(seed)
+    now = timezone.now()
+    created = Counter()
+
+    with transaction.atomic():
+        # Utilisateurs : un seul hachage du mot de passe pour tout le jeu
+        hashed = make_password(password)
+        users = _bulk(User, [
+            User(
+                username=f"{prefix}_user_{index:06d}",
+                email=f"{prefix}_user_{index:06d}@example.com",
+                password=hashed,
+            )
+            for index in range(volumes["users"])
+        ])
+        users.append(User.objects.create(
+            username=f"{prefix}_admin", email=f"{prefix}_admin@example.com",
+            password=hashed, is_staff=True, is_superuser=True,
+        ))
+        created["users"] = len(users)
+
+        # Clubs : fiche du club, club des ressources, club et forum privé du forum
+        club_names = [f"{prefix} club {index:04d}" for index in range(volumes["clubs"])]
+        created["clubs"] = len(_bulk(StudentClub, [
+            StudentClub(name=name, description=_sentence(rng, 12), established_date=(now - timedelta(days=rng.randint(30, 3000))).date())
+            for name in club_names
+        ]))
+        resource_clubs = _bulk(Club, [Club(name=name, description=_sentence(rng, 12)) for name in club_names])
+        forum_clubs = _bulk(ForumClub, [
+            ForumClub(name=name, description=_sentence(rng, 12), responsible=rng.choice(users))
+            for name in club_names
+        ])
+        Membership = ForumClub.members.through
+        memberships = []
+        for club in forum_clubs:
+            members = rng.sample(users, _spread(rng, volumes["members_per_club"], len(users)))
+            memberships.extend(Membership(club_id=club.pk, user_id=user.pk) for user in members)
+        created["club_members"] = len(_bulk(Membership, memberships))
+
+        forums = _bulk(Forum, [
+            Forum(title=f"{prefix} forum public {index}", description=_sentence(rng), created_by=rng.choice(users))
+            for index in range(max(1, volumes["clubs"] // 4))
+        ])
+        forums += _bulk(Forum, [
+            Forum(title=f"{prefix} forum {club.name}", description=_sentence(rng), created_by=club.responsible,
+                  visibility="private", club=club)
+            for club in forum_clubs
+        ])
+        created["forums"] = len(forums)
+
+        # Événements et participations
+        events = []
+        for index in range(volumes["events"]):
+            start = now + timedelta(days=rng.randint(-90, 90), hours=rng.randint(8, 20))
+            events.append(Evenement(
+                titre=f"{prefix} evenement {index:05d}",
+                description=_sentence(rng, 15),
+                date_debut=start,
+                date_fin=start + timedelta(hours=rng.randint(1, 6)),
+                lieu=f"Salle {rng.randint(1, 300)}",
+                statut=rng.choice(["planifie", "planifie", "en_cours", "termine", "annule"]),
+                visibilite=rng.choice(["public", "public", "public", "prive"]),
+                max_participants=rng.choice([20, 50, 100, 200]),
+                featured=rng.random() < 0.05,
+            ))
+        events = _bulk(Evenement, events)
+        created["events"] = len(events)
+        participations = []
+        for event in events:
+            cap = min(len(users), event.max_participants)
+            members = rng.sample(users, _spread(rng, volumes["participants_per_event"], cap))
+            participations.extend(Participation(evenement_id=event.pk, user_id=user.pk) for user in members)
+            # bulk_create n'émet pas les signaux qui tiennent ce compteur à jour
+            event.participant_count = len(members)
+        Evenement.objects.bulk_update(events, ["participant_count"], batch_size=BATCH_SIZE)
+        created["participations"] = len(_bulk(Participation, participations))
+
+        # Sujets et messages
+        threads = _bulk(Thread, [
+            Thread(
+                forum=rng.choice(forums), title=f"{prefix} sujet {index:06d}", body=_sentence(rng, 30),
+                author=rng.choice(users), is_pinned=rng.random() < 0.02, is_closed=rng.random() < 0.05,
+            )
+            for index in range(volumes["threads"])
+        ])
+        created["threads"] = len(threads)
+        posts = []
+        for thread in threads:
+            for _ in range(_spread(rng, volumes["posts_per_thread"], 10 * volumes["posts_per_thread"])):
+                posts.append(Post(thread_id=thread.pk, content=_sentence(rng, 25), author=rng.choice(users)))
+        created["posts"] = len(_bulk(Post, posts))
+
+        # Sondages, options et votes
+        surveys = _bulk(Survey, [
+            Survey(forum=rng.choice(forums), title=f"{prefix} sondage {index:05d}", description=_sentence(rng),
+                   author=rng.choice(users))
+            for index in range(volumes["surveys"])
+        ])
+        created["surveys"] = len(surveys)
+        options = _bulk(SurveyOption, [
+            SurveyOption(survey_id=survey.pk, text=_sentence(rng, 3))
+            for survey in surveys
+            for _ in range(rng.randint(2, 6))
+        ])
+        options_by_survey = {}
+        for option in options:
+            options_by_survey.setdefault(option.survey_id, []).append(option)
+        votes = []
+        for survey in surveys:
+            for user in rng.sample(users, _spread(rng, volumes["votes_per_survey"], len(users))):
+                votes.append(SurveyVote(survey_id=survey.pk, option=rng.choice(options_by_survey[survey.pk]), user_id=user.pk))
+        created["votes"] = len(_bulk(SurveyVote, votes))
+
+        # Ressources, aides et favoris
+        categories = [
+            Category.objects.get_or_create(name=f"{prefix} {name}")[0]
+            for name in ("cours", "evenementiel", "financement", "materiel", "communication")
+        ]
+        resources = _bulk(Resource, [
+            Resource(
+                title=f"{prefix} ressource {index:05d} {rng.choice(WORDS)}", description=_sentence(rng, 20),
+                category=rng.choice(categories), club=rng.choice(resource_clubs + [None]),
+                submitted_by=rng.choice(users), is_validated=rng.random() < 0.8,
+            )
+            for index in range(volumes["resources"])
+        ])
+        aids = _bulk(Aid, [
+            Aid(
+                title=f"{prefix} aide {index:05d} {rng.choice(WORDS)}", description=_sentence(rng, 20),
+                category=rng.choice(categories), club=rng.choice(resource_clubs + [None]),
+                submitted_by=rng.choice(users), is_validated=rng.random() < 0.8,
+            )
+            for index in range(volumes["aids"])
+        ])
+        created["resources"] = len(resources)
+        created["aids"] = len(aids)
+        favorites = []
+        for user in users:
+            count = _spread(rng, volumes["favorites_per_user"], len(resources) + len(aids))
+            for target in rng.sample(resources + aids, count):
+                if isinstance(target, Resource):
+                    favorites.append(Favorite(user_id=user.pk, resource_id=target.pk))
+                else:
+                    favorites.append(Favorite(user_id=user.pk, aid_id=target.pk))
+        created["favorites"] = len(_bulk(Favorite, favorites))
+
+    # Les insertions groupées n'émettent pas les signaux qui invalident le calendrier
+    # et tiennent à jour les accès aux forums privés et les compteurs des sujets
+    expire_feed()
+    rebuild_forum_access()
+    reconcile_forum_counters()
+    return dict(created)
+
+
+def clear(prefix=DEFAULT_PREFIX):
+    """Supprime un jeu de données créé par ``generate``. Retourne le nombre de lignes supprimées."""
+    from appEvenements.feed import expire_feed
+    from appEvenements.models import Evenement
+    from clubApp.models import Club as StudentClub
+    from forums.forum.models import Club as ForumClub
+
+    from .models import Category, Club
+
+    deleted = 0
+    with transaction.atomic():
+        # Les utilisateurs emportent sujets, messages, sondages, ressources, aides et favoris
+        for queryset in (
+            get_user_model().objects.filter(username__startswith=f"{prefix}_"),
+            Evenement.objects.filter(titre__startswith=f"{prefix} "),
+            ForumClub.objects.filter(name__startswith=f"{prefix} "),
+            Club.objects.filter(name__startswith=f"{prefix} "),
+            StudentClub.objects.filter(name__startswith=f"{prefix} "),
+            Category.objects.filter(name__startswith=f"{prefix} "),
+        ):
+            deleted += queryset.delete()[0]
+    expire_feed()
+    return deleted
+
+
+def exists(prefix=DEFAULT_PREFIX):
+    return get_user_model().objects.filter(username__startswith=f"{prefix}_").exists()
@@ -0,0 +1,14 @@
+from django import template
+
+from resources import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail_url(field_file, size="small"):
+    """
+    URL de la miniature d'un fichier, ou chaîne vide si elle n'existe pas (encore) :
+    {% thumbnail_url resource.file "small" as thumb %}{% if thumb %}<img src="{{ thumb }}">{% endif %}
+    """
+    return thumbnails.thumbnail_url(field_file, size)
@@ -1,7 +1,63 @@
-from django.test import TestCase
-from django.contrib.auth.models import User
+import hashlib
+import importlib
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.contrib.auth import get_user_model
 from django.urls import reverse
-from .models import Resource, Aid, Category, Club, Favorite
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from . import (
+    benchmark, checks, exports, facets, favorites, global_search, jobs, moderation, querybudget, rollup, search, stats, storage,
+    synthetic, thumbnails, uploads,
+)
+from .pagination import CursorPaginator
+from .models import Resource, Aid, AidRequest, Category, Club, DailyStat, ExportJob, Favorite, StoredBlob, UploadSession
+from .views import ExportResourcesPDFView
+
+User = get_user_model()
+
+
+class ResourceFixtureMixin:
+    """
+    Données communes aux tests : un utilisateur et une catégorie.
+
+    La migration 0003 crée déjà les catégories par défaut (« Document »,
+    « Formation »...) et ``Category.name`` est unique : les catégories de test
+    portent d'autres noms et passent par ``get_category``.
+    """
+
+    username = 'testeur'
+    is_staff = False
+    category_name = "Catégorie de test"
+
+    def setUp(self):
+        """Configuration initiale pour les tests."""
+        super().setUp()
+        self.user = User.objects.create_user(username=self.username, password='testpass123', is_staff=self.is_staff)
+        self.category = self.get_category(self.category_name)
+
+    def get_category(self, name):
+        return Category.objects.get_or_create(name=name)[0]
+
+    def use_temporary_media(self):
+        """Fichiers écrits dans un MEDIA_ROOT temporaire, supprimé après le test."""
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=media_root.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
 
 
 class FavoriteModelTest(TestCase):
@@ -201,3 +257,1185 @@ class FavoriteViewsTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.context['favorites']), 1)
         self.assertIsNotNone(response.context['favorites'][0].aid)
+
+
+class SearchIndexTest(ResourceFixtureMixin, TestCase):
+    """Tests pour l'index de recherche plein texte."""
+
+    username = 'searcher'
+    category_name = "Ateliers"
+
+    def setUp(self):
+        """Configuration initiale pour les tests."""
+        super().setUp()
+        self.club = Club.objects.create(name="Club Robotique")
+        self.in_title = Resource.objects.create(
+            title="Atelier Python",
+            description="Introduction",
+            category=self.category,
+            submitted_by=self.user,
+            is_validated=True
+        )
+        self.in_description = Resource.objects.create(
+            title="Support de cours",
+            description="Exercices de programmation Python",
+            category=self.category,
+            club=self.club,
+            submitted_by=self.user,
+            is_validated=True
+        )
+        self.pending = Resource.objects.create(
+            title="Python avancé",
+            description="Brouillon",
+            category=self.category,
+            submitted_by=self.user,
+            is_validated=False
+        )
+
+    def test_title_matches_rank_first(self):
+        """Une correspondance dans le titre est mieux classée qu'une correspondance dans la description."""
+        results = list(search.search_queryset(Resource.objects.filter(is_validated=True), "python"))
+        self.assertEqual(results, [self.in_title, self.in_description])
+
+    def test_search_club_name_and_prefix(self):
+        """Le nom du club est indexé et les mots sont recherchés par préfixe."""
+        results = list(search.search_queryset(Resource.objects.all(), "robot"))
+        self.assertEqual(results, [self.in_description])
+
+    def test_index_follows_updates_and_deletes(self):
+        """L'index est mis à jour à l'enregistrement et à la suppression."""
+        self.in_title.title = "Atelier Django"
+        self.in_title.save()
+        self.assertIn(self.in_title, search.search_queryset(Resource.objects.all(), "django"))
+        self.in_title.delete()
+        self.assertFalse(search.search_queryset(Resource.objects.all(), "django").exists())
+
+    def test_club_rename_reindexes_objects(self):
+        """Renommer un club réindexe ses ressources."""
+        self.club.name = "Club Astronomie"
+        self.club.save()
+        results = list(search.search_queryset(Resource.objects.all(), "astronomie"))
+        self.assertEqual(results, [self.in_description])
+
+    def test_rebuild_index(self):
+        """La reconstruction en masse indexe toutes les lignes existantes."""
+        counts = search.rebuild_index()
+        self.assertEqual(counts[Resource], 3)
+        self.assertEqual(counts[Aid], 0)
+
+    def test_list_view_hides_unvalidated_matches(self):
+        """La liste filtre par validation avant de classer les résultats."""
+        self.client.login(username='searcher', password='testpass123')
+        response = self.client.get(reverse('resources:resource_list'), {'q': 'python'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['resources']), [self.in_title, self.in_description])
+
+    def test_punctuation_only_query(self):
+        """Une requête sans mot ne provoque pas d'erreur FTS5."""
+        results = search.search_queryset(Resource.objects.all(), '"*(')
+        self.assertEqual(results.count(), 3)
+
+
+@skipUnless(exports.is_available(), "ReportLab n'est pas installé")
+class ExportPDFTest(ResourceFixtureMixin, TestCase):
+    """Tests pour l'export PDF en streaming."""
+
+    username = 'exporter'
+    category_name = "Supports"
+
+    def setUp(self):
+        """Configuration initiale pour les tests."""
+        super().setUp()
+        for i in range(5):
+            Resource.objects.create(
+                title=f"Ressource {i}",
+                description="Ligne 1\nLigne <2>",
+                category=self.category,
+                submitted_by=self.user,
+                is_validated=True
+            )
+
+    def _get_pdf(self, **params):
+        # Export direct (synchrone) ; l'URL publique passe par la file d'exports
+        request = RequestFactory().get('/resources/export/', params)
+        request.user = self.user
+        response = ExportResourcesPDFView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        return b"".join(response.streaming_content)
+
+    def test_full_export_streams_pdf(self):
+        """L'export complet renvoie un PDF en streaming."""
+        self.assertTrue(self._get_pdf().startswith(b"%PDF"))
+
+    def test_table_only_export(self):
+        """Le mode tableau seul produit aussi un PDF valide."""
+        self.assertTrue(self._get_pdf(mode='table').startswith(b"%PDF"))
+
+    @override_settings(RESOURCES_EXPORT_MAX_ROWS=2)
+    def test_row_cap(self):
+        """Le nombre d'éléments parcourus est plafonné."""
+        export = exports.PDFExport(Resource.objects.all(), "Ressources", "ressources", "test")
+        export.total = Resource.objects.count()
+        self.assertEqual(len(list(export._iter_items())), 2)
+
+    def test_constant_query_count(self):
+        """Le comptage est fait une seule fois, quel que soit le nombre d'éléments."""
+        export = exports.PDFExport(
+            Resource.objects.select_related("category", "club", "submitted_by"),
+            "Ressources", "ressources", "test",
+        )
+        with tempfile.TemporaryFile() as output, self.assertNumQueries(3):
+            # COUNT, tableau récapitulatif, fiches détaillées
+            export.render(output)
+
+
+@skipUnless(exports.is_available(), "ReportLab n'est pas installé")
+class ExportJobTest(ResourceFixtureMixin, TestCase):
+    """Tests pour la file d'exports PDF et son cache."""
+
+    username = 'queued'
+    category_name = "Supports"
+
+    def setUp(self):
+        """Configuration initiale pour les tests."""
+        super().setUp()
+        self.use_temporary_media()
+        self.resource = Resource.objects.create(
+            title="Guide",
+            description="Description",
+            category=self.category,
+            submitted_by=self.user,
+            is_validated=True
+        )
+        self.client.login(username='queued', password='testpass123')
+        self.url = reverse('resources:export_resources_pdf')
+
+    def _enqueue(self):
+        return self.client.get(self.url, HTTP_ACCEPT='application/json')
+
+    def test_enqueue_returns_job_id(self):
+        """La requête met l'export en file et renvoie immédiatement l'identifiant."""
+        response = self._enqueue()
+        self.assertEqual(response.status_code, 202)
+        job = ExportJob.objects.get(pk=response.json()['job'])
+        self.assertEqual(job.status, ExportJob.STATUS_PENDING)
+        self.assertEqual(job.params['scope'], exports.SCOPE_VALIDATED)
+
+    def test_worker_renders_and_cache_is_reused(self):
+        """Le worker produit le PDF, puis un export identique est servi depuis le cache."""
+        job_id = self._enqueue().json()['job']
+        call_command('run_export_worker', '--once', stdout=StringIO())
+        job = ExportJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, ExportJob.STATUS_DONE)
+        self.assertTrue(job.file.name.startswith('exports/resources_'))
+
+        response = self._enqueue()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['job'], job_id)
+
+        download = self.client.get(response.json()['download_url'])
+        self.assertEqual(download.status_code, 200)
+        self.assertTrue(b"".join(download.streaming_content).startswith(b"%PDF"))
+
+    def test_data_change_invalidates_cache(self):
+        """Une nouvelle ressource ou une modification produit une nouvelle tâche."""
+        job_id = self._enqueue().json()['job']
+        call_command('run_export_worker', '--once', stdout=StringIO())
+
+        self.resource.title = "Guide mis à jour"
+        self.resource.save()
+        self.assertNotEqual(self._enqueue().json()['job'], job_id)
+
+    def test_missing_file_requeues_export(self):
+        """Un export dont le fichier a disparu est relancé au lieu de provoquer une erreur."""
+        job_id = self._enqueue().json()['job']
+        call_command('run_export_worker', '--once', stdout=StringIO())
+        job = ExportJob.objects.get(pk=job_id)
+        job.file.storage.delete(job.file.name)
+
+        response = self.client.get(reverse('resources:export_job_download', args=[job_id]))
+        retry = ExportJob.objects.exclude(pk=job_id).get()
+        self.assertRedirects(response, reverse('resources:export_job_status', args=[retry.pk]))
+        self.assertEqual(retry.status, ExportJob.STATUS_PENDING)
+
+    def test_purge_removes_expired_exports(self):
+        """La purge supprime les exports expirés et leurs fichiers, pas ceux encore valides."""
+        expired = ExportJob.objects.get(pk=self._enqueue().json()['job'])
+        call_command('run_export_worker', '--once', stdout=StringIO())
+        expired.refresh_from_db()
+        path = expired.file.path
+
+        Resource.objects.create(
+            title="Second guide", description="Description", category=self.category,
+            submitted_by=self.user, is_validated=True,
+        )
+        current = ExportJob.objects.get(pk=self._enqueue().json()['job'])
+        call_command('run_export_worker', '--once', stdout=StringIO())
+
+        self.assertEqual(jobs.purge_exports(), 0)
+        self.assertEqual(jobs.purge_exports(now=timezone.now() + jobs.EXPIRED_GRACE * 2), 1)
+        self.assertFalse(ExportJob.objects.filter(pk=expired.pk).exists())
+        self.assertTrue(ExportJob.objects.filter(pk=current.pk).exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_admin_scope_is_protected(self):
+        """Un export incluant les éléments non validés est réservé aux administrateurs."""
+        job = ExportJob.objects.create(
+            kind=ExportJob.KIND_RESOURCES,
+            params={'scope': exports.SCOPE_ALL},
+            cache_key='x',
+        )
+        response = self.client.get(reverse('resources:export_job_status', args=[job.pk]))
+        self.assertEqual(response.status_code, 403)
+
+
+class DashboardStatsTest(ResourceFixtureMixin, TestCase):
+    """Tests pour les statistiques du tableau de bord administrateur."""
+
+    username = 'stats'
+    category_name = "Ateliers"
+
+    def setUp(self):
+        """Configuration initiale pour les tests."""
+        super().setUp()
+        stats.clear_dashboard_stats()
+        self.busy = Club.objects.create(name="Club Robotique")
+        self.quiet = Club.objects.create(name="Club Théâtre")
+        for index in range(3):
+            Resource.objects.create(
+                title=f"Ressource {index}",
+                description="Description",
+                category=self.category,
+                club=self.busy,
+                submitted_by=self.user,
+            )
+        for index in range(2):
+            Aid.objects.create(
+                title=f"Aide {index}",
+                description="Description",
+                category=self.category,
+                club=self.busy,
+                submitted_by=self.user,
+            )
+        Aid.objects.create(
+            title="Aide théâtre",
+            description="Description",
+            category=self.category,
+            club=self.quiet,
+            submitted_by=self.user,
+        )
+
+    def test_counters_and_series(self):
+        """Les compteurs du mois et le dernier point de la série incluent les nouvelles soumissions."""
+        data = stats.compute_dashboard_stats()
+        self.assertEqual(data['resources_this_month'], 3)
+        self.assertEqual(data['aids_this_month'], 3)
+        self.assertEqual(len(data['months_data']), stats.MONTHS)
+        self.assertEqual(data['resources_by_month'][-1], 3)
+        self.assertEqual(data['aids_by_month'][-1], 3)
+
+    def test_top_clubs_are_not_multiplied(self):
+        """Les totaux par club ne sont pas gonflés par la double jointure."""
+        busy, quiet = stats.get_top_clubs()
+        self.assertEqual((busy, busy.total_resources, busy.total_aids, busy.total_activities), (self.busy, 3, 2, 5))
+        self.assertEqual((quiet, quiet.total_activities), (self.quiet, 1))
+
+    def test_constant_query_count_and_cache(self):
+        """Le calcul coûte un nombre fixe de requêtes, puis est servi depuis le cache."""
+        with self.assertNumQueries(6):
+            stats.get_dashboard_stats()
+        with self.assertNumQueries(0):
+            stats.get_dashboard_stats()
+
+
+class DailyStatRollupTest(ResourceFixtureMixin, TestCase):
+    """Tests pour les agrégats journaliers."""
+
+    username = 'rollup'
+    category_name = "Ateliers"
+
+    def setUp(self):
+        """Configuration initiale pour les tests."""
+        super().setUp()
+        self.club = Club.objects.create(name="Club Robotique")
+        self.today = timezone.localdate()
+
+    def _resource(self, **kwargs):
+        return Resource.objects.create(
+            title="Ressource",
+            description="Description",
+            category=self.category,
+            submitted_by=self.user,
+            **kwargs
+        )
+
+    def _buckets(self):
+        return sorted(
+            # Un seau vidé reste en base avec des compteurs nuls
+            DailyStat.objects.exclude(total=0, validated=0).values_list('kind', 'date', 'club_id', 'category_id', 'total', 'validated'),
+            key=repr,
+        )
+
+    def test_signals_match_backfill(self):
+        """Création, validation, changement de club et suppression donnent le même résultat qu'un recalcul."""
+        first = self._resource(club=self.club)
+        second = self._resource()
+        first.is_validated = True
+        first.save()
+        second.club = self.club
+        second.save()
+        self._resource(club=self.club).delete()
+        AidRequest.objects.create(type=AidRequest.TYPE_AID, description="Besoin", requested_by=self.user)
+
+        incremental = self._buckets()
+        rollup.rebuild()
+        self.assertEqual(incremental, self._buckets())
+        self.assertEqual(
+            rollup.range_totals(DailyStat.KIND_RESOURCE, self.today, self.today, club=self.club),
+            {'total': 2, 'validated': 1},
+        )
+
+    def test_daily_series_fills_empty_days(self):
+        """La série couvre chaque jour de la période, y compris sans soumission."""
+        self._resource(is_validated=True)
+        start = self.today - timedelta(days=2)
+        series = rollup.daily_series(DailyStat.KIND_RESOURCE, start, self.today)
+        self.assertEqual([point['total'] for point in series], [0, 0, 1])
+        self.assertEqual(series[-1]['validated'], 1)
+
+    def test_buckets_without_club_or_category_are_unique(self):
+        """Un seau sans club ni catégorie (toutes les demandes) ne peut pas être créé deux fois."""
+        bucket = (DailyStat.KIND_REQUEST, self.today, None, None)
+        rollup.apply_delta(bucket, 1)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            DailyStat.objects.create(kind=DailyStat.KIND_REQUEST, date=self.today)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            DailyStat.objects.bulk_create([
+                DailyStat(kind=DailyStat.KIND_RESOURCE, date=self.today, club=self.club),
+                DailyStat(kind=DailyStat.KIND_RESOURCE, date=self.today, club=self.club),
+            ])
+        rollup.apply_delta(bucket, 1, 1)
+        self.assertEqual(list(DailyStat.objects.values_list('total', 'validated')), [(2, 1)])
+
+    def test_club_deletion_moves_stats(self):
+        """Les agrégats d'un club supprimé passent sur le seau sans club."""
+        self._resource(club=self.club)
+        self.club.delete()
+        self.assertEqual(
+            list(DailyStat.objects.values_list('club_id', 'total')),
+            [(None, 1)],
+        )
+
+
+class FacetsTest(ResourceFixtureMixin, TestCase):
+    """Tests pour les facettes des listes de ressources."""
+
+    username = 'facets'
+    category_name = "Ateliers"
+
+    def setUp(self):
+        """Configuration initiale pour les tests."""
+        super().setUp()
+        self.materiel = self.get_category("Matériel")
+        self.club = Club.objects.create(name="Club Robotique")
+        for title, category, club, validated in (
+            ("Atelier soudure", self.category, self.club, True),
+            ("Atelier Python", self.category, None, True),
+            ("Kit Arduino", self.materiel, self.club, True),
+            ("Brouillon", self.materiel, self.club, False),
+        ):
+            Resource.objects.create(
+                title=title,
+                description="Description",
+                category=category,
+                club=club,
+                submitted_by=self.user,
+                is_validated=validated,
+            )
+
+    def test_counts_follow_scope_and_query(self):
+        """Les comptes portent sur les éléments visibles correspondant à la recherche."""
+        data = facets.get_facets(Resource)
+        self.assertEqual(
+            [(facet['name'], facet['count']) for facet in data['categories']],
+            [("Ateliers", 2), ("Matériel", 1)],
+        )
+        self.assertEqual([(facet['name'], facet['count']) for facet in data['clubs']], [("Club Robotique", 2)])
+
+        data = facets.get_facets(Resource, facets.SCOPE_ALL, "atelier")
+        self.assertEqual([(facet['name'], facet['count']) for facet in data['categories']], [("Ateliers", 2)])
+
+    def test_cached_until_write(self):
+        """Les facettes sont servies depuis le cache jusqu'à la prochaine écriture."""
+        facets.get_facets(Resource)
+        with self.assertNumQueries(0):
+            facets.get_facets(Resource)
+        Resource.objects.create(
+            title="Nouvelle ressource",
+            description="Description",
+            category=self.materiel,
+            submitted_by=self.user,
+            is_validated=True,
+        )
+        data = facets.get_facets(Resource)
+        self.assertEqual(data['categories'][1]['count'], 2)
+
+    def test_selected_values_are_kept(self):
+        """Une catégorie ou un club sélectionné reste dans la liste, même sans élément correspondant."""
+        empty = self.get_category("Vide")
+        data = facets.with_selected(facets.get_facets(Resource, facets.SCOPE_ALL, "soudure"), str(empty.pk), "abc")
+        self.assertEqual(
+            [(facet['name'], facet['count']) for facet in data['categories']],
+            [("Ateliers", 1), ("Vide", 0)],
+        )
+
+        self.client.login(username='facets', password='testpass123')
+        response = self.client.get(reverse('resources:resource_list'), {'q': 'kit', 'club': self.club.pk, 'category': empty.pk})
+        self.assertContains(response, f'<option value="{empty.pk}" selected>')
+        self.assertContains(response, f'<option value="{self.club.pk}" selected>')
+
+
+class CursorPaginationTest(ResourceFixtureMixin, TestCase):
+    """Tests pour la pagination par curseur."""
+
+    username = 'pager'
+    category_name = "Ateliers"
+
+    def setUp(self):
+        """Configuration initiale pour les tests."""
+        super().setUp()
+        self.resources = [
+            Resource.objects.create(
+                title=f"Ressource {index}",
+                description="Description",
+                category=self.category,
+                submitted_by=self.user,
+                is_validated=True,
+            )
+            for index in range(5)
+        ]
+        # Même date pour toutes : l'ordre repose alors sur la clé primaire
+        Resource.objects.update(date_submitted=timezone.now())
+        self.expected = sorted(self.resources, key=lambda resource: resource.pk, reverse=True)
+
+    def test_walk_forward_and_back(self):
+        """Les curseurs suivant et précédent parcourent la liste sans doublon ni oubli."""
+        paginator = CursorPaginator(Resource.objects.all(), 2, 'date_submitted')
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        third = paginator.page(second.next_cursor)
+        self.assertEqual(first.object_list + second.object_list + third.object_list, self.expected)
+        self.assertFalse(first.has_previous())
+        self.assertFalse(third.has_next())
+        self.assertIsNone(paginator.count)
+
+        back = paginator.page(third.previous_cursor)
+        self.assertEqual(back.object_list, second.object_list)
+        self.assertTrue(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Un curseur altéré est ignoré."""
+        paginator = CursorPaginator(Resource.objects.all(), 2, 'date_submitted')
+        self.assertEqual(paginator.page("invalide").object_list, self.expected[:2])
+
+    def test_list_view_uses_cursor(self):
+        """La liste des ressources est paginée par curseur, sans COUNT(*)."""
+        self.client.login(username='pager', password='testpass123')
+        for index in range(10):
+            Resource.objects.create(
+                title=f"Supplément {index}",
+                description="Description",
+                category=self.category,
+                submitted_by=self.user,
+                is_validated=True,
+            )
+        response = self.client.get(reverse('resources:resource_list'))
+        page = response.context['page_obj']
+        self.assertTrue(page.is_cursor)
+        self.assertEqual(len(page.object_list), 12)
+        response = self.client.get(reverse('resources:resource_list'), {'cursor': page.next_cursor})
+        self.assertEqual(len(response.context['page_obj'].object_list), 3)
+
+
+class FavoriteStateTest(ResourceFixtureMixin, TestCase):
+    """Tests pour l'état favori des listes et le cache des favoris."""
+
+    username = 'fan'
+    category_name = "Ateliers"
+
+    def setUp(self):
+        """Configuration initiale pour les tests."""
+        super().setUp()
+        cache.clear()
+        self.resources = [
+            Resource.objects.create(
+                title=f"Ressource {index}",
+                description="Description",
+                category=self.category,
+                submitted_by=self.user,
+                is_validated=True,
+            )
+            for index in range(3)
+        ]
+        Favorite.objects.create(user=self.user, resource=self.resources[1])
+
+    def test_annotation_without_extra_queries(self):
+        """L'état favori de toute la liste est calculé dans la requête principale."""
+        with self.assertNumQueries(1):
+            states = {
+                resource.pk: resource.is_favorite
+                for resource in favorites.annotate_is_favorite(Resource.objects.all(), self.user)
+            }
+        self.assertEqual(states, {resource.pk: resource == self.resources[1] for resource in self.resources})
+
+    def test_cached_ids_expire_on_commit(self):
+        """Le basculement invalide l'ensemble en cache, rechargé une fois à la lecture suivante."""
+        self.assertEqual(favorites.get_favorite_ids(self.user, Resource), {self.resources[1].pk})
+        self.client.login(username='fan', password='testpass123')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('resources:resource_favorite', args=[self.resources[0].pk]))
+            self.client.post(reverse('resources:resource_favorite', args=[self.resources[1].pk]))
+        with self.assertNumQueries(1):
+            self.assertEqual(favorites.get_favorite_ids(self.user, Resource), {self.resources[0].pk})
+        with self.assertNumQueries(0):
+            self.assertEqual(favorites.get_favorite_ids(self.user, Resource), {self.resources[0].pk})
+
+    def test_rollback_keeps_cached_ids(self):
+        """Un favori annulé avec sa transaction ne touche pas à l'ensemble en cache."""
+        self.assertEqual(favorites.get_favorite_ids(self.user, Resource), {self.resources[1].pk})
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Favorite.objects.create(user=self.user, resource=self.resources[2])
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        with self.assertNumQueries(0):
+            self.assertEqual(favorites.get_favorite_ids(self.user, Resource), {self.resources[1].pk})
+
+    def test_list_view_marks_favorites(self):
+        """La liste des ressources affiche l'étoile des favoris."""
+        self.client.login(username='fan', password='testpass123')
+        response = self.client.get(reverse('resources:resource_list'))
+        marked = [resource.pk for resource in response.context['resources'] if resource.is_favorite]
+        self.assertEqual(marked, [self.resources[1].pk])
+        self.assertContains(response, 'title="Dans vos favoris"', count=1)
+
+
+class BulkModerationTest(ResourceFixtureMixin, TestCase):
+    """Tests pour la modération en masse."""
+
+    username = 'moderator'
+    is_staff = True
+    category_name = "Ateliers"
+
+    def setUp(self):
+        """Configuration initiale pour les tests."""
+        super().setUp()
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.pending = [self._resource(f"Ressource {index}") for index in range(3)]
+        self.validated = self._resource("Déjà validée", is_validated=True)
+
+    def _resource(self, title, **kwargs):
+        return Resource.objects.create(
+            title=title,
+            description="Description",
+            category=self.category,
+            submitted_by=self.author,
+            **kwargs
+        )
+
+    def test_validate_ids_reports_outcomes(self):
+        """Chaque identifiant reçoit son issue et l'auteur une seule notification."""
+        from forums.forum.models import Notification
+
+        ids = [resource.pk for resource in self.pending] + [self.validated.pk, 999999]
+        with self.captureOnCommitCallbacks(execute=True):
+            result = moderation.moderate('resource', 'validate', ids=ids, actor=self.user)
+
+        self.assertEqual(result['updated'], 3)
+        self.assertEqual(result['outcomes'][self.validated.pk], moderation.OUTCOME_UNCHANGED)
+        self.assertEqual(result['outcomes'][999999], moderation.OUTCOME_NOT_FOUND)
+        self.assertEqual(Resource.objects.filter(is_validated=True).count(), 4)
+        notifications = Notification.objects.filter(recipient=self.author, notif_type='moderation')
+        self.assertEqual(notifications.count(), 1)
+        self.assertIn("3 de vos ressources", notifications.get().message)
+        self.assertEqual(notifications.get().url, reverse('resources:resource_list'))
+
+        # Les agrégats journaliers sont tenus à jour malgré update()
+        today = timezone.localdate()
+        self.assertEqual(rollup.range_totals(DailyStat.KIND_RESOURCE, today, today)['validated'], 4)
+
+    def test_query_count_does_not_grow_with_batch(self):
+        """Le nombre de requêtes ne dépend pas du nombre d'éléments validés."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as small:
+            moderation.moderate('resource', 'validate', ids=[self.pending[0].pk], notify=False)
+        more = [self._resource(f"Lot {index}").pk for index in range(20)]
+        with CaptureQueriesContext(connection) as large:
+            moderation.moderate('resource', 'validate', ids=more, notify=False)
+        self.assertEqual(len(small), len(large))
+
+    def test_reject_deletes_in_bulk(self):
+        """Le rejet supprime en un nombre fixe de requêtes et met à jour index, agrégats et favoris."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        Favorite.objects.create(user=self.author, resource=self.pending[0])
+        favorites.get_favorite_ids(self.author, Resource)
+        with CaptureQueriesContext(connection) as small, self.captureOnCommitCallbacks(execute=True):
+            result = moderation.moderate('resource', 'reject', ids=[self.pending[0].pk], notify=False)
+        self.assertEqual(result['updated'], 1)
+        self.assertFalse(Favorite.objects.exists())
+        self.assertEqual(favorites.get_favorite_ids(self.author, Resource), frozenset())
+
+        more = [self._resource(f"Lot {index}").pk for index in range(20)]
+        Favorite.objects.bulk_create([Favorite(user=self.user, resource_id=pk) for pk in more])
+        with CaptureQueriesContext(connection) as large:
+            moderation.moderate('resource', 'reject', ids=more, notify=False)
+        self.assertEqual(len(small), len(large))
+
+        remaining = {resource.pk for resource in self.pending[1:]} | {self.validated.pk}
+        self.assertEqual(set(Resource.objects.values_list('pk', flat=True)), remaining)
+        self.assertEqual(set(search.search_queryset(Resource.objects.all(), "Lot").values_list('pk', flat=True)), set())
+        today = timezone.localdate()
+        self.assertEqual(rollup.range_totals(DailyStat.KIND_RESOURCE, today, today), {'total': 3, 'validated': 1})
+
+    def test_bulk_delete_covers_every_relation(self):
+        """Une nouvelle clé étrangère vers Resource ou Aid doit être traitée par la suppression en masse."""
+        for model in (Resource, Aid):
+            relations = {(relation.related_model, relation.field.name) for relation in model._meta.related_objects}
+            self.assertLessEqual(relations, moderation.BULK_DELETE_RELATIONS)
+            self.assertTrue(moderation.can_delete_in_bulk(model))
+
+    def test_unknown_relation_falls_back_to_delete(self):
+        """Sans relations connues, le rejet passe par delete() et les signaux de chaque objet."""
+        Favorite.objects.create(user=self.author, resource=self.pending[0])
+        ids = [resource.pk for resource in self.pending[:2]]
+        with mock.patch.object(moderation, 'BULK_DELETE_RELATIONS', set()):
+            result = moderation.moderate('resource', 'reject', ids=ids, notify=False)
+        self.assertEqual(result['updated'], 2)
+        self.assertFalse(Resource.objects.filter(pk__in=ids).exists())
+        self.assertFalse(Favorite.objects.exists())
+        today = timezone.localdate()
+        self.assertEqual(rollup.range_totals(DailyStat.KIND_RESOURCE, today, today), {'total': 2, 'validated': 1})
+
+    def test_endpoint_with_filters(self):
+        """Le point d'accès applique des filtres et est réservé aux administrateurs."""
+        pending = AidRequest.objects.create(type=AidRequest.TYPE_AID, description="Besoin", requested_by=self.author)
+        url = reverse('resources:bulk_moderation')
+        body = json.dumps({'target': 'request', 'action': 'approve', 'filters': {'status': 'pending'}})
+
+        self.client.login(username='author', password='testpass123')
+        self.assertEqual(self.client.post(url, body, content_type='application/json').status_code, 403)
+
+        self.client.login(username='moderator', password='testpass123')
+        response = self.client.post(url, body, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['outcomes'], {str(pending.pk): 'updated'})
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, AidRequest.STATUS_APPROVED)
+
+        response = self.client.post(url, json.dumps({'target': 'request', 'action': 'validate', 'ids': [1]}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class ChunkedUploadTest(ResourceFixtureMixin, TestCase):
+    """Tests pour l'envoi de fichiers par morceaux."""
+
+    username = 'uploader'
+    is_staff = True
+    category_name = "Supports"
+
+    def setUp(self):
+        """Configuration initiale pour les tests."""
+        super().setUp()
+        self.use_temporary_media()
+        self.client.login(username='uploader', password='testpass123')
+        self.content = b"%PDF-1.4 " + bytes(range(256)) * 40
+        self.digest = hashlib.sha256(self.content).hexdigest()
+
+    def _start(self):
+        response = self.client.post(
+            reverse('resources:upload_session_create'),
+            json.dumps({'target': 'resource', 'filename': 'cours.pdf', 'size': len(self.content), 'sha256': self.digest}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def _put(self, session, start, end):
+        return self.client.put(
+            session['upload_url'],
+            self.content[start:end],
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f"bytes {start}-{end - 1}/{len(self.content)}",
+        )
+
+    def _upload(self):
+        session = self._start()
+        middle = len(self.content) // 2
+        self.assertEqual(self._put(session, 0, middle).json()['offset'], middle)
+        self.assertEqual(self._put(session, middle, len(self.content)).json()['offset'], len(self.content))
+        response = self.client.post(session['commit_url'], '{}', content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return UploadSession.objects.get(pk=session['id'])
+
+    def test_resume_and_commit(self):
+        """Un morceau hors séquence est refusé avec l'octet de reprise ; le fichier final est vérifié."""
+        session = self._start()
+        conflict = self._put(session, 100, 200)
+        self.assertEqual(conflict.status_code, 409)
+        self.assertEqual(conflict.json()['offset'], 0)
+
+        self._put(session, 0, 100)
+        self._put(session, 100, len(self.content))
+        response = self.client.post(session['commit_url'], '{}', content_type='application/json')
+        self.assertEqual(response.json()['sha256'], self.digest)
+
+        upload = UploadSession.objects.get(pk=session['id'])
+        self.assertEqual(upload.file, storage.blob_name(self.digest, 'cours.pdf'))
+        with default_storage.open(upload.file, 'rb') as stored:
+            self.assertEqual(stored.read(), self.content)
+        self.assertFalse(os.path.exists(uploads.part_path(upload)))
+
+    def test_identical_upload_is_deduplicated(self):
+        """Un second envoi identique réutilise le fichier déjà enregistré."""
+        first = self._upload()
+        second = self._upload()
+        self.assertEqual(first.file, second.file)
+
+    def test_form_attaches_upload(self):
+        """Le formulaire de création accepte l'identifiant d'un envoi terminé."""
+        upload = self._upload()
+        response = self.client.post(reverse('resources:resource_create'), {
+            'title': "Cours",
+            'description': "Support",
+            'category': self.category.pk,
+            'upload': str(upload.pk),
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Resource.objects.get(title="Cours").file.name, upload.file)
+
+
+class ContentAddressedStorageTest(ResourceFixtureMixin, TestCase):
+    """Tests pour le stockage dédupliqué des fichiers envoyés."""
+
+    username = 'blobs'
+    category_name = "Supports"
+
+    def setUp(self):
+        """Configuration initiale pour les tests."""
+        super().setUp()
+        self.use_temporary_media()
+
+    def _resource(self, title, content):
+        resource = Resource(title=title, description="Support", category=self.category, submitted_by=self.user)
+        resource.file.save("cours.pdf", ContentFile(content), save=False)
+        resource.save()
+        return resource
+
+    def _blob(self, name):
+        return StoredBlob.objects.get(name=name)
+
+    def test_identical_files_share_one_blob(self):
+        """Deux ressources au contenu identique désignent le même fichier, compté deux fois."""
+        first = self._resource("Cours A", b"meme contenu")
+        second = self._resource("Cours B", b"meme contenu")
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertTrue(storage.is_blob_name(first.file.name))
+        self.assertEqual(self._blob(first.file.name).ref_count, 2)
+        with default_storage.open(first.file.name) as stored:
+            self.assertEqual(stored.read(), b"meme contenu")
+
+        first.delete()
+        self.assertEqual(self._blob(second.file.name).ref_count, 1)
+
+    def test_replaced_file_releases_reference(self):
+        """Remplacer le fichier d'une ressource libère l'ancien."""
+        resource = self._resource("Cours", b"version 1")
+        old_name = resource.file.name
+        resource.file.save("cours.pdf", ContentFile(b"version 2"))
+        self.assertEqual(self._blob(old_name).ref_count, 0)
+        self.assertEqual(self._blob(resource.file.name).ref_count, 1)
+
+    def test_gc_removes_only_orphans(self):
+        """Le nettoyage supprime les fichiers non référencés après le délai de grâce."""
+        kept = self._resource("Cours", b"garde")
+        orphan = self._resource("Ancien", b"orphelin")
+        orphan_name = orphan.file.name
+        orphan.delete()
+        # Un compteur faussé (update() en masse) est corrigé par le recomptage
+        StoredBlob.objects.filter(name=kept.file.name).update(ref_count=0)
+
+        removed, _ = storage.collect_garbage(grace=timedelta(0), now=timezone.now() + timedelta(seconds=1))
+        self.assertEqual(removed, 1)
+        self.assertFalse(default_storage.exists(orphan_name))
+        self.assertFalse(StoredBlob.objects.filter(name=orphan_name).exists())
+        self.assertTrue(default_storage.exists(kept.file.name))
+        self.assertEqual(self._blob(kept.file.name).ref_count, 1)
+
+    def test_event_promotion_image_is_tracked(self):
+        """Les FileField des autres applications passent aussi par le stockage partagé."""
+        from appEvenements.models import Evenement
+
+        resource = self._resource("Affiche", b"image")
+        evenement = Evenement(
+            titre="Soiree du club",
+            description="Une soiree pour tous",
+            date_debut=timezone.now(),
+            date_fin=timezone.now() + timedelta(hours=2),
+            lieu="Amphi A",
+            statut='planifie',
+            visibilite='public',
+        )
+        evenement.promotion_image.save("affiche.pdf", ContentFile(b"image"))
+        self.assertEqual(evenement.promotion_image.name, resource.file.name)
+        self.assertEqual(self._blob(resource.file.name).ref_count, 2)
+
+
+class ProtectedDownloadTest(ResourceFixtureMixin, TestCase):
+    """Tests pour le téléchargement protégé des fichiers."""
+
+    username = 'lecteur'
+    category_name = "Supports"
+
+    def setUp(self):
+        """Configuration initiale pour les tests."""
+        super().setUp()
+        self.use_temporary_media()
+        self.content = b"0123456789abcdef"
+        self.resource = Resource(
+            title="Cours de maths",
+            description="Support",
+            category=self.category,
+            submitted_by=self.user,
+            is_validated=True,
+        )
+        self.resource.file.save("cours.pdf", ContentFile(self.content))
+        self.url = reverse('resources:resource_download', args=[self.resource.pk])
+        self.client.login(username='lecteur', password='testpass123')
+
+    def test_unvalidated_file_is_forbidden_to_members(self):
+        """Le fichier d'une ressource non validée est refusé aux membres."""
+        Resource.objects.filter(pk=self.resource.pk).update(is_validated=False)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_full_and_conditional_download(self):
+        """Téléchargement complet avec ETag, puis 304 si le client a déjà le fichier."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertIn('cours-de-maths.pdf', response['Content-Disposition'])
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_requests(self):
+        """Une plage d'octets est servie en 206 ; une plage hors fichier donne 416."""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=4-7')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 4-7/{len(self.content)}')
+        self.assertEqual(b"".join(response.streaming_content), b"4567")
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(b"".join(response.streaming_content), b"def")
+
+        # If-Range périmé : le fichier complet est renvoyé
+        response = self.client.get(self.url, HTTP_RANGE='bytes=4-7', HTTP_IF_RANGE='"ancien"')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-')
+        self.assertEqual(response.status_code, 416)
+
+    @override_settings(RESOURCES_SENDFILE_BACKEND='accel', RESOURCES_SENDFILE_URL_PREFIX='/internal/')
+    def test_transfer_is_delegated_to_front_server(self):
+        """Avec X-Accel-Redirect, Django ne renvoie aucun octet du fichier."""
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/internal/{self.resource.file.name}')
+        self.assertEqual(response.content, b"")
+
+
+@skipUnless(thumbnails.Image is not None, "Pillow n'est pas installé")
+@override_settings(RESOURCES_THUMBNAIL_WORKERS=0)
+class ThumbnailTest(ResourceFixtureMixin, TestCase):
+    """Tests pour les miniatures des fichiers envoyés."""
+
+    username = 'photos'
+    category_name = "Affiches"
+
+    def setUp(self):
+        """Configuration initiale pour les tests."""
+        super().setUp()
+        self.use_temporary_media()
+
+    def _png(self, size=(1200, 800)):
+        output = BytesIO()
+        thumbnails.Image.new("RGBA", size, (200, 30, 30, 255)).save(output, "PNG")
+        return output.getvalue()
+
+    def test_thumbnails_generated_after_save(self):
+        """Chaque taille est produite à côté de l'original, une fois la transaction validée."""
+        resource = Resource(title="Affiche", description="Grande image", category=self.category, submitted_by=self.user)
+        resource.file.save("affiche.png", ContentFile(self._png()), save=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            resource.save()
+
+        for size_name, box in thumbnails.get_sizes().items():
+            name = thumbnails.derivative_name(resource.file.name, size_name)
+            self.assertTrue(default_storage.exists(name))
+            with thumbnails.Image.open(default_storage.path(name)) as image:
+                self.assertLessEqual(image.width, box[0])
+                self.assertEqual(image.format, "JPEG")
+
+        rendered = Template('{% load thumbnails %}{% thumbnail_url resource.file "small" %}').render(
+            Context({'resource': resource})
+        )
+        self.assertTrue(rendered.endswith('.small.jpg'))
+
+    def test_unsupported_file_has_no_thumbnail(self):
+        """Pas de miniature pour un fichier qui n'est pas une image : la balise renvoie une chaîne vide."""
+        resource = Resource(title="Notes", description="Texte", category=self.category, submitted_by=self.user)
+        resource.file.save("notes.txt", ContentFile(b"texte"), save=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            resource.save()
+        self.assertEqual(thumbnails.thumbnail_url(resource.file), "")
+
+    @skipUnless(thumbnails.pypdfium2 is not None, "pypdfium2 n'est pas installé")
+    def test_pdf_first_page_preview(self):
+        """La première page d'un PDF donne un aperçu dans chaque taille."""
+        document = thumbnails.pypdfium2.PdfDocument.new()
+        document.new_page(595, 842)
+        output = BytesIO()
+        document.save(output)
+        document.close()
+        resource = Resource(title="Cours", description="Support", category=self.category, submitted_by=self.user)
+        resource.file.save("cours.pdf", ContentFile(output.getvalue()), save=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            resource.save()
+
+        for size_name, box in thumbnails.get_sizes().items():
+            name = thumbnails.derivative_name(resource.file.name, size_name)
+            with thumbnails.Image.open(default_storage.path(name)) as image:
+                self.assertLessEqual(image.height, box[1])
+
+    def test_missing_libraries_are_reported(self):
+        """La vérification de déploiement signale l'absence de pypdfium2."""
+        with mock.patch.object(thumbnails, "pypdfium2", None):
+            warnings = checks.check_thumbnail_libraries(None)
+        self.assertEqual([warning.id for warning in warnings], ["resources.W002"])
+        self.assertIn("pypdfium2", warnings[0].msg)
+
+
+class GlobalSearchTest(ResourceFixtureMixin, TestCase):
+    """Tests pour la recherche globale."""
+
+    username = 'membre'
+    category_name = "Ateliers"
+
+    def setUp(self):
+        """Configuration initiale pour les tests."""
+        from appEvenements.models import Evenement
+        from clubApp.models import Club as StudentClub
+        from forums.forum.models import Club as ForumClub, Forum, Post, Thread
+
+        super().setUp()
+        self.outsider = User.objects.create_user(username='externe', password='testpass123')
+        self.admin = User.objects.create_user(username='admin_search', password='testpass123', is_staff=True)
+        self.resource = Resource.objects.create(
+            title="Atelier robotique", description="Construire un robot", category=self.category,
+            submitted_by=self.user, is_validated=True,
+        )
+        self.pending = Resource.objects.create(
+            title="Brouillon robotique", description="Non relu", category=self.category, submitted_by=self.user,
+        )
+        self.event = Evenement.objects.create(
+            titre="Concours de robotique", description="Finale du concours annuel",
+            date_debut=timezone.now(), date_fin=timezone.now() + timedelta(hours=3),
+            lieu="Hall principal", statut='planifie', visibilite='public',
+        )
+        self.club = StudentClub.objects.create(
+            name="Club Robotique", description="Le club des roboticiens", established_date=timezone.now().date(),
+        )
+        forum_club = ForumClub.objects.create(name="Robotique", responsible=self.user)
+        public_forum = Forum.objects.create(title="General", description="Public", created_by=self.user)
+        private_forum = Forum.objects.create(
+            title="Bureau", description="Prive", created_by=self.user, club=forum_club, visibility='private',
+        )
+        self.public_thread = Thread.objects.create(
+            forum=public_forum, title="Aide robotique", body="Question moteur", author=self.user,
+        )
+        self.private_thread = Thread.objects.create(
+            forum=private_forum, title="Budget robotique", body="Confidentiel", author=self.user,
+        )
+        self.private_post = Post.objects.create(
+            thread=self.private_thread, content="Le budget robotique est vote", author=self.user,
+        )
+
+    def _found(self, user, **kwargs):
+        return {(result.kind, result.object.pk) for result in global_search.search("robotique", user, **kwargs)}
+
+    def test_results_merged_across_apps(self):
+        """Un même mot trouve des documents de toutes les applications."""
+        found = self._found(self.user)
+        self.assertIn(('resource', self.resource.pk), found)
+        self.assertIn(('event', self.event.pk), found)
+        self.assertIn(('club', self.club.pk), found)
+        self.assertIn(('thread', self.public_thread.pk), found)
+        self.assertIn(('post', self.private_post.pk), found)
+        self.assertEqual(self._found(self.user, kinds=['club']), {('club', self.club.pk)})
+
+    def test_permissions_are_applied(self):
+        """Brouillons réservés aux admins ; forums privés réservés à leurs membres."""
+        found = self._found(self.outsider)
+        self.assertNotIn(('resource', self.pending.pk), found)
+        self.assertNotIn(('thread', self.private_thread.pk), found)
+        self.assertNotIn(('post', self.private_post.pk), found)
+        self.assertIn(('resource', self.pending.pk), self._found(self.admin))
+
+    def test_index_follows_changes(self):
+        """Validation en masse, modification et suppression sont répercutées sur l'index."""
+        moderation.moderate('resource', moderation.ACTION_VALIDATE, ids=[self.pending.pk], notify=False)
+        self.assertIn(('resource', self.pending.pk), self._found(self.outsider))
+
+        self.event.titre = "Concours de cuisine"
+        self.event.save()
+        self.assertNotIn(('event', self.event.pk), self._found(self.user))
+
+        self.club.delete()
+        self.assertNotIn('club', {kind for kind, _ in self._found(self.user)})
+
+    def test_search_view(self):
+        """La vue renvoie les résultats en HTML ou en JSON."""
+        self.client.login(username='externe', password='testpass123')
+        response = self.client.get(reverse('resources:global_search'), {'q': 'robotique'})
+        self.assertContains(response, "Atelier robotique")
+        self.assertNotContains(response, "Budget robotique")
+
+        response = self.client.get(reverse('resources:global_search'), {'q': 'atelier', 'format': 'json'})
+        self.assertEqual([result['kind'] for result in response.json()['results']], ['resource'])
+
+    def test_migration_backfill_matches_indexers(self):
+        """La migration 0020 remplit l'index avec les mêmes documents que les indexeurs."""
+        backfill = importlib.import_module('resources.migrations.0020_global_search_backfill')
+
+        def indexed():
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT rowid, title, body, extra, restriction FROM {global_search.TABLE} ORDER BY rowid")
+                return cursor.fetchall()
+
+        expected = indexed()
+        self.assertEqual(len(expected), 7)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {global_search.TABLE}")
+
+        class SchemaEditor:
+            # L'éditeur de schéma SQLite refuse de s'ouvrir dans la transaction du test
+            def __init__(self):
+                self.connection = connection
+
+            def execute(self, sql):
+                with connection.cursor() as cursor:
+                    cursor.execute(sql)
+
+        backfill.fill_global_search_index(None, SchemaEditor())
+        self.assertEqual(indexed(), expected)
+        self.assertIn(('club', self.club.pk), self._found(self.user))
+
+
+class QueryBudgetTest(ResourceFixtureMixin, querybudget.QueryBudgetTestMixin, TestCase):
+    """Tests pour la mesure des requêtes par vue."""
+
+    username = 'mesure'
+    is_staff = True
+    category_name = "Ateliers"
+
+    def setUp(self):
+        """Configuration initiale pour les tests."""
+        super().setUp()
+        for index in range(15):
+            Resource.objects.create(
+                title=f"Ressource {index}", description="Contenu", category=self.category,
+                submitted_by=self.user, is_validated=True,
+            )
+        self.client.login(username='mesure', password='testpass123')
+
+    def test_fingerprint_ignores_parameters(self):
+        """Deux requêtes qui ne diffèrent que par leurs valeurs ont la même empreinte."""
+        self.assertEqual(
+            querybudget.fingerprint('SELECT * FROM t WHERE id IN (%s, %s) AND name = \'a\''),
+            querybudget.fingerprint('SELECT *  FROM t WHERE id IN (%s) AND name = \'b\''),
+        )
+
+    def test_list_view_within_budget(self):
+        """La liste des ressources respecte son budget et le signale en Server-Timing."""
+        response = self.client.get(reverse('resources:resource_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('db;dur=', response['Server-Timing'])
+
+    def test_budget_exceeded_and_logged(self):
+        """Un dépassement échoue en mode strict et les mesures sont écrites dans le journal JSONL."""
+        with tempfile.TemporaryDirectory() as directory:
+            log_path = os.path.join(directory, 'queries.jsonl')
+            with override_settings(RESOURCES_QUERY_BUDGET_LOG=log_path, RESOURCES_QUERY_BUDGET_DEFAULT=1):
+                with self.assertRaises(querybudget.QueryBudgetExceeded):
+                    self.client.get(reverse('resources:resource_detail', args=[Resource.objects.first().pk]))
+            with open(log_path, encoding='utf-8') as log:
+                report = json.loads(log.readline())
+        self.assertEqual(report['view'], 'resources.views.ResourceDetailView')
+        self.assertGreater(report['queries'], 1)
+
+    def test_assert_max_queries(self):
+        """assertMaxQueries compte les requêtes d'un bloc et liste les requêtes répétées."""
+        with self.assertRaisesRegex(AssertionError, 'budget de 2'):
+            with self.assertMaxQueries(2):
+                for resource in Resource.objects.all()[:5]:
+                    Resource.objects.get(pk=resource.pk)
+
+
+class BenchmarkTest(TestCase):
+    """Tests pour le jeu de données synthétique et les mesures de latence."""
+
+    VOLUMES = {
+        "users": 12, "clubs": 2, "members_per_club": 4, "events": 3, "participants_per_event": 4,
+        "threads": 3, "posts_per_thread": 3, "surveys": 2, "votes_per_survey": 4,
+        "resources": 4, "aids": 2, "favorites_per_user": 1,
+    }
+
+    def test_generate_and_clear(self):
+        """Le jeu est reproductible à graine égale et se supprime sans laisser de trace."""
+        created = synthetic.generate(self.VOLUMES, seed=3)
+        self.assertEqual(created["users"], 13)
+        self.assertEqual(created["resources"], 4)
+        self.assertTrue(synthetic.exists())
+        synthetic.clear()
+        self.assertFalse(synthetic.exists())
+        self.assertEqual(synthetic.generate(self.VOLUMES, seed=3), created)
+
+    def test_run_and_compare(self):
+        """Le rapport donne latence, requêtes et mémoire par page, et se compare à un rapport précédent."""
+        synthetic.generate(self.VOLUMES)
+        member = User.objects.get(username="bench_user_000000")
+        admin = User.objects.get(username="bench_admin")
+        report = benchmark.run(member, admin, names=["resource_list", "survey_detail"], repeat=3, warmup=0)
+        self.assertEqual(set(report["results"]), {"resource_list", "survey_detail"})
+        result = report["results"]["resource_list"]
+        self.assertEqual(result["status"], 200)
+        self.assertLessEqual(result["p50_ms"], result["p95_ms"])
+        self.assertGreater(result["queries"], 0)
+        json.dumps(report)
+
+        baseline = json.loads(json.dumps(report))
+        baseline["results"]["resource_list"]["queries"] = result["queries"] * 2
+        rows = {(name, metric): change for name, metric, _, _, change in benchmark.compare(baseline, report)}
+        self.assertEqual(rows[("resource_list", "queries")], -50.0)
+
+    def test_percentile(self):
+        """Interpolation linéaire entre rangs."""
+        self.assertEqual(benchmark.percentile([1, 2, 3, 4, 5], 50), 3)
+        self.assertEqual(benchmark.percentile([10, 20], 95), 19.5)
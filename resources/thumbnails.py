@@ -0,0 +1,235 @@
+"""
+Miniatures et aperçus des fichiers envoyés.
+
+Pour ``Resource.file``, ``Aid.file`` et ``Evenement.promotion_image``, une
+miniature JPEG est produite dans chaque taille de ``get_sizes()`` et enregistrée
+à côté de l'original :
+
+    cas/ab/cd/<sha256>.pdf  ->  cas/ab/cd/<sha256>.small.jpg, ...medium.jpg
+
+Les images passent par Pillow ; la première page des PDF est rendue par
+pypdfium2. Les deux paquets figurent dans requirements.txt ; s'il en manque
+un, la vérification de déploiement ``resources.W002`` le signale. Les autres
+fichiers n'ont pas de miniature.
+
+La génération est déclenchée après l'enregistrement de l'objet (une fois la
+transaction validée) et s'exécute dans un pool de processus local
+(``RESOURCES_THUMBNAIL_WORKERS``, 0 pour un calcul immédiat dans le processus
+courant). Les processus du pool ne touchent pas à la base : ils lisent un
+chemin et écrivent les miniatures. Les fichiers stockés par contenu étant
+partagés, leurs miniatures le sont aussi.
+
+Les gabarits utilisent la balise ``{% thumbnail_url %}`` (bibliothèque
+``thumbnails``), qui ne renvoie une URL que si la miniature existe déjà.
+"""
+import logging
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = {
+    "small": (160, 160),
+    "medium": (480, 480),
+}
+DEFAULT_WORKERS = 2
+JPEG_QUALITY = 80
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp"}
+PDF_EXTENSIONS = {".pdf"}
+
+# Champs de fichier dont on produit des miniatures
+THUMBNAIL_FIELDS = {
+    "resources.Resource": "file",
+    "resources.Aid": "file",
+    "appEvenements.Evenement": "promotion_image",
+}
+
+_executor = None
+_pending = set()
+
+
+def get_sizes():
+    return getattr(settings, "RESOURCES_THUMBNAIL_SIZES", DEFAULT_SIZES)
+
+
+def get_workers():
+    return getattr(settings, "RESOURCES_THUMBNAIL_WORKERS", DEFAULT_WORKERS)
+
+
+def is_supported(name):
+    extension = os.path.splitext(name or "")[1].lower()
+    if extension in IMAGE_EXTENSIONS:
+        return Image is not None
+    if extension in PDF_EXTENSIONS:
+        return Image is not None and pypdfium2 is not None
+    return False
+
+
+def derivative_name(name, size):
+    return f"{os.path.splitext(name)[0]}.{size}.jpg"
+
+
+# ============================================================
+# RENDU (exécuté dans les processus du pool)
+# ============================================================
+
+def _open_source(path, largest):
+    if os.path.splitext(path)[1].lower() in PDF_EXTENSIONS:
+        document = pypdfium2.PdfDocument(path)
+        try:
+            # Rendu au double du plus grand format demandé, sans dépasser 2x la page
+            page = document[0]
+            scale = min(2.0, 2 * largest / max(page.get_size()))
+            return page.render(scale=scale).to_pil()
+        finally:
+            document.close()
+    image = Image.open(path)
+    return ImageOps.exif_transpose(image)
+
+
+def render_derivatives(path, sizes):
+    """
+    Écrit une miniature JPEG par taille à côté de ``path``. ``sizes`` est un
+    dictionnaire ``{nom: (largeur, hauteur)}``. Retourne les chemins écrits.
+    """
+    source = _open_source(path, max(max(box) for box in sizes.values()))
+    if source.mode not in ("RGB", "L"):
+        background = Image.new("RGB", source.size, "white")
+        background.paste(source, mask=source.convert("RGBA").getchannel("A"))
+        source = background
+
+    written = []
+    root = os.path.splitext(path)[0]
+    for size_name, box in sizes.items():
+        rendition = source.copy()
+        rendition.thumbnail(box)
+        target = f"{root}.{size_name}.jpg"
+        # Écriture atomique : une page ne voit jamais une miniature à moitié écrite
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as output:
+                rendition.convert("RGB").save(output, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+            os.replace(tmp_path, target)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        written.append(target)
+    return written
+
+
+# ============================================================
+# PLANIFICATION
+# ============================================================
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # "spawn" : les processus ne partagent ni connexions ni verrous avec le serveur
+        _executor = ProcessPoolExecutor(
+            max_workers=get_workers(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def wait():
+    """Attend la fin des générations en cours (commande de rattrapage, arrêt du serveur)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+def missing_sizes(field_file):
+    storage = field_file.storage
+    return {
+        size_name: box
+        for size_name, box in get_sizes().items()
+        if not storage.exists(derivative_name(field_file.name, size_name))
+    }
+
+
+def _done(name, future):
+    _pending.discard(name)
+    error = future.exception()
+    if error is not None:
+        logger.warning("Miniatures de %s non générées : %s", name, error)
+
+
+def schedule(field_file):
+    """Génère les miniatures manquantes de ``field_file`` ; retourne False s'il n'y a rien à faire."""
+    if not field_file or not is_supported(field_file.name) or field_file.name in _pending:
+        return False
+    sizes = missing_sizes(field_file)
+    if not sizes:
+        return False
+    path = field_file.storage.path(field_file.name)
+    if not os.path.exists(path):
+        return False
+
+    if get_workers() <= 0:
+        try:
+            render_derivatives(path, sizes)
+        except Exception as error:
+            logger.warning("Miniatures de %s non générées : %s", field_file.name, error)
+            return False
+        return True
+
+    name = field_file.name
+    _pending.add(name)
+    future = _get_executor().submit(render_derivatives, path, sizes)
+    future.add_done_callback(lambda future: _done(name, future))
+    return True
+
+
+def delete_derivatives(storage, name):
+    """Supprime les miniatures d'un fichier (appelé par le stockage lors de sa suppression)."""
+    for size_name in get_sizes():
+        path = storage.path(derivative_name(name, size_name))
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def thumbnail_url(field_file, size="small"):
+    """URL de la miniature si elle existe déjà, sinon chaîne vide."""
+    if not field_file or size not in get_sizes():
+        return ""
+    derivative = derivative_name(field_file.name, size)
+    if not field_file.storage.exists(derivative):
+        return ""
+    return field_file.storage.url(derivative)
+
+
+def _schedule_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    field_name = THUMBNAIL_FIELDS[sender._meta.label]
+    if raw or (update_fields is not None and field_name not in update_fields):
+        return
+    field_file = getattr(instance, field_name)
+    if field_file and is_supported(field_file.name):
+        transaction.on_commit(lambda: schedule(field_file))
+
+
+def connect_signals():
+    for label in THUMBNAIL_FIELDS:
+        post_save.connect(
+            _schedule_on_save,
+            sender=apps.get_model(label),
+            dispatch_uid=f"resources.thumbnails:{label}",
+        )
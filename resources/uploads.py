@@ -0,0 +1,242 @@
+"""
+Envoi des fichiers de ressources et d'aides par morceaux, avec reprise.
+
+1. ``create_session`` ouvre une session (nom, taille, SHA-256 attendu facultatif) ;
+2. chaque morceau est envoyé par PUT avec un en-tête ``Content-Range`` et ajouté
+   au fichier partiel ``MEDIA_ROOT/uploads/partial/<id>.part``. Il doit commencer
+   exactement à l'octet ``received`` : après une coupure, le client relit l'état
+   de la session et reprend à cet octet ;
+3. ``finalize`` calcule le SHA-256 du fichier complet en le lisant par blocs,
+   le compare à l'empreinte annoncée et déplace le fichier partiel (sans copie)
+   sous le ``upload_to`` du champ ``file``. Si un envoi précédent a produit
+   un fichier identique, celui-ci est réutilisé et le fichier partiel supprimé.
+
+Les morceaux sont lus depuis la requête par blocs de 64 Kio : un envoi ne
+garde jamais le fichier entier en mémoire.
+"""
+import hashlib
+import os
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .models import Aid, Resource, UploadSession
+
+DEFAULT_MAX_SIZE = 2 * 1024 ** 3
+CHUNK_SIZE = 4 * 1024 ** 2
+MAX_CHUNK_SIZE = 16 * 1024 ** 2
+READ_BLOCK = 64 * 1024
+SESSION_TTL = timedelta(hours=24)
+
+TARGET_MODELS = {
+    UploadSession.TARGET_RESOURCE: Resource,
+    UploadSession.TARGET_AID: Aid,
+}
+
+_CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UploadError(Exception):
+    """Erreur d'envoi ; ``status`` est le code HTTP à renvoyer."""
+    status = 400
+
+
+class UploadConflict(UploadError):
+    """Le morceau ne commence pas à l'octet attendu : le client doit reprendre à ``offset``."""
+    status = 409
+
+    def __init__(self, offset):
+        super().__init__(f"Le morceau doit commencer à l'octet {offset}.")
+        self.offset = offset
+
+
+class _PartFile(File):
+    """Fichier partiel déplacé tel quel par FileSystemStorage au lieu d'être recopié."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def get_max_size():
+    return getattr(settings, "RESOURCES_UPLOAD_MAX_SIZE", DEFAULT_MAX_SIZE)
+
+
+def part_path(session):
+    return os.path.join(settings.MEDIA_ROOT, "uploads", "partial", f"{session.pk}.part")
+
+
+def _normalize_sha256(value):
+    value = (value or "").strip().lower()
+    if value and not _SHA256_RE.match(value):
+        raise UploadError("Empreinte SHA-256 invalide.")
+    return value
+
+
+def create_session(user, target, filename, size, sha256=""):
+    """Ouvre une session d'envoi et crée le fichier partiel vide."""
+    if target not in TARGET_MODELS:
+        raise UploadError("Destination inconnue.")
+    filename = get_valid_filename(os.path.basename(filename or ""))
+    if not filename:
+        raise UploadError("Nom de fichier invalide.")
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError("Taille invalide.")
+    if size <= 0 or size > get_max_size():
+        raise UploadError(f"La taille doit être comprise entre 1 et {get_max_size()} octets.")
+
+    session = UploadSession.objects.create(
+        user=user,
+        target=target,
+        filename=filename[:255],
+        size=size,
+        expected_sha256=_normalize_sha256(sha256),
+    )
+    path = part_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+    return session
+
+
+def parse_content_range(header):
+    """``bytes début-fin/total`` -> ``(début, longueur, total)``."""
+    match = _CONTENT_RANGE_RE.match((header or "").strip())
+    if not match:
+        raise UploadError("En-tête Content-Range manquant ou invalide.")
+    start, end, total = (int(group) for group in match.groups())
+    if end < start:
+        raise UploadError("Content-Range invalide.")
+    return start, end - start + 1, total
+
+
+def write_chunk(session, stream, content_range, chunk_sha256=""):
+    """
+    Ajoute un morceau au fichier partiel et retourne le nouvel octet de reprise.
+    ``chunk_sha256`` (facultatif) est vérifié au fil de la lecture.
+    """
+    if session.is_complete:
+        raise UploadError("Cet envoi est déjà terminé.")
+    start, length, total = parse_content_range(content_range)
+    if total != session.size or start + length > session.size:
+        raise UploadError("Le morceau dépasse la taille annoncée.")
+    if length > MAX_CHUNK_SIZE:
+        raise UploadError(f"Un morceau ne peut dépasser {MAX_CHUNK_SIZE} octets.")
+    if start != session.received:
+        raise UploadConflict(session.received)
+    chunk_sha256 = _normalize_sha256(chunk_sha256)
+
+    digest = hashlib.sha256()
+    written = 0
+    with open(part_path(session), "r+b") as part:
+        part.seek(start)
+        while written < length:
+            block = stream.read(min(READ_BLOCK, length - written))
+            if not block:
+                break
+            part.write(block)
+            digest.update(block)
+            written += len(block)
+        if written != length or (chunk_sha256 and digest.hexdigest() != chunk_sha256):
+            # Morceau incomplet ou corrompu : on revient à l'octet de reprise
+            part.truncate(start)
+            raise UploadError("Morceau incomplet ou empreinte du morceau invalide.")
+        part.truncate()
+
+    updated = UploadSession.objects.filter(pk=session.pk, received=start).update(
+        received=start + length,
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        session.refresh_from_db()
+        raise UploadConflict(session.received)
+    session.received = start + length
+    return session.received
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as part:
+        for block in iter(lambda: part.read(READ_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _find_duplicate(session, digest):
+    """Fichier déjà enregistré par un envoi précédent au contenu identique."""
+    previous = (
+        UploadSession.objects
+        .filter(status=UploadSession.STATUS_COMPLETE, sha256=digest)
+        .exclude(file="")
+        .exclude(pk=session.pk)
+        .values_list("file", flat=True)
+    )
+    for name in previous:
+        if default_storage.exists(name):
+            return name
+    return None
+
+
+def finalize(session):
+    """Termine l'envoi : vérifie l'intégrité et place le fichier sous MEDIA_ROOT."""
+    if session.is_complete:
+        return session
+    if session.received != session.size:
+        raise UploadError(f"Envoi incomplet : {session.received}/{session.size} octets reçus.")
+
+    path = part_path(session)
+    digest = _file_sha256(path)
+    if session.expected_sha256 and digest != session.expected_sha256:
+        raise UploadError("L'empreinte SHA-256 du fichier ne correspond pas.")
+
+    name = _find_duplicate(session, digest)
+    if name is not None:
+        os.remove(path)
+    else:
+        field = TARGET_MODELS[session.target]._meta.get_field("file")
+        target_name = field.generate_filename(None, session.filename)
+        with open(path, "rb") as part:
+            part_file = _PartFile(part)
+            # Empreinte déjà calculée : le stockage adressé par contenu ne relit pas le fichier
+            part_file.sha256 = digest
+            name = default_storage.save(target_name, part_file)
+        if os.path.exists(path):
+            # Stockage sans déplacement direct : le contenu a été recopié
+            os.remove(path)
+
+    session.sha256 = digest
+    session.file = name
+    session.status = UploadSession.STATUS_COMPLETE
+    session.save(update_fields=["sha256", "file", "status", "updated_at"])
+    return session
+
+
+def attach(session, obj):
+    """Associe le fichier d'un envoi terminé au champ ``file`` de la ressource ou de l'aide."""
+    if not session.is_complete:
+        raise UploadError("L'envoi n'est pas terminé.")
+    if not isinstance(obj, TARGET_MODELS[session.target]):
+        raise UploadError("Cet envoi n'est pas destiné à ce type d'objet.")
+    obj.file.name = session.file
+    obj.save()
+    return obj
+
+
+def purge_expired(now=None):
+    """Supprime les envois inachevés abandonnés depuis plus de ``SESSION_TTL``."""
+    now = now or timezone.now()
+    stale = UploadSession.objects.filter(status=UploadSession.STATUS_UPLOADING, updated_at__lt=now - SESSION_TTL)
+    count = 0
+    for session in stale:
+        path = part_path(session)
+        if os.path.exists(path):
+            os.remove(path)
+        session.delete()
+        count += 1
+    return count
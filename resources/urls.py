@@ -14,6 +14,7 @@ urlpatterns = [
     path("resources/export-pdf/", views.export_resources_pdf, name="export_resources_pdf"),
     path("resources/<int:pk>/favorite/", views.toggle_favorite_resource, name="resource_favorite"),
     path("resources/<int:pk>/", views.ResourceDetailView.as_view(), name="resource_detail"),
+    path("resources/<int:pk>/download/", views.resource_download, name="resource_download"),
     path("resources/<int:pk>/edit/", views.ResourceUpdateView.as_view(), name="resource_update"),
     path("resources/<int:pk>/delete/", views.ResourceDeleteView.as_view(), name="resource_delete"),
     path("resources/<int:pk>/validate/", views.ResourceValidateView.as_view(), name="resource_validate"),
@@ -26,6 +27,7 @@ urlpatterns = [
     path("aids/export-pdf/", views.export_aids_pdf, name="export_aids_pdf"),
     path("aids/<int:pk>/favorite/", views.toggle_favorite_aid, name="aid_favorite"),
     path("aids/<int:pk>/", views.AidDetailView.as_view(), name="aid_detail"),
+    path("aids/<int:pk>/download/", views.aid_download, name="aid_download"),
     path("aids/<int:pk>/edit/", views.AidUpdateView.as_view(), name="aid_update"),
     path("aids/<int:pk>/delete/", views.AidDeleteView.as_view(), name="aid_delete"),
     path("aids/<int:pk>/validate/", views.AidValidateView.as_view(), name="aid_validate"),
@@ -38,6 +40,24 @@ urlpatterns = [
     path("requests/<int:pk>/approve/", views.RequestApproveView.as_view(), name="request_approve"),
     path("requests/<int:pk>/reject/", views.RequestRejectView.as_view(), name="request_reject"),
 
+    # Modération en masse
+    path("moderation/bulk/", views.BulkModerationView.as_view(), name="bulk_moderation"),
+
+    # Exports PDF en arrière-plan
+    path("exports/<int:pk>/", views.export_job_status, name="export_job_status"),
+    path("exports/<int:pk>/download/", views.export_job_download, name="export_job_download"),
+
+    # Statistiques journalières (graphiques)
+    path("stats/daily/", views.daily_stats_api, name="daily_stats_api"),
+
+    # Envoi de fichiers par morceaux
+    path("uploads/", views.upload_session_create, name="upload_session_create"),
+    path("uploads/<uuid:pk>/", views.upload_session_detail, name="upload_session_detail"),
+    path("uploads/<uuid:pk>/commit/", views.upload_session_commit, name="upload_session_commit"),
+
+    # Recherche globale
+    path("search/", views.global_search_view, name="global_search"),
+
     # Favorites
     path("favorites/", views.FavoriteListView.as_view(), name="favorites_list"),
 
@@ -1,9 +1,10 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.exceptions import PermissionDenied
+from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
+from django.contrib.auth.views import redirect_to_login
 from django.shortcuts import redirect, get_object_or_404, render
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.db import models
 from django.views.generic import (
     CreateView,
@@ -14,24 +15,16 @@ from django.views.generic import (
     View,
 )
 from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, JsonResponse
 from django.utils import timezone
-from datetime import timedelta, datetime
-import calendar
-from django.db.models import Count
-from django.http import HttpResponse
-try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch
-    from reportlab.lib import colors
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-    from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
-except ImportError:
-    A4 = None
-from io import BytesIO
+from datetime import date, timedelta
+import json
 
+from . import downloads, exports, facets, favorites, global_search, jobs, moderation, rollup, stats, uploads
 from .forms import AidForm, AidRequestForm, ResourceForm
-from .models import Aid, AidRequest, Category, Club, Resource, FAQ, Favorite
+from .models import Aid, AidRequest, DailyStat, ExportJob, Resource, FAQ, Favorite, UploadSession
+from .pagination import CursorPaginationMixin
+from .search import search_queryset
 
 
 def is_admin(user):
@@ -39,6 +32,11 @@ def is_admin(user):
     return user.is_authenticated and user.is_staff
 
 
+def get_facet_scope(user):
+    """Les administrateurs voient aussi les éléments non validés dans les listes."""
+    return facets.SCOPE_ALL if is_admin(user) else facets.SCOPE_VALIDATED
+
+
 def is_organizer(user):
     """Vérifie si l'utilisateur est un organisateur."""
     if not user.is_authenticated:
@@ -57,6 +55,15 @@ class AdminRequiredMixin(LoginRequiredMixin):
         return super().dispatch(request, *args, **kwargs)
 
 
+class FormUserMixin:
+    """Transmet l'utilisateur connecté au formulaire (fichiers envoyés par morceaux)."""
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs["user"] = self.request.user
+        return kwargs
+
+
 class OrganizerRequiredMixin(LoginRequiredMixin):
     """Vérifie que l'utilisateur est un organisateur ou un administrateur."""
 
@@ -72,26 +79,24 @@ class OrganizerRequiredMixin(LoginRequiredMixin):
 # RESOURCE VIEWS
 # ============================================================================
 
-class ResourceListView(LoginRequiredMixin, ListView):
+class ResourceListView(CursorPaginationMixin, LoginRequiredMixin, ListView):
     """Liste des ressources - accessible à tous les utilisateurs connectés."""
     model = Resource
     template_name = "resources/resource_list.html"
     context_object_name = "resources"
     paginate_by = 12
+    # Indépendant du nombre de ressources affichées
+    query_budget = 12
 
     def get_queryset(self):
         """Affiche uniquement les ressources validées pour les membres, toutes pour les admins."""
         queryset = Resource.objects.select_related("category", "club", "submitted_by")
+        queryset = favorites.annotate_is_favorite(queryset, self.request.user)
         
         # Filtrer par validation
         if not is_admin(self.request.user):
             queryset = queryset.filter(is_validated=True)
         
-        # Recherche par titre (q)
-        search_query = self.request.GET.get('q', '').strip()
-        if search_query:
-            queryset = queryset.filter(title__icontains=search_query)
-        
         # Filtre par catégorie
         category_filter = self.request.GET.get('category', '')
         if category_filter:
@@ -102,17 +107,25 @@ class ResourceListView(LoginRequiredMixin, ListView):
         if club_filter:
             queryset = queryset.filter(club_id=club_filter)
         
+        # Recherche plein texte (q), classée par pertinence
+        search_query = self.request.GET.get('q', '').strip()
+        if search_query:
+            return search_queryset(queryset, search_query)
+        
         return queryset.order_by('-date_submitted')
     
     def get_context_data(self, **kwargs):
-        """Ajoute les catégories, clubs et les paramètres de recherche au contexte."""
+        """Ajoute les facettes (catégories, clubs) et les paramètres de recherche au contexte."""
         context = super().get_context_data(**kwargs)
         
-        # Liste des catégories pour le filtre
-        context['categories'] = Category.objects.all().order_by('name')
-        
-        # Liste des clubs pour le filtre
-        context['clubs'] = Club.objects.all().order_by('name')
+        # Catégories et clubs avec leur nombre de ressources (facettes en cache)
+        sidebar = facets.with_selected(
+            facets.get_facets(Resource, get_facet_scope(self.request.user), self.request.GET.get('q', '')),
+            self.request.GET.get('category'),
+            self.request.GET.get('club'),
+        )
+        context['categories'] = sidebar['categories']
+        context['clubs'] = sidebar['clubs']
         
         # Paramètres de recherche pour pré-remplir le formulaire
         context['search_query'] = self.request.GET.get('q', '')
@@ -139,17 +152,11 @@ class ResourceDetailView(LoginRequiredMixin, DetailView):
     def get_context_data(self, **kwargs):
         """Ajoute l'information si la ressource est en favori."""
         context = super().get_context_data(**kwargs)
-        if self.request.user.is_authenticated:
-            context['is_favorite'] = Favorite.objects.filter(
-                user=self.request.user,
-                resource=self.object
-            ).exists()
-        else:
-            context['is_favorite'] = False
+        context['is_favorite'] = favorites.is_favorite(self.request.user, self.object)
         return context
 
 
-class ResourceCreateView(OrganizerRequiredMixin, CreateView):
+class ResourceCreateView(FormUserMixin, OrganizerRequiredMixin, CreateView):
     """Création d'une ressource - pour les organisateurs et admins."""
     model = Resource
     form_class = ResourceForm
@@ -172,7 +179,7 @@ class ResourceCreateView(OrganizerRequiredMixin, CreateView):
         return response
 
 
-class ResourceUpdateView(AdminRequiredMixin, UpdateView):
+class ResourceUpdateView(FormUserMixin, AdminRequiredMixin, UpdateView):
     """Modification d'une ressource - uniquement pour les administrateurs."""
     model = Resource
     form_class = ResourceForm
@@ -232,26 +239,23 @@ class ResourceRejectView(AdminRequiredMixin, DeleteView):
 # AID VIEWS
 # ============================================================================
 
-class AidListView(LoginRequiredMixin, ListView):
+class AidListView(CursorPaginationMixin, LoginRequiredMixin, ListView):
     """Liste des aides - accessible à tous les utilisateurs connectés."""
     model = Aid
     template_name = "resources/aid_list.html"
     context_object_name = "aids"
     paginate_by = 12
+    query_budget = 12
 
     def get_queryset(self):
         """Affiche uniquement les aides validées pour les membres, toutes pour les admins."""
         queryset = Aid.objects.select_related("category", "club", "submitted_by")
+        queryset = favorites.annotate_is_favorite(queryset, self.request.user)
         
         # Filtrer par validation
         if not is_admin(self.request.user):
             queryset = queryset.filter(is_validated=True)
         
-        # Recherche par titre (q)
-        search_query = self.request.GET.get('q', '').strip()
-        if search_query:
-            queryset = queryset.filter(title__icontains=search_query)
-        
         # Filtre par catégorie
         category_filter = self.request.GET.get('category', '')
         if category_filter:
@@ -262,17 +266,25 @@ class AidListView(LoginRequiredMixin, ListView):
         if club_filter:
             queryset = queryset.filter(club_id=club_filter)
         
+        # Recherche plein texte (q), classée par pertinence
+        search_query = self.request.GET.get('q', '').strip()
+        if search_query:
+            return search_queryset(queryset, search_query)
+        
         return queryset.order_by('-date_submitted')
     
     def get_context_data(self, **kwargs):
-        """Ajoute les catégories, clubs et les paramètres de recherche au contexte."""
+        """Ajoute les facettes (catégories, clubs) et les paramètres de recherche au contexte."""
         context = super().get_context_data(**kwargs)
         
-        # Liste des catégories pour le filtre
-        context['categories'] = Category.objects.all().order_by('name')
-        
-        # Liste des clubs pour le filtre
-        context['clubs'] = Club.objects.all().order_by('name')
+        # Catégories et clubs avec leur nombre d'aides (facettes en cache)
+        sidebar = facets.with_selected(
+            facets.get_facets(Aid, get_facet_scope(self.request.user), self.request.GET.get('q', '')),
+            self.request.GET.get('category'),
+            self.request.GET.get('club'),
+        )
+        context['categories'] = sidebar['categories']
+        context['clubs'] = sidebar['clubs']
         
         # Paramètres de recherche pour pré-remplir le formulaire
         context['search_query'] = self.request.GET.get('q', '')
@@ -299,17 +311,11 @@ class AidDetailView(LoginRequiredMixin, DetailView):
     def get_context_data(self, **kwargs):
         """Ajoute l'information si l'aide est en favori."""
         context = super().get_context_data(**kwargs)
-        if self.request.user.is_authenticated:
-            context['is_favorite'] = Favorite.objects.filter(
-                user=self.request.user,
-                aid=self.object
-            ).exists()
-        else:
-            context['is_favorite'] = False
+        context['is_favorite'] = favorites.is_favorite(self.request.user, self.object)
         return context
 
 
-class AidCreateView(OrganizerRequiredMixin, CreateView):
+class AidCreateView(FormUserMixin, OrganizerRequiredMixin, CreateView):
     """Création d'une aide - pour les organisateurs et admins."""
     model = Aid
     form_class = AidForm
@@ -331,7 +337,7 @@ class AidCreateView(OrganizerRequiredMixin, CreateView):
         return response
 
 
-class AidUpdateView(AdminRequiredMixin, UpdateView):
+class AidUpdateView(FormUserMixin, AdminRequiredMixin, UpdateView):
     """Modification d'une aide - uniquement pour les administrateurs."""
     model = Aid
     form_class = AidForm
@@ -451,6 +457,49 @@ class RequestRejectView(AdminRequiredMixin, View):
         return redirect('resources:aidrequest_list')
 
 
+class BulkModerationView(AdminRequiredMixin, View):
+    """
+    Modération en masse : valide, approuve ou rejette des ressources, aides ou
+    demandes désignées par identifiants ou par filtres.
+
+    Corps JSON : {"target": "resource"|"aid"|"request", "action": "validate"|"approve"|"reject",
+    "ids": [...], "filters": {...}}. Un formulaire classique (target, action, ids) est aussi accepté.
+    """
+
+    def post(self, request):
+        if request.content_type == "application/json":
+            try:
+                payload = json.loads(request.body or b"{}")
+            except ValueError:
+                return JsonResponse({"error": "JSON invalide."}, status=400)
+            if not isinstance(payload, dict) or not isinstance(payload.get("filters") or {}, dict):
+                return JsonResponse({"error": "Requête invalide."}, status=400)
+        else:
+            payload = {
+                "target": request.POST.get("target"),
+                "action": request.POST.get("action"),
+                "ids": request.POST.getlist("ids"),
+            }
+
+        try:
+            result = moderation.moderate(
+                payload.get("target"),
+                payload.get("action"),
+                ids=payload.get("ids"),
+                filters=payload.get("filters"),
+                actor=request.user,
+            )
+        except moderation.ModerationError as error:
+            return JsonResponse({"error": str(error)}, status=400)
+
+        return JsonResponse({
+            "target": payload["target"],
+            "action": payload["action"],
+            "updated": result["updated"],
+            "outcomes": {str(pk): outcome for pk, outcome in result["outcomes"].items()},
+        })
+
+
 def home(request):
     faqs = FAQ.objects.all()
     return render(request, 'home.html', {'faqs': faqs})
@@ -464,460 +513,310 @@ class ExportResourcesPDFView(LoginRequiredMixin, View):
     """
     Vue pour exporter les ressources en PDF.
     Génère un PDF professionnel avec toutes les ressources validées (ou toutes si admin).
+    Le PDF est produit par lots et renvoyé en streaming ; ``?mode=table`` limite
+    l'export au tableau récapitulatif.
     """
     
     def get(self, request):
         """Génère et retourne le PDF des ressources."""
-        # Récupérer les ressources selon les mêmes règles que ResourceListView
-        queryset = Resource.objects.select_related("category", "club", "submitted_by")
-        
-        # Filtrer par validation (même logique que ResourceListView)
-        if not is_admin(request.user):
-            queryset = queryset.filter(is_validated=True)
-        
-        # Appliquer les mêmes filtres que la liste si présents
-        search_query = request.GET.get('q', '').strip()
-        if search_query:
-            queryset = queryset.filter(title__icontains=search_query)
-        
-        category_filter = request.GET.get('category', '')
-        if category_filter:
-            queryset = queryset.filter(category_id=category_filter)
-        
-        club_filter = request.GET.get('club', '')
-        if club_filter:
-            queryset = queryset.filter(club_id=club_filter)
-        
-        resources = queryset.order_by('-date_submitted')
-        
-        # Créer le buffer pour le PDF
-        buffer = BytesIO()
-        
-        # Créer le document PDF
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
-        # Conteneur pour les éléments du PDF
-        elements = []
-        
-        # Styles
-        styles = getSampleStyleSheet()
-        
-        # Style personnalisé pour le titre
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#7c3aed'),
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        )
-        
-        # Style pour les sous-titres
-        subtitle_style = ParagraphStyle(
-            'CustomSubtitle',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#5b21b6'),
-            spaceAfter=12,
-            spaceBefore=20,
-            fontName='Helvetica-Bold'
-        )
-        
-        # Style pour le texte normal
-        normal_style = styles['Normal']
-        normal_style.fontSize = 10
-        normal_style.leading = 14
-        
-        # Style pour les métadonnées
-        meta_style = ParagraphStyle(
-            'Meta',
-            parent=styles['Normal'],
-            fontSize=9,
-            textColor=colors.HexColor('#64748b'),
-            spaceAfter=10
+        if not exports.is_available():
+            messages.error(request, "L'export PDF nécessite ReportLab.")
+            return redirect('resources:resource_list')
+        
+        # Mêmes règles de validation et mêmes filtres que la liste
+        params = exports.get_export_params(request)
+        export = exports.PDFExport(
+            exports.get_export_queryset(Resource, params),
+            title="Ressources",
+            item_label="ressources",
+            filename_prefix="ressources_export",
+            mode=params['mode'],
         )
-        
-        # En-tête
-        title = Paragraph("Ressources", title_style)
-        elements.append(title)
-        
-        # Date d'export
-        export_date = timezone.now().strftime("%d/%m/%Y à %H:%M")
-        date_text = Paragraph(f"<i>Export généré le {export_date}</i>", meta_style)
-        elements.append(date_text)
-        elements.append(Spacer(1, 0.3*inch))
-        
-        # Informations sur le nombre de ressources
-        count_text = Paragraph(
-            f"<b>Nombre total de ressources : {resources.count()}</b>",
-            normal_style
-        )
-        elements.append(count_text)
-        elements.append(Spacer(1, 0.2*inch))
-        
-        # Tableau récapitulatif (optionnel - peut être commenté si trop long)
-        if resources.count() <= 50:  # Afficher le tableau seulement si moins de 50 ressources
-            # En-tête du tableau
-            table_data = [['Titre', 'Catégorie', 'Club', 'Auteur', 'Date']]
-            
-            # Données du tableau
-            for resource in resources[:50]:  # Limiter à 50 pour éviter les PDF trop longs
-                club_name = resource.club.name if resource.club else "N/A"
-                author_name = resource.submitted_by.get_full_name() or resource.submitted_by.username
-                date_str = resource.date_submitted.strftime("%d/%m/%Y")
-                
-                # Tronquer le titre si trop long
-                title_short = resource.title[:40] + "..." if len(resource.title) > 40 else resource.title
-                
-                table_data.append([
-                    title_short,
-                    resource.category.name,
-                    club_name,
-                    author_name,
-                    date_str
-                ])
-            
-            # Créer le tableau
-            table = Table(table_data, colWidths=[2.5*inch, 1.2*inch, 1.2*inch, 1.2*inch, 0.9*inch])
-            table.setStyle(TableStyle([
-                # En-tête
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#7c3aed')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('TOPPADDING', (0, 0), (-1, 0), 12),
-                # Lignes alternées
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8fafc')]),
-                # Bordures
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
-                # Alignement du texte
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ]))
-            
-            elements.append(table)
-            elements.append(Spacer(1, 0.3*inch))
-        
-        # Détails complets de chaque ressource
-        subtitle = Paragraph("Détails des ressources", subtitle_style)
-        elements.append(subtitle)
-        elements.append(Spacer(1, 0.1*inch))
-        
-        for idx, resource in enumerate(resources, 1):
-            # Titre de la ressource
-            resource_title = Paragraph(
-                f"<b>{idx}. {resource.title}</b>",
-                subtitle_style
-            )
-            elements.append(resource_title)
-            
-            # Informations dans un tableau stylisé
-            info_data = [
-                ['<b>Catégorie:</b>', resource.category.name],
-                ['<b>Club:</b>', resource.club.name if resource.club else "Non spécifié"],
-                ['<b>Auteur:</b>', resource.submitted_by.get_full_name() or resource.submitted_by.username],
-                ['<b>Date de soumission:</b>', resource.date_submitted.strftime("%d/%m/%Y à %H:%M")],
-                ['<b>Statut:</b>', "Validée" if resource.is_validated else "En attente de validation"],
-            ]
-            
-            info_table = Table(info_data, colWidths=[1.5*inch, 4.5*inch])
-            info_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f1f5f9')),
-                ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#5b21b6')),
-                ('TEXTCOLOR', (1, 0), (1, -1), colors.black),
-                ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-                ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ]))
-            elements.append(info_table)
-            
-            # Description
-            elements.append(Spacer(1, 0.1*inch))
-            desc_title = Paragraph("<b>Description:</b>", normal_style)
-            elements.append(desc_title)
-            
-            # Nettoyer la description pour le PDF (supprimer HTML si présent)
-            description = resource.description.replace('\n', '<br/>')
-            desc_para = Paragraph(description, normal_style)
-            elements.append(desc_para)
-            
-            # Séparateur entre les ressources
-            if idx < resources.count():
-                elements.append(Spacer(1, 0.2*inch))
-                elements.append(Paragraph(
-                    "<hr width='100%' color='#e2e8f0'/>",
-                    normal_style
-                ))
-                elements.append(Spacer(1, 0.2*inch))
-        
-        # Construire le PDF
-        doc.build(elements)
-        
-        # Récupérer le contenu du buffer
-        pdf = buffer.getvalue()
-        buffer.close()
-        
-        # Créer la réponse HTTP
-        date_str = timezone.now().strftime("%d_%m_%Y")
-        filename = f'ressources_export_{date_str}.pdf'
-        
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response.write(pdf)
-        
-        return response
+        return export.response()
 
 
-# Alias pour compatibilité avec function-based view
+@login_required
 def export_resources_pdf(request):
-    """Fonction wrapper pour l'export PDF des ressources."""
-    view = ExportResourcesPDFView.as_view()
-    return view(request)
+    """Met en file l'export PDF des ressources (voir ExportResourcesPDFView pour l'export direct)."""
+    return enqueue_catalogue_export(request, ExportJob.KIND_RESOURCES, 'resources:resource_list')
 
 
 class ExportAidsPDFView(LoginRequiredMixin, View):
     """
     Vue pour exporter les aides en PDF.
     Génère un PDF professionnel avec toutes les aides validées (ou toutes si admin).
+    Le PDF est produit par lots et renvoyé en streaming ; ``?mode=table`` limite
+    l'export au tableau récapitulatif.
     """
     
     def get(self, request):
         """Génère et retourne le PDF des aides."""
-        # Récupérer les aides selon les mêmes règles que AidListView
-        queryset = Aid.objects.select_related("category", "club", "submitted_by")
-        
-        # Filtrer par validation (même logique que AidListView)
-        if not is_admin(request.user):
-            queryset = queryset.filter(is_validated=True)
-        
-        # Appliquer les mêmes filtres que la liste si présents
-        search_query = request.GET.get('q', '').strip()
-        if search_query:
-            queryset = queryset.filter(title__icontains=search_query)
-        
-        category_filter = request.GET.get('category', '')
-        if category_filter:
-            queryset = queryset.filter(category_id=category_filter)
-        
-        club_filter = request.GET.get('club', '')
-        if club_filter:
-            queryset = queryset.filter(club_id=club_filter)
-        
-        aids = queryset.order_by('-date_submitted')
-        
-        # Créer le buffer pour le PDF
-        buffer = BytesIO()
-        
-        # Créer le document PDF
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
+        if not exports.is_available():
+            messages.error(request, "L'export PDF nécessite ReportLab.")
+            return redirect('resources:aid_list')
+        
+        # Mêmes règles de validation et mêmes filtres que la liste
+        params = exports.get_export_params(request)
+        export = exports.PDFExport(
+            exports.get_export_queryset(Aid, params),
+            title="Aides",
+            item_label="aides",
+            filename_prefix="aides_export",
+            mode=params['mode'],
         )
-        
-        # Conteneur pour les éléments du PDF
-        elements = []
-        
-        # Styles
-        styles = getSampleStyleSheet()
-        
-        # Style personnalisé pour le titre
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#7c3aed'),
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        )
-        
-        # Style pour les sous-titres
-        subtitle_style = ParagraphStyle(
-            'CustomSubtitle',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#5b21b6'),
-            spaceAfter=12,
-            spaceBefore=20,
-            fontName='Helvetica-Bold'
-        )
-        
-        # Style pour le texte normal
-        normal_style = styles['Normal']
-        normal_style.fontSize = 10
-        normal_style.leading = 14
-        
-        # Style pour les métadonnées
-        meta_style = ParagraphStyle(
-            'Meta',
-            parent=styles['Normal'],
-            fontSize=9,
-            textColor=colors.HexColor('#64748b'),
-            spaceAfter=10
-        )
-        
-        # En-tête
-        title = Paragraph("Aides", title_style)
-        elements.append(title)
-        
-        # Date d'export
-        export_date = timezone.now().strftime("%d/%m/%Y à %H:%M")
-        date_text = Paragraph(f"<i>Export généré le {export_date}</i>", meta_style)
-        elements.append(date_text)
-        elements.append(Spacer(1, 0.3*inch))
-        
-        # Informations sur le nombre d'aides
-        count_text = Paragraph(
-            f"<b>Nombre total d'aides : {aids.count()}</b>",
-            normal_style
+        return export.response()
+
+
+@login_required
+def export_aids_pdf(request):
+    """Met en file l'export PDF des aides (voir ExportAidsPDFView pour l'export direct)."""
+    return enqueue_catalogue_export(request, ExportJob.KIND_AIDS, 'resources:aid_list')
+
+
+# ============================================================================
+# EXPORTS EN ARRIÈRE-PLAN
+# ============================================================================
+
+def wants_json(request):
+    """True pour les appels AJAX ou les clients qui demandent du JSON."""
+    return (
+        request.headers.get('x-requested-with') == 'XMLHttpRequest'
+        or 'application/json' in request.headers.get('accept', '')
+    )
+
+
+def export_job_payload(job):
+    """Représentation JSON d'une tâche d'export."""
+    return {
+        'job': job.pk,
+        'status': job.status,
+        'status_url': reverse('resources:export_job_status', args=[job.pk]),
+        'download_url': reverse('resources:export_job_download', args=[job.pk]) if job.is_done else None,
+    }
+
+
+def export_job_response(request, job):
+    """Réponse commune après la mise en file : JSON (202 si pas prêt) ou redirection."""
+    if wants_json(request):
+        return JsonResponse(export_job_payload(job), status=200 if job.is_done else 202)
+    if job.is_done:
+        return redirect('resources:export_job_download', pk=job.pk)
+    return redirect('resources:export_job_status', pk=job.pk)
+
+
+def enqueue_catalogue_export(request, kind, fallback_url):
+    """Crée (ou réutilise) la tâche d'export correspondant aux filtres de la liste."""
+    if not exports.is_available():
+        messages.error(request, "L'export PDF nécessite ReportLab.")
+        return redirect(fallback_url)
+    job, created = jobs.enqueue_export(kind, exports.get_export_params(request), request.user)
+    return export_job_response(request, job)
+
+
+def export_job_status(request, pk):
+    """État d'une tâche d'export : page HTML rafraîchie automatiquement, ou JSON."""
+    job = get_object_or_404(ExportJob, pk=pk)
+    if not jobs.can_access(job, request.user):
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        raise PermissionDenied("Vous n'avez pas accès à cet export.")
+    if wants_json(request):
+        return JsonResponse(export_job_payload(job))
+    return render(request, "resources/export_job.html", {"job": job})
+
+
+def export_job_download(request, pk):
+    """Télécharge le PDF d'une tâche terminée, servi depuis le cache."""
+    job = get_object_or_404(ExportJob, pk=pk)
+    if not jobs.can_access(job, request.user):
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        raise PermissionDenied("Vous n'avez pas accès à cet export.")
+    if not job.is_done:
+        return redirect('resources:export_job_status', pk=job.pk)
+    try:
+        pdf = job.file.open('rb')
+    except (OSError, ValueError):
+        # Fichier purgé ou perdu : l'export est relancé avec les données actuelles
+        try:
+            job, created = jobs.enqueue_export(job.kind, job.params, request.user)
+        except ObjectDoesNotExist:
+            raise Http404("Cet export n'est plus disponible.")
+        return redirect('resources:export_job_status', pk=job.pk)
+    return FileResponse(
+        pdf,
+        as_attachment=True,
+        filename=jobs.get_download_filename(job),
+        content_type='application/pdf',
+    )
+
+
+# ============================================================================
+# RECHERCHE GLOBALE
+# ============================================================================
+
+@login_required
+def global_search_view(request):
+    """
+    Recherche dans les ressources, aides, événements, clubs et discussions du
+    forum visibles par l'utilisateur. ``?format=json`` renvoie les résultats en JSON.
+    """
+    query = request.GET.get("q", "").strip()
+    kinds = [kind for kind in request.GET.getlist("kind") if kind]
+    try:
+        limit = int(request.GET.get("limit", global_search.DEFAULT_LIMIT))
+    except ValueError:
+        limit = global_search.DEFAULT_LIMIT
+    results = global_search.search(query, request.user, kinds=kinds, limit=limit)
+
+    if request.GET.get("format") == "json":
+        return JsonResponse({
+            "query": query,
+            "results": [
+                {
+                    "kind": result.kind,
+                    "label": result.label,
+                    "title": result.title,
+                    "snippet": str(result.snippet),
+                    "url": result.url,
+                }
+                for result in results
+            ],
+        })
+
+    return render(request, "resources/global_search.html", {
+        "search_query": query,
+        "results": results,
+        "kinds": [(kind, indexer.label) for kind, indexer in global_search.INDEXERS.items()],
+        "selected_kinds": kinds,
+    })
+
+
+# ============================================================================
+# TÉLÉCHARGEMENT PROTÉGÉ DES FICHIERS
+# ============================================================================
+
+def _download(request, model, pk):
+    """Mêmes règles que les vues de détail : fichiers non validés réservés aux admins."""
+    obj = get_object_or_404(model.objects.only("pk", "title", "file", "is_validated"), pk=pk)
+    if not is_admin(request.user) and not obj.is_validated:
+        raise PermissionDenied("Ce fichier n'est pas encore validé.")
+    if not obj.file:
+        raise Http404("Aucun fichier.")
+    return downloads.serve_file(request, obj.file, downloads.download_filename(obj.title, obj.file.name))
+
+
+@login_required
+def resource_download(request, pk):
+    """Téléchargement (reprenable) du fichier d'une ressource."""
+    return _download(request, Resource, pk)
+
+
+@login_required
+def aid_download(request, pk):
+    """Téléchargement (reprenable) du fichier d'une aide."""
+    return _download(request, Aid, pk)
+
+
+# ============================================================================
+# ENVOI DE FICHIERS PAR MORCEAUX
+# ============================================================================
+
+def upload_session_payload(session):
+    return {
+        "id": str(session.pk),
+        "target": session.target,
+        "filename": session.filename,
+        "size": session.size,
+        "offset": session.received,
+        "complete": session.is_complete,
+        "sha256": session.sha256 or None,
+        "chunk_size": uploads.CHUNK_SIZE,
+        "upload_url": reverse("resources:upload_session_detail", args=[session.pk]),
+        "commit_url": reverse("resources:upload_session_commit", args=[session.pk]),
+    }
+
+
+def _json_body(request):
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError:
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def _upload_error(error):
+    payload = {"error": str(error)}
+    if isinstance(error, uploads.UploadConflict):
+        payload["offset"] = error.offset
+    return JsonResponse(payload, status=error.status)
+
+
+@login_required
+def upload_session_create(request):
+    """Ouvre un envoi par morceaux (POST JSON : target, filename, size, sha256 facultatif)."""
+    if request.method != "POST":
+        return JsonResponse({"error": "Méthode non autorisée."}, status=405)
+    if not is_organizer(request.user):
+        raise PermissionDenied("Vous n'avez pas les permissions d'organisateur.")
+    payload = _json_body(request)
+    if payload is None:
+        return JsonResponse({"error": "JSON invalide."}, status=400)
+    try:
+        session = uploads.create_session(
+            request.user,
+            payload.get("target"),
+            payload.get("filename"),
+            payload.get("size"),
+            payload.get("sha256", ""),
         )
-        elements.append(count_text)
-        elements.append(Spacer(1, 0.2*inch))
-        
-        # Tableau récapitulatif (optionnel - peut être commenté si trop long)
-        if aids.count() <= 50:  # Afficher le tableau seulement si moins de 50 aides
-            # En-tête du tableau
-            table_data = [['Titre', 'Catégorie', 'Club', 'Auteur', 'Date']]
-            
-            # Données du tableau
-            for aid in aids[:50]:  # Limiter à 50 pour éviter les PDF trop longs
-                club_name = aid.club.name if aid.club else "N/A"
-                author_name = aid.submitted_by.get_full_name() or aid.submitted_by.username
-                date_str = aid.date_submitted.strftime("%d/%m/%Y")
-                
-                # Tronquer le titre si trop long
-                title_short = aid.title[:40] + "..." if len(aid.title) > 40 else aid.title
-                
-                table_data.append([
-                    title_short,
-                    aid.category.name,
-                    club_name,
-                    author_name,
-                    date_str
-                ])
-            
-            # Créer le tableau
-            table = Table(table_data, colWidths=[2.5*inch, 1.2*inch, 1.2*inch, 1.2*inch, 0.9*inch])
-            table.setStyle(TableStyle([
-                # En-tête
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#7c3aed')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('TOPPADDING', (0, 0), (-1, 0), 12),
-                # Lignes alternées
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8fafc')]),
-                # Bordures
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
-                # Alignement du texte
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ]))
-            
-            elements.append(table)
-            elements.append(Spacer(1, 0.3*inch))
-        
-        # Détails complets de chaque aide
-        subtitle = Paragraph("Détails des aides", subtitle_style)
-        elements.append(subtitle)
-        elements.append(Spacer(1, 0.1*inch))
-        
-        for idx, aid in enumerate(aids, 1):
-            # Titre de l'aide
-            aid_title = Paragraph(
-                f"<b>{idx}. {aid.title}</b>",
-                subtitle_style
+    except uploads.UploadError as error:
+        return _upload_error(error)
+    return JsonResponse(upload_session_payload(session), status=201)
+
+
+@login_required
+def upload_session_detail(request, pk):
+    """GET : état de l'envoi (octet de reprise). PUT : ajoute un morceau (Content-Range)."""
+    session = get_object_or_404(UploadSession, pk=pk, user=request.user)
+    if request.method == "PUT":
+        try:
+            uploads.write_chunk(
+                session,
+                request,
+                request.headers.get("Content-Range"),
+                request.headers.get("X-Content-SHA256", ""),
             )
-            elements.append(aid_title)
-            
-            # Informations dans un tableau stylisé
-            info_data = [
-                ['<b>Catégorie:</b>', aid.category.name],
-                ['<b>Club:</b>', aid.club.name if aid.club else "Non spécifié"],
-                ['<b>Auteur:</b>', aid.submitted_by.get_full_name() or aid.submitted_by.username],
-                ['<b>Date de soumission:</b>', aid.date_submitted.strftime("%d/%m/%Y à %H:%M")],
-                ['<b>Statut:</b>', "Validée" if aid.is_validated else "En attente de validation"],
-            ]
-            
-            info_table = Table(info_data, colWidths=[1.5*inch, 4.5*inch])
-            info_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f1f5f9')),
-                ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#5b21b6')),
-                ('TEXTCOLOR', (1, 0), (1, -1), colors.black),
-                ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-                ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ]))
-            elements.append(info_table)
-            
-            # Description
-            elements.append(Spacer(1, 0.1*inch))
-            desc_title = Paragraph("<b>Description:</b>", normal_style)
-            elements.append(desc_title)
-            
-            # Nettoyer la description pour le PDF (supprimer HTML si présent)
-            description = aid.description.replace('\n', '<br/>')
-            desc_para = Paragraph(description, normal_style)
-            elements.append(desc_para)
-            
-            # Séparateur entre les aides
-            if idx < aids.count():
-                elements.append(Spacer(1, 0.2*inch))
-                elements.append(Paragraph(
-                    "<hr width='100%' color='#e2e8f0'/>",
-                    normal_style
-                ))
-                elements.append(Spacer(1, 0.2*inch))
-        
-        # Construire le PDF
-        doc.build(elements)
-        
-        # Récupérer le contenu du buffer
-        pdf = buffer.getvalue()
-        buffer.close()
-        
-        # Créer la réponse HTTP
-        date_str = timezone.now().strftime("%d_%m_%Y")
-        filename = f'aides_export_{date_str}.pdf'
-        
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response.write(pdf)
-        
-        return response
+        except uploads.UploadError as error:
+            return _upload_error(error)
+    elif request.method != "GET":
+        return JsonResponse({"error": "Méthode non autorisée."}, status=405)
+    return JsonResponse(upload_session_payload(session))
 
 
-# Alias pour compatibilité avec function-based view
-def export_aids_pdf(request):
-    """Fonction wrapper pour l'export PDF des aides."""
-    view = ExportAidsPDFView.as_view()
-    return view(request)
+@login_required
+def upload_session_commit(request, pk):
+    """
+    Termine l'envoi. Avec ``object_id`` (administrateurs), le fichier remplace
+    celui de la ressource ou de l'aide correspondante ; sinon l'identifiant de
+    l'envoi peut être transmis au formulaire de création.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Méthode non autorisée."}, status=405)
+    session = get_object_or_404(UploadSession, pk=pk, user=request.user)
+    payload = _json_body(request)
+    if payload is None:
+        return JsonResponse({"error": "JSON invalide."}, status=400)
+    try:
+        uploads.finalize(session)
+        if payload.get("object_id"):
+            if not is_admin(request.user):
+                raise PermissionDenied("Vous n'avez pas les permissions d'administrateur.")
+            model = uploads.TARGET_MODELS[session.target]
+            uploads.attach(session, get_object_or_404(model, pk=payload["object_id"]))
+    except uploads.UploadError as error:
+        return _upload_error(error)
+    return JsonResponse(upload_session_payload(session))
 
 
 # ============================================================================
@@ -937,18 +836,11 @@ def toggle_favorite_resource(request, pk):
         return redirect('resources:resource_detail', pk=pk)
     
     resource = get_object_or_404(Resource, pk=pk)
-    user = request.user
     
-    # Vérifier si le favori existe déjà
-    favorite, created = Favorite.objects.get_or_create(
-        user=user,
-        resource=resource,
-        defaults={'aid': None}
-    )
+    # Ajoute le favori, ou le retire s'il existe déjà (le cache des favoris suit)
+    created = favorites.toggle_favorite(request.user, resource)
     
     if not created:
-        # Le favori existe déjà, on le supprime
-        favorite.delete()
         messages.success(request, f"'{resource.title}' a été retiré de vos favoris.")
     else:
         # Le favori a été créé
@@ -971,18 +863,11 @@ def toggle_favorite_aid(request, pk):
         return redirect('resources:aid_detail', pk=pk)
     
     aid = get_object_or_404(Aid, pk=pk)
-    user = request.user
     
-    # Vérifier si le favori existe déjà
-    favorite, created = Favorite.objects.get_or_create(
-        user=user,
-        aid=aid,
-        defaults={'resource': None}
-    )
+    # Ajoute le favori, ou le retire s'il existe déjà (le cache des favoris suit)
+    created = favorites.toggle_favorite(request.user, aid)
     
     if not created:
-        # Le favori existe déjà, on le supprime
-        favorite.delete()
         messages.success(request, f"'{aid.title}' a été retiré de vos favoris.")
     else:
         # Le favori a été créé
@@ -992,7 +877,7 @@ def toggle_favorite_aid(request, pk):
     return redirect('resources:aid_detail', pk=pk)
 
 
-class FavoriteListView(LoginRequiredMixin, ListView):
+class FavoriteListView(CursorPaginationMixin, LoginRequiredMixin, ListView):
     """
     Vue pour afficher tous les favoris de l'utilisateur connecté.
     Permet de filtrer par type (ressources/aides) et de rechercher par titre.
@@ -1038,116 +923,45 @@ class FavoriteListView(LoginRequiredMixin, ListView):
 def admin_dashboard(request):
     """
     Vue du tableau de bord administrateur.
-    Calcule les statistiques des ressources, aides, demandes et clubs les plus actifs.
+    Affiche les statistiques des ressources, aides, demandes et clubs les plus actifs,
+    calculées en un nombre constant de requêtes par ``resources.stats``.
     """
-    # Calculer les dates pour cette semaine et ce mois avec timezone
-    now = timezone.now()
-    today = now.date()
-    
-    # Lundi de cette semaine (weekday() retourne 0 pour lundi, 6 pour dimanche)
-    start_of_week = today - timedelta(days=today.weekday())
-    start_of_week_datetime = timezone.make_aware(
-        datetime.combine(start_of_week, datetime.min.time())
-    )
-    
-    # Premier jour du mois
-    start_of_month = today.replace(day=1)
-    start_of_month_datetime = timezone.make_aware(
-        datetime.combine(start_of_month, datetime.min.time())
-    )
+    context = stats.get_dashboard_stats()
+    return render(request, "resources/admin_dashboard.html", context)
 
-    # Statistiques pour les ressources (utiliser date_submitted au lieu de created_at)
-    resources_this_week = Resource.objects.filter(
-        date_submitted__gte=start_of_week_datetime
-    ).count()
-    resources_this_month = Resource.objects.filter(
-        date_submitted__gte=start_of_month_datetime
-    ).count()
-
-    # Statistiques pour les aides (utiliser date_submitted au lieu de created_at)
-    aids_this_week = Aid.objects.filter(
-        date_submitted__gte=start_of_week_datetime
-    ).count()
-    aids_this_month = Aid.objects.filter(
-        date_submitted__gte=start_of_month_datetime
-    ).count()
-
-    # Statistiques pour les demandes d'aide par statut
-    aid_requests_pending = AidRequest.objects.filter(status=AidRequest.STATUS_PENDING).count()
-    aid_requests_approved = AidRequest.objects.filter(status=AidRequest.STATUS_APPROVED).count()
-    aid_requests_rejected = AidRequest.objects.filter(status=AidRequest.STATUS_REJECTED).count()
-
-    # Top 5 des clubs les plus actifs (par nombre total de ressources + aides liées)
-    top_clubs = (
-        Club.objects.annotate(
-            total_resources=Count("resources"),
-            total_aids=Count("aids"),
-            total_activities=Count("resources") + Count("aids")
-        )
-        .filter(total_activities__gt=0)
-        .order_by("-total_activities")[:5]
-    )
 
-    # Préparer les données pour les graphiques : ressources et aides par mois (6 derniers mois)
-    months_data = []
-    resources_by_month = []
-    aids_by_month = []
-    
-    # Calculer les 6 derniers mois en utilisant une approche simple
-    current_year = today.year
-    current_month = today.month
-    
-    for i in range(5, -1, -1):  # 6 derniers mois (5, 4, 3, 2, 1, 0)
-        # Calculer le mois cible
-        target_month = current_month - i
-        target_year = current_year
-        
-        # Gérer le passage d'année
-        while target_month <= 0:
-            target_month += 12
-            target_year -= 1
-        
-        # Premier jour du mois
-        month_start = datetime(target_year, target_month, 1).date()
-        
-        # Dernier jour du mois
-        last_day = calendar.monthrange(target_year, target_month)[1]
-        month_end = datetime(target_year, target_month, last_day).date()
-        
-        month_start_datetime = timezone.make_aware(
-            datetime.combine(month_start, datetime.min.time())
-        )
-        month_end_datetime = timezone.make_aware(
-            datetime.combine(month_end, datetime.max.time())
-        )
-        
-        months_data.append(month_start.strftime("%b %Y"))
-        resources_by_month.append(
-            Resource.objects.filter(
-                date_submitted__gte=month_start_datetime,
-                date_submitted__lte=month_end_datetime
-            ).count()
-        )
-        aids_by_month.append(
-            Aid.objects.filter(
-                date_submitted__gte=month_start_datetime,
-                date_submitted__lte=month_end_datetime
-            ).count()
-        )
+# Fenêtre par défaut et fenêtre maximale (en jours) de l'API des statistiques
+DAILY_STATS_DEFAULT_DAYS = 30
+DAILY_STATS_MAX_DAYS = 3660
 
-    # Préparer les données pour le template
-    context = {
-        "resources_this_week": resources_this_week,
-        "resources_this_month": resources_this_month,
-        "aids_this_week": aids_this_week,
-        "aids_this_month": aids_this_month,
-        "aid_requests_pending": aid_requests_pending,
-        "aid_requests_approved": aid_requests_approved,
-        "aid_requests_rejected": aid_requests_rejected,
-        "top_clubs": top_clubs,
-        "months_data": months_data,
-        "resources_by_month": resources_by_month,
-        "aids_by_month": aids_by_month,
-    }
 
-    return render(request, "resources/admin_dashboard.html", context)
+@staff_member_required
+def daily_stats_api(request):
+    """
+    Série journalière lue dans DailyStat, pour les graphiques sur une période libre.
+    Paramètres GET : kind (resource, aid, request), start et end (AAAA-MM-JJ), club, category.
+    """
+    kind = request.GET.get("kind", DailyStat.KIND_RESOURCE)
+    if kind not in rollup.SOURCES:
+        return JsonResponse({"error": "Type inconnu."}, status=400)
+    try:
+        end = date.fromisoformat(request.GET["end"]) if request.GET.get("end") else timezone.localdate()
+        start = (
+            date.fromisoformat(request.GET["start"]) if request.GET.get("start")
+            else end - timedelta(days=DAILY_STATS_DEFAULT_DAYS - 1)
+        )
+        club = int(request.GET["club"]) if request.GET.get("club") else None
+        category = int(request.GET["category"]) if request.GET.get("category") else None
+    except ValueError:
+        return JsonResponse({"error": "Paramètres invalides."}, status=400)
+    if start > end or (end - start).days >= DAILY_STATS_MAX_DAYS:
+        return JsonResponse({"error": "Période invalide."}, status=400)
+
+    series = rollup.daily_series(kind, start, end, club=club, category=category)
+    return JsonResponse({
+        "kind": kind,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "totals": rollup.range_totals(kind, start, end, club=club, category=category),
+        "series": [dict(point, date=point["date"].isoformat()) for point in series],
+    })
@@ -0,0 +1,117 @@
+// Envoi des gros fichiers par morceaux (ressources et aides).
+// Au-delà de CHUNKED_THRESHOLD, le fichier est envoyé morceau par morceau vers
+// l'API d'envoi, avec reprise à l'octet indiqué par le serveur en cas d'échec.
+// Le formulaire est ensuite soumis avec le seul identifiant de l'envoi.
+
+(function() {
+    const CHUNKED_THRESHOLD = 8 * 1024 * 1024;
+    const MAX_RETRIES = 5;
+
+    function getCsrfToken(form) {
+        const input = form.querySelector('input[name="csrfmiddlewaretoken"]');
+        return input ? input.value : '';
+    }
+
+    async function requestJson(url, options) {
+        const response = await fetch(url, Object.assign({credentials: 'same-origin'}, options));
+        const data = await response.json().catch(function() { return {}; });
+        return {response: response, data: data};
+    }
+
+    async function uploadFile(container, file, csrfToken, onProgress) {
+        const headers = {'X-CSRFToken': csrfToken, 'Content-Type': 'application/json'};
+        const created = await requestJson(container.dataset.chunkedUpload, {
+            method: 'POST',
+            headers: headers,
+            body: JSON.stringify({
+                target: container.dataset.uploadTarget,
+                filename: file.name,
+                size: file.size
+            })
+        });
+        if (!created.response.ok) {
+            throw new Error(created.data.error || "Impossible de démarrer l'envoi.");
+        }
+
+        const session = created.data;
+        let offset = session.offset;
+        let retries = 0;
+        while (offset < file.size) {
+            const end = Math.min(offset + session.chunk_size, file.size);
+            try {
+                const result = await requestJson(session.upload_url, {
+                    method: 'PUT',
+                    headers: {
+                        'X-CSRFToken': csrfToken,
+                        'Content-Range': 'bytes ' + offset + '-' + (end - 1) + '/' + file.size
+                    },
+                    body: file.slice(offset, end)
+                });
+                if (result.response.ok || result.response.status === 409) {
+                    offset = result.data.offset;
+                    retries = 0;
+                    onProgress(offset / file.size);
+                    continue;
+                }
+                throw new Error(result.data.error || "Échec de l'envoi d'un morceau.");
+            } catch (error) {
+                retries += 1;
+                if (retries > MAX_RETRIES) {
+                    throw error;
+                }
+                // Reprise à l'octet confirmé par le serveur
+                const status = await requestJson(session.upload_url, {method: 'GET'});
+                if (status.response.ok) {
+                    offset = status.data.offset;
+                }
+            }
+        }
+
+        const committed = await requestJson(session.commit_url, {method: 'POST', headers: headers, body: '{}'});
+        if (!committed.response.ok) {
+            throw new Error(committed.data.error || "Impossible de terminer l'envoi.");
+        }
+        return committed.data.id;
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        document.querySelectorAll('[data-chunked-upload]').forEach(function(container) {
+            const form = container.closest('form');
+            const fileInput = container.querySelector('input[type="file"]');
+            const uploadInput = container.querySelector('input[name="upload"]');
+            const progress = container.querySelector('[data-upload-progress]');
+            if (!form || !fileInput || !uploadInput) {
+                return;
+            }
+
+            form.addEventListener('submit', async function(event) {
+                const file = fileInput.files[0];
+                if (!file || file.size < CHUNKED_THRESHOLD || uploadInput.value) {
+                    return;
+                }
+                event.preventDefault();
+                const submitButton = form.querySelector('[type="submit"]');
+                if (submitButton) {
+                    submitButton.disabled = true;
+                }
+                if (progress) {
+                    progress.classList.remove('d-none');
+                }
+                try {
+                    uploadInput.value = await uploadFile(container, file, getCsrfToken(form), function(ratio) {
+                        if (progress) {
+                            progress.firstElementChild.style.width = Math.round(ratio * 100) + '%';
+                        }
+                    });
+                    fileInput.value = '';
+                    form.submit();
+                } catch (error) {
+                    alert(error.message);
+                    if (submitButton) {
+                        submitButton.disabled = false;
+                    }
+                }
+            });
+        });
+    });
+})();